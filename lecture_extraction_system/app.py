@@ -1,26 +1,264 @@
-from flask import Flask, request, jsonify
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
-import cv2
-import whisper
-import easyocr
+from flask import Flask, request, jsonify, Response, stream_with_context
 import subprocess
 import os
 import tempfile
 import uuid
 import threading
+import json
+import time
+import hashlib
+import sqlite3
+from collections import OrderedDict
 import numpy as np
-import chromadb
-from sentence_transformers import SentenceTransformer
+import generation_backends
+from generation_backends import (
+    create_backend, build_prompt, build_summary_prompt, PromptTooLong, GENERATION_BACKEND, MODEL_CONTEXT_TOKENS,
+)
+from metrics import JobMetrics, render_prometheus
+from profiling import JobProfiler, profiling_enabled
+from contextlib import nullcontext, contextmanager
 
 app = Flask(__name__)
-model = None
-tokenizer = None
+llm = None
 embedder = None
 chroma_client = None
 jobs = {}
 FRAME_RATE = 30
 
+# Bumped on every job update so /status/<job_id>/stream can block instead of polling
+job_events = threading.Condition()
+job_version = 0
+STREAM_KEEPALIVE = 15
+
+EMBEDDER_NAME = "all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = 64
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", os.path.join(tempfile.gettempdir(), "embedding_cache.sqlite"))
+embedding_cache = None
+
+# Prompt budget: prompt tokens + max_new_tokens must fit in MODEL_CONTEXT_TOKENS
+RAG_CANDIDATES = 10
+
+# Semantic answer cache for /generate (per job_id, matched by question embedding)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2000"))
+ANSWER_CACHE_MAX_TEMPERATURE = float(os.getenv("ANSWER_CACHE_MAX_TEMPERATURE", "0.8"))
+
+# /summarize: texts per request, generated together in one padded batch
+SUMMARIZE_MAX_BATCH = int(os.getenv("SUMMARIZE_MAX_BATCH", "8"))
+DEFAULT_SUMMARY_INSTRUCTION = "Summarize this part of a lecture in a few sentences, keeping key terms, definitions and examples."
+
+# priority="low" batches (ingest-time digests) run one at a time and only while no question is being
+# generated; after LOW_PRIORITY_MAX_WAIT seconds they run anyway so a busy backend cannot starve them
+LOW_PRIORITY_MAX_WAIT = float(os.getenv("LOW_PRIORITY_MAX_WAIT", "60"))
+interactive_idle = threading.Condition()
+interactive_active = 0
+low_priority_lock = threading.Lock()
+
+# Opt-in per-job profiles (LECTURE_PROFILE=1 or profile=1 on /upload); summaries ride along in /result
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "lecture_profiles"))
+
+# Process-wide span/counter totals served at /metrics; each job also keeps its own
+backend_metrics = JobMetrics()
+
+@contextmanager
+def interactive_generation():
+    global interactive_active
+    with interactive_idle:
+        interactive_active += 1
+    try:
+        yield
+    finally:
+        with interactive_idle:
+            interactive_active -= 1
+            interactive_idle.notify_all()
+
+
+@contextmanager
+def low_priority_slot():
+    with low_priority_lock:
+        with backend_metrics.span("low_priority_wait"):
+            with interactive_idle:
+                interactive_idle.wait_for(lambda: interactive_active == 0, timeout=LOW_PRIORITY_MAX_WAIT)
+        yield
+
+# =============================
+# JOB STATE HELPERS
+# =============================
+def update_job(job_id, **fields):
+    global job_version
+    with job_events:
+        jobs[job_id].update(fields)
+        job_version += 1
+        job_events.notify_all()
+
+def job_status_payload(j):
+    return {"status": j["status"], "progress": j["progress"], "message": j["message"], "error": j.get("error")}
+
+# =============================
+# EMBEDDING CACHE
+# =============================
+class EmbeddingCache:
+    """Embeddings keyed by sha256(model + text), stored as float32 blobs in SQLite.
+
+    Shared by indexing and query-time encoding, so re-indexing after a
+    chunking change or lectures with shared slides only embed new text."""
+
+    def __init__(self, path, model_name):
+        self.model_name = model_name
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, dim INTEGER, vec BLOB)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        found = {}
+        with self.lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, vec in rows:
+                    found[key] = np.frombuffer(vec, dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vec) VALUES (?, ?, ?)",
+                [(k, len(v), np.asarray(v, dtype=np.float32).tobytes()) for k, v in items],
+            )
+            self.conn.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+def token_length(text):
+    tok = getattr(embedder, "tokenizer", None)
+    if tok is not None:
+        return len(tok.tokenize(text))
+    return len(text.split())
+
+def embed_texts(texts):
+    """Encode texts through the cache. Misses are sorted by token length before
+    batching so each batch pads to similar lengths. Returns (embeddings, stats)."""
+    keys = [embedding_cache.key(t) for t in texts]
+    cached = embedding_cache.get_many(list(set(keys)))
+
+    missing = {}
+    for k, t in zip(keys, texts):
+        if k not in cached:
+            missing.setdefault(k, t)
+    hits = len(texts) - sum(1 for k in keys if k in missing)
+
+    if missing:
+        items = sorted(missing.items(), key=lambda kv: token_length(kv[1]))
+        for i in range(0, len(items), EMBED_BATCH_SIZE):
+            batch = items[i:i + EMBED_BATCH_SIZE]
+            vecs = embedder.encode([t for _, t in batch], batch_size=len(batch))
+            new = list(zip([k for k, _ in batch], vecs))
+            embedding_cache.put_many(new)
+            cached.update({k: np.asarray(v, dtype=np.float32) for k, v in new})
+
+    with embedding_cache.lock:
+        embedding_cache.hits += hits
+        embedding_cache.misses += len(texts) - hits
+    stats = {"hits": hits, "misses": len(texts) - hits, "hit_rate": round(hits / len(texts), 4) if texts else 0.0}
+    return [cached[k].tolist() for k in keys], stats
+
+# =============================
+# ANSWER CACHE
+# =============================
+class AnswerCache:
+    """LRU + TTL cache of generated answers, looked up by cosine similarity
+    between question embeddings within the same job_id. clock is injectable for tests."""
+
+    def __init__(self, threshold, ttl, max_size, clock=time.time):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # entry id -> entry, oldest first
+        self.by_job = {}              # job_id -> set of entry ids
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _drop(self, entry_id):
+        entry = self.entries.pop(entry_id)
+        ids = self.by_job.get(entry["job_id"])
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self.by_job[entry["job_id"]]
+
+    def lookup(self, job_id, embedding, max_tokens):
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        now = self.clock()
+        with self.lock:
+            best_id, best_sim = None, -1.0
+            for entry_id in list(self.by_job.get(job_id, ())):
+                entry = self.entries[entry_id]
+                if now - entry["created"] > self.ttl:
+                    self._drop(entry_id)
+                    continue
+                # A shorter cached answer can't stand in for a longer request
+                if entry["max_tokens"] < max_tokens:
+                    continue
+                sim = float(np.dot(entry["embedding"], query))
+                if sim > best_sim:
+                    best_id, best_sim = entry_id, sim
+            if best_id is None or best_sim < self.threshold:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(best_id)
+            self.hits += 1
+            entry = self.entries[best_id]
+            return {"text": entry["text"], "question": entry["question"], "metadata": entry["metadata"], "similarity": best_sim}
+
+    def put(self, job_id, embedding, question, max_tokens, text, metadata):
+        vec = np.asarray(embedding, dtype=np.float32)
+        vec = vec / (np.linalg.norm(vec) or 1.0)
+        with self.lock:
+            entry_id = self.next_id
+            self.next_id += 1
+            self.entries[entry_id] = {
+                "job_id": job_id, "embedding": vec, "question": question, "max_tokens": max_tokens,
+                "text": text, "metadata": metadata, "created": self.clock(),
+            }
+            self.by_job.setdefault(job_id, set()).add(entry_id)
+            while len(self.entries) > self.max_size:
+                self._drop(next(iter(self.entries)))
+
+    def invalidate(self, job_id):
+        with self.lock:
+            for entry_id in list(self.by_job.get(job_id, ())):
+                self._drop(entry_id)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+answer_cache = AnswerCache(ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, ANSWER_CACHE_SIZE)
+
+# =============================
+# PROMPT PACKING
+# =============================
+def pack_context(question, chunks, max_new_tokens, context_window=MODEL_CONTEXT_TOKENS, template=build_prompt):
+    """generation_backends.pack_context with the loaded model's tokenizer; raises PromptTooLong."""
+    return generation_backends.pack_context(llm, question, chunks, max_new_tokens, context_window, template)
+
 # =============================
 # CHUNKING HELPER
 # =============================
@@ -34,110 +272,174 @@ def chunk_text(text, chunk_size=300, overlap=50):
         i += chunk_size - overlap
     return chunks
 
-# =============================
-# VIDEO PROCESSING
-# =============================
-def process_video_task(job_id, video_path):
-    try:
-        jobs[job_id]["status"] = "processing"
-        jobs[job_id]["progress"] = 10
-        jobs[job_id]["message"] = "Extracting audio..."
-
-        audio_path = video_path.replace(".mp4", ".wav").replace(".avi", ".wav").replace(".mov", ".wav").replace(".mkv", ".wav")
-        subprocess.run(["ffmpeg", "-i", video_path, "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", "-y", audio_path],
-                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-
-        jobs[job_id]["progress"] = 25
-        jobs[job_id]["message"] = "Transcribing with Whisper..."
-
-        whisper_model = whisper.load_model("base")
-        result = whisper_model.transcribe(audio_path, verbose=False)
-        segments = result.get("segments", [])
-        transcript = [{"start": s["start"], "end": s["end"], "text": s.get("text", "").strip(), "confidence": 0.0} for s in segments]
-        duration = segments[-1]["end"] if segments else 0
-        full_transcript_text = " ".join([s["text"] for s in transcript])
-
-        jobs[job_id]["progress"] = 50
-        jobs[job_id]["message"] = "Extracting frames..."
-
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frames_data = []
-        frame_count = 0
-        saved = 0
-        ocr_reader = easyocr.Reader(["en"], gpu=True)
-        all_ocr_text = []
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            if frame_count % FRAME_RATE == 0:
-                timestamp = frame_count / fps
-                results = ocr_reader.readtext(frame)
-                printed_text = []
-                for (bbox, text, conf) in results:
-                    if conf >= 0.5:
-                        printed_text.append(text)
-                joined = " ".join(printed_text)
-                all_ocr_text.append(joined)
-                frames_data.append({
-                    "timestamp": timestamp,
-                    "printed_text": joined,
-                    "handwritten_text": "",
-                    "ocr_confidence": 0.0
-                })
-                saved += 1
-                if saved % 10 == 0:
-                    jobs[job_id]["progress"] = 50 + int(40 * saved / max(1, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) / FRAME_RATE)))
-                    jobs[job_id]["message"] = f"OCR on frames... {saved} done"
-            frame_count += 1
-        cap.release()
-
-        jobs[job_id]["progress"] = 90
-        jobs[job_id]["message"] = "Building RAG index..."
-
-        # Combine transcript and OCR text
-        combined_text = full_transcript_text + " " + " ".join(all_ocr_text)
-
-        # Chunk the combined text
-        chunks = chunk_text(combined_text, chunk_size=300, overlap=50)
-
-        # Embed and store in ChromaDB
-        collection_name = f"job_{job_id}"
-        collection = chroma_client.create_collection(name=collection_name)
-
-        batch_size = 50
+def build_rag_index(job_id, transcript, frames_data, metrics=None):
+    """Chunk transcript + OCR text and store the embeddings in a per-job collection."""
+    metrics = metrics or JobMetrics()
+    full_transcript_text = " ".join([s.get("text", "") for s in transcript])
+    all_ocr_text = []
+    for f in frames_data:
+        parts = [f.get("printed_text") or "", f.get("handwritten_text") or ""]
+        all_ocr_text.append(" ".join(p for p in parts if p))
+
+    # Combine transcript and OCR text
+    combined_text = full_transcript_text + " " + " ".join(all_ocr_text)
+
+    # Chunk the combined text
+    chunks = chunk_text(combined_text, chunk_size=300, overlap=50)
+
+    # Embed and store in ChromaDB
+    collection_name = f"job_{job_id}"
+    collection = chroma_client.create_collection(name=collection_name)
+
+    with metrics.span("embedding"):
+        embeddings, cache_stats = embed_texts(chunks)
+    metrics.incr("chunks_indexed", len(chunks))
+    metrics.incr("embedding_cache_hits", cache_stats["hits"])
+    metrics.incr("embedding_cache_misses", cache_stats["misses"])
+    print(f"[{job_id}] Embedded {len(chunks)} chunks, cache hit rate {cache_stats['hit_rate']:.0%}")
+
+    batch_size = 500
+    with metrics.span("vector_store_write"):
         for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-            embeddings = embedder.encode(batch).tolist()
             collection.add(
-                documents=batch,
-                embeddings=embeddings,
-                ids=[f"chunk_{i + j}" for j in range(len(batch))]
+                documents=chunks[i:i + batch_size],
+                embeddings=embeddings[i:i + batch_size],
+                ids=[f"chunk_{i + j}" for j in range(len(chunks[i:i + batch_size]))]
             )
+    return len(chunks), cache_stats
 
-        jobs[job_id]["progress"] = 95
-        jobs[job_id]["message"] = "Finalizing..."
-
+# =============================
+# VIDEO PROCESSING
+# =============================
+def job_profiler(job_id, enabled):
+    if not enabled:
+        return nullcontext()
+    return JobProfiler(os.path.join(PROFILE_DIR, job_id), "backend")
+
+def process_video_task(job_id, video_path, profile=False):
+    # Video and OCR stacks are only needed for /upload jobs, so /index-only servers can skip installing them
+    import cv2
+    import whisper
+    import easyocr
+
+    metrics = JobMetrics()
+    started = time.perf_counter()
+    try:
+        with job_profiler(job_id, profile) as profiler:
+            update_job(job_id, status="processing", progress=10, message="Extracting audio...")
+
+            audio_path = video_path.replace(".mp4", ".wav").replace(".avi", ".wav").replace(".mov", ".wav").replace(".mkv", ".wav")
+            with metrics.span("audio_extraction"):
+                subprocess.run(["ffmpeg", "-i", video_path, "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", "-y", audio_path],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+            update_job(job_id, progress=25, message="Transcribing with Whisper...")
+
+            with metrics.span("whisper_load"):
+                whisper_model = whisper.load_model("base")
+            with metrics.span("transcription"):
+                result = whisper_model.transcribe(audio_path, verbose=False)
+            segments = result.get("segments", [])
+            transcript = [{"start": s["start"], "end": s["end"], "text": s.get("text", "").strip(), "confidence": 0.0} for s in segments]
+            duration = segments[-1]["end"] if segments else 0
+            metrics.incr("transcript_segments", len(transcript))
+
+            update_job(job_id, progress=50, message="Extracting frames...")
+
+            cap = cv2.VideoCapture(video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frames_data = []
+            frame_count = 0
+            saved = 0
+            with metrics.span("ocr_load"):
+                ocr_reader = easyocr.Reader(["en"], gpu=True)
+
+            while True:
+                with metrics.span("frame_decode"):
+                    ret, frame = cap.read()
+                if not ret:
+                    break
+                if frame_count % FRAME_RATE == 0:
+                    timestamp = frame_count / fps
+                    with metrics.span("ocr"):
+                        results = ocr_reader.readtext(frame)
+                    metrics.incr("frames_ocrd")
+                    printed_text = []
+                    for (bbox, text, conf) in results:
+                        if conf >= 0.5:
+                            printed_text.append(text)
+                    joined = " ".join(printed_text)
+                    frames_data.append({
+                        "timestamp": timestamp,
+                        "printed_text": joined,
+                        "handwritten_text": "",
+                        "ocr_confidence": 0.0
+                    })
+                    saved += 1
+                    if saved % 10 == 0:
+                        total = max(1, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) / FRAME_RATE))
+                        update_job(job_id, progress=50 + int(40 * saved / total), message=f"OCR on frames... {saved} done")
+                frame_count += 1
+            cap.release()
+            metrics.incr("frames_decoded", frame_count)
+
+            update_job(job_id, progress=90, message="Building RAG index...")
+
+            chunks_indexed, cache_stats = build_rag_index(job_id, transcript, frames_data, metrics)
+
+        update_job(job_id, progress=95, message="Finalizing...")
+
+        metrics.add_time("total", time.perf_counter() - started)
         jobs[job_id]["result"] = {
+            "job_id": job_id,
             "transcript": transcript,
             "frames": frames_data,
             "duration": duration,
-            "chunks_indexed": len(chunks)
+            "chunks_indexed": chunks_indexed,
+            "embedding_cache": cache_stats,
+            "metrics": metrics.as_dict(),
+            "profile": profiler.summary if profiler else None
         }
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["message"] = "Done"
+        update_job(job_id, status="completed", progress=100, message="Done")
 
         os.remove(video_path)
         if os.path.exists(audio_path):
             os.remove(audio_path)
 
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
-        jobs[job_id]["message"] = str(e)
+        metrics.incr("errors")
+        update_job(job_id, status="failed", error=str(e), message=str(e))
+    finally:
+        backend_metrics.merge(metrics)
+        backend_metrics.incr(f"jobs_{jobs.get(job_id, {}).get('status', 'failed')}")
+
+def index_text_task(job_id, transcript, frames_data, duration):
+    """Index already-extracted transcript/OCR text without touching any video."""
+    metrics = JobMetrics()
+    started = time.perf_counter()
+    try:
+        update_job(job_id, status="processing", progress=50, message="Building RAG index...")
+
+        chunks_indexed, cache_stats = build_rag_index(job_id, transcript, frames_data, metrics)
+
+        metrics.add_time("total", time.perf_counter() - started)
+        jobs[job_id]["result"] = {
+            "job_id": job_id,
+            "transcript": transcript,
+            "frames": frames_data,
+            "duration": duration,
+            "chunks_indexed": chunks_indexed,
+            "embedding_cache": cache_stats,
+            "metrics": metrics.as_dict()
+        }
+        update_job(job_id, status="completed", progress=100, message="Done")
+
+    except Exception as e:
+        metrics.incr("errors")
+        update_job(job_id, status="failed", error=str(e), message=str(e))
+    finally:
+        backend_metrics.merge(metrics)
+        backend_metrics.incr(f"jobs_{jobs.get(job_id, {}).get('status', 'failed')}")
 
 # =============================
 # ROUTES
@@ -145,7 +447,15 @@ def process_video_task(job_id, video_path):
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "model_loaded": model is not None}), 200
+    return jsonify({
+        "status": "healthy",
+        "model_loaded": llm is not None,
+        # Lets clients with several backends send new uploads to the least busy one
+        "active_jobs": sum(1 for j in list(jobs.values()) if j["status"] == "processing"),
+        "generation": llm.describe() if llm else None,
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "answer_cache": answer_cache.stats()
+    }), 200
 
 @app.route('/upload', methods=['POST'])
 def upload_video():
@@ -158,8 +468,28 @@ def upload_video():
         job_id = str(uuid.uuid4())
         video_path = os.path.join(tempfile.gettempdir(), f"{job_id}_{file.filename}")
         file.save(video_path)
+        profile_flag = request.form.get('profile')
+        profile = profiling_enabled(None if profile_flag is None else profile_flag.lower() in ("1", "true", "yes", "on"))
+        jobs[job_id] = {"status": "processing", "progress": 0, "message": "Starting...", "result": None, "error": None}
+        threading.Thread(target=process_video_task, args=(job_id, video_path, profile)).start()
+        return jsonify({"job_id": job_id}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/index', methods=['POST'])
+def index_text():
+    try:
+        data = request.get_json(silent=True) or {}
+        transcript = data.get('transcript', [])
+        frames_data = data.get('frames', [])
+        if not isinstance(transcript, list) or not isinstance(frames_data, list):
+            return jsonify({"error": "transcript and frames must be lists"}), 400
+        if not transcript and not frames_data:
+            return jsonify({"error": "Nothing to index"}), 400
+        duration = data.get('duration') or (transcript[-1].get("end", 0) if transcript else 0)
+        job_id = str(uuid.uuid4())
         jobs[job_id] = {"status": "processing", "progress": 0, "message": "Starting...", "result": None, "error": None}
-        threading.Thread(target=process_video_task, args=(job_id, video_path)).start()
+        threading.Thread(target=index_text_task, args=(job_id, transcript, frames_data, duration)).start()
         return jsonify({"job_id": job_id}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -168,8 +498,36 @@ def upload_video():
 def get_status(job_id):
     if job_id not in jobs:
         return jsonify({"error": "Job not found"}), 404
-    j = jobs[job_id]
-    return jsonify({"status": j["status"], "progress": j["progress"], "message": j["message"], "error": j.get("error")}), 200
+    return jsonify(job_status_payload(jobs[job_id])), 200
+
+@app.route('/status/<job_id>/stream', methods=['GET'])
+def stream_status(job_id):
+    """Server-sent events: one `data:` line per progress change, closed when the job finishes."""
+    if job_id not in jobs:
+        return jsonify({"error": "Job not found"}), 404
+    max_wait = request.args.get('timeout', default=3600, type=float)
+
+    def events():
+        deadline = time.time() + max_wait
+        last = None
+        seen = -1
+        while True:
+            with job_events:
+                woke = job_events.wait_for(lambda: job_version != seen,
+                                           timeout=max(0, min(STREAM_KEEPALIVE, deadline - time.time())))
+                seen = job_version
+                j = jobs.get(job_id)
+                payload = job_status_payload(j) if j else {"status": "failed", "progress": 0, "message": "Job removed", "error": "Job not found"}
+            if payload != last:
+                yield f"data: {json.dumps(payload)}\n\n"
+                last = payload
+            elif not woke:
+                yield ": keepalive\n\n"
+            if payload["status"] in ("completed", "failed") or time.time() >= deadline:
+                return
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route('/result/<job_id>', methods=['GET'])
 def get_result(job_id):
@@ -181,11 +539,16 @@ def get_result(job_id):
 
 @app.route('/job/<job_id>', methods=['DELETE'])
 def delete_job(job_id):
+    global job_version
     try:
         collection_name = f"job_{job_id}"
         chroma_client.delete_collection(name=collection_name)
+        answer_cache.invalidate(job_id)
         if job_id in jobs:
-            del jobs[job_id]
+            with job_events:
+                del jobs[job_id]
+                job_version += 1
+                job_events.notify_all()
         return jsonify({"ok": True}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -198,101 +561,182 @@ def generate():
         job_id = data.get('job_id', '')
         max_tokens = data.get('max_tokens', 500)
         temperature = data.get('temperature', 0.7)
+        # Conversation memory from the client; the client caps its size, packing below accounts for it
+        history = (data.get('history') or '').strip()
+        started = time.time()
+        backend_metrics.incr("generate_requests")
+        # A follow-up ("explain that more simply") means something different in every conversation
+        use_cache = bool(job_id) and not history and temperature <= ANSWER_CACHE_MAX_TEMPERATURE and not data.get('no_cache')
 
         # RAG - retrieve relevant chunks from ChromaDB
-        context = ""
+        question_embedding = None
         if job_id:
             try:
                 collection_name = f"job_{job_id}"
                 collection = chroma_client.get_collection(name=collection_name)
-                question_embedding = embedder.encode([prompt]).tolist()
-                results = collection.query(
-                    query_embeddings=question_embedding,
-                    n_results=5
-                )
-                retrieved_chunks = results["documents"][0]
-                context = "\n\n".join(retrieved_chunks)
+                with backend_metrics.span("query_embedding"):
+                    question_embedding = embed_texts([prompt])[0][0]
+
+                if use_cache:
+                    hit = answer_cache.lookup(job_id, question_embedding, max_tokens)
+                    backend_metrics.incr("answer_cache_hits" if hit else "answer_cache_misses")
+                    if hit:
+                        return jsonify({
+                            "text": hit["text"],
+                            "metadata": {
+                                **hit["metadata"],
+                                "cache_hit": True,
+                                "cache_similarity": round(hit["similarity"], 4),
+                                "cached_question": hit["question"],
+                                "latency_ms": round((time.time() - started) * 1000, 1)
+                            }
+                        }), 200
+
+                with backend_metrics.span("retrieval"):
+                    results = collection.query(
+                        query_embeddings=[question_embedding],
+                        n_results=min(RAG_CANDIDATES, collection.count()) or 1
+                    )
+                # Chroma returns documents ordered by similarity
+                candidate_chunks = results["documents"][0]
             except Exception as e:
+                backend_metrics.incr("generate_errors")
                 return jsonify({"error": f"RAG retrieval failed: {str(e)}. Ensure the lecture was uploaded and indexing completed."}), 400
         else:
-            context = data.get('context', '')
-
-        # Truncate context just in case
-        if len(context) > 6000:
-            context = context[:6000] + "\n\n[Context truncated...]"
-
-        full_prompt = f"""<s>[INST] Based on the following lecture content, answer the question.
-
-Lecture Content:
-{context}
+            # Caller-supplied context: keep its line order, pack whole lines
+            candidate_chunks = [line for line in data.get('context', '').split("\n") if line.strip()]
+
+        with backend_metrics.span("prompt_packing"):
+            template = lambda c, q: build_prompt(c, q, history)
+            context, packing = pack_context(prompt, candidate_chunks, max_tokens, template=template)
+        full_prompt = build_prompt(context, prompt, history)
+
+        with interactive_generation(), backend_metrics.span("generation"):
+            generated = llm.generate(full_prompt, packing["max_new_tokens"], temperature)
+        answer = generated["text"]
+        backend_metrics.incr("prompt_tokens", generated["prompt_tokens"])
+        backend_metrics.incr("tokens_generated", generated["tokens_generated"])
+
+        metadata = {
+            "prompt_length": len(full_prompt),
+            "prompt_tokens": generated["prompt_tokens"],
+            "tokens_generated": generated["tokens_generated"],
+            "backend": llm.name,
+            "rag_used": bool(job_id),
+            "history_tokens": llm.count_tokens(history) if history else 0,
+            **packing
+        }
+        if use_cache:
+            answer_cache.put(job_id, question_embedding, prompt, max_tokens, answer, metadata)
 
-Question: {prompt} [/INST]"""
+        return jsonify({
+            "text": answer,
+            "metadata": {
+                **metadata,
+                "cache_hit": False,
+                "latency_ms": round((time.time() - started) * 1000, 1)
+            }
+        }), 200
 
-        inputs = tokenizer(full_prompt, return_tensors="pt", truncation=True, max_length=4096).to(model.device)
+    except PromptTooLong as e:
+        backend_metrics.incr("generate_errors")
+        return jsonify({"error": str(e)}), 413
+    except Exception as e:
+        backend_metrics.incr("generate_errors")
+        return jsonify({"error": str(e)}), 500
 
-        with torch.no_grad():
-            outputs = model.generate(
-                **inputs,
-                max_new_tokens=max_tokens,
-                temperature=temperature,
-                do_sample=True,
-                pad_token_id=tokenizer.eos_token_id,
-            )
+@app.route('/summarize', methods=['POST'])
+def summarize():
+    """Summarize several texts in one batched generation (the map step of hierarchical summaries).
 
-        prompt_len = inputs["input_ids"].shape[1]
-        generated_ids = outputs[0][prompt_len:]
-        answer = tokenizer.decode(generated_ids, skip_special_tokens=True).strip()
+    Body: {"items": [{"id", "text", "instruction"}], "max_tokens", "temperature", "priority"}.
+    Texts are packed line by line, so an oversized text loses its tail lines
+    rather than overflowing the context window. priority="low" yields to /generate."""
+    try:
+        data = request.json or {}
+        items = data.get('items', [])
+        max_tokens = int(data.get('max_tokens', 200))
+        temperature = float(data.get('temperature', 0.3))
+        if not items:
+            return jsonify({"error": "No items"}), 400
+        if len(items) > SUMMARIZE_MAX_BATCH:
+            return jsonify({"error": f"At most {SUMMARIZE_MAX_BATCH} items per request"}), 400
+        started = time.time()
+        backend_metrics.incr("summarize_requests")
+        backend_metrics.incr("summarize_items", len(items))
+
+        prompts, packings = [], []
+        with backend_metrics.span("prompt_packing"):
+            for item in items:
+                instruction = item.get('instruction') or DEFAULT_SUMMARY_INSTRUCTION
+                lines = [line for line in item.get('text', '').split("\n") if line.strip()]
+                context, packing = pack_context(instruction, lines, max_tokens, template=build_summary_prompt)
+                prompts.append(build_summary_prompt(context, instruction))
+                packings.append(packing)
+
+        gate = low_priority_slot() if data.get('priority') == "low" else nullcontext()
+        with gate, backend_metrics.span("summarize_generation"):
+            outputs = llm.generate_batch(prompts, min(p["max_new_tokens"] for p in packings), temperature)
+        backend_metrics.incr("prompt_tokens", sum(o["prompt_tokens"] for o in outputs))
+        backend_metrics.incr("tokens_generated", sum(o["tokens_generated"] for o in outputs))
 
         return jsonify({
-            "text": answer,
-            "metadata": {
-                "prompt_length": len(full_prompt),
-                "tokens_generated": len(outputs[0]) - len(inputs['input_ids'][0]),
-                "rag_used": bool(job_id)
-            }
+            "results": [
+                {"id": item.get('id'), "text": out["text"], "tokens_generated": out["tokens_generated"],
+                 "context_chunks_used": packing["context_chunks_used"],
+                 "context_chunks_available": packing["context_chunks_available"]}
+                for item, out, packing in zip(items, outputs, packings)
+            ],
+            "metadata": {"backend": llm.name, "batch_size": len(items),
+                         "latency_ms": round((time.time() - started) * 1000, 1)}
         }), 200
 
+    except PromptTooLong as e:
+        backend_metrics.incr("summarize_errors")
+        return jsonify({"error": str(e)}), 413
     except Exception as e:
+        backend_metrics.incr("summarize_errors")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text format: stage time summaries, counters and a few live gauges."""
+    with job_events:
+        statuses = [j["status"] for j in jobs.values()]
+    gauges = {
+        "jobs_in_memory": len(statuses),
+        "jobs_processing": statuses.count("processing"),
+        "interactive_generations": interactive_active,
+        "answer_cache_entries": answer_cache.stats()["entries"],
+        "model_loaded": int(llm is not None),
+    }
+    if embedding_cache:
+        gauges["embedding_cache_hit_rate"] = embedding_cache.stats()["hit_rate"]
+    return Response(render_prometheus(backend_metrics, gauges), mimetype="text/plain; version=0.0.4")
+
 # =============================
 # LOAD MODELS
 # =============================
 def load_llm():
-    global model, tokenizer, embedder, chroma_client
+    global llm, embedder, chroma_client, embedding_cache
+    import chromadb
+    from sentence_transformers import SentenceTransformer
 
     # Load sentence embedder for RAG
     print("Loading sentence embedder...")
-    embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    print("Embedder loaded.")
+    embedder = SentenceTransformer(EMBEDDER_NAME)
+    embedding_cache = EmbeddingCache(EMBED_CACHE_PATH, EMBEDDER_NAME)
+    print(f"Embedder loaded (cache: {EMBED_CACHE_PATH}).")
 
     # Init ChromaDB in memory
     print("Initializing ChromaDB...")
     chroma_client = chromadb.Client()
     print("ChromaDB ready.")
 
-    # Load Mistral 7B in 4-bit
-    model_name = "mistralai/Mistral-7B-Instruct-v0.2"
-    print(f"Loading model: {model_name}")
-
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    if tokenizer.pad_token is None:
-        tokenizer.pad_token = tokenizer.eos_token
-
-    quant_config = BitsAndBytesConfig(
-        load_in_4bit=True,
-        bnb_4bit_compute_dtype=torch.float16,
-        bnb_4bit_quant_type="nf4",
-        bnb_4bit_use_double_quant=True
-    )
-
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name,
-        quantization_config=quant_config,
-        device_map="auto"
-    )
-
-    print("Mistral 7B loaded successfully!")
+    # Load the generation backend selected by GENERATION_BACKEND (hf / llamacpp / stub)
+    llm = create_backend(GENERATION_BACKEND)
+    llm.load()
+    print(f"Generation backend ready: {llm.describe()}")
 
 def start_server():
     load_llm()
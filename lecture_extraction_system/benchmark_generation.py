@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Shared throughput benchmark for the generation backends in generation_backends.py.
+Every backend gets the same prompts, so the numbers are directly comparable.
+
+Usage: python benchmark_generation.py --backends stub,llamacpp --requests 10 --max-tokens 128 -o gen_bench.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import datetime
+
+from generation_backends import create_backend, build_prompt, BACKENDS
+
+QUESTIONS = [
+    "What is backpropagation?",
+    "Summarize the main idea of this section.",
+    "How does gradient descent choose its step size?",
+    "What is the difference between a convolutional and a fully connected layer?",
+    "Explain the example on the slide more simply.",
+]
+
+VOCAB = ("the gradient loss function layer network weight update convolution kernel activation "
+         "neuron input output training data model error derivative chain rule slide example").split()
+
+
+def make_prompts(n: int, context_words: int, seed: int = 0):
+    rng = random.Random(seed)
+    prompts = []
+    for i in range(n):
+        context = " ".join(rng.choice(VOCAB) for _ in range(context_words))
+        prompts.append(build_prompt(context, QUESTIONS[i % len(QUESTIONS)]))
+    return prompts
+
+
+def bench_backend(name: str, prompts, max_tokens: int, temperature: float):
+    backend = create_backend(name)
+    t0 = time.perf_counter()
+    backend.load()
+    load_seconds = time.perf_counter() - t0
+
+    # One warm-up call so lazy initialisation is not counted
+    backend.generate(prompts[0], min(8, max_tokens), temperature)
+
+    latencies, generated, prompt_tokens = [], 0, 0
+    for prompt in prompts:
+        t0 = time.perf_counter()
+        out = backend.generate(prompt, max_tokens, temperature)
+        latencies.append(time.perf_counter() - t0)
+        generated += out["tokens_generated"]
+        prompt_tokens += out["prompt_tokens"]
+
+    total = sum(latencies)
+    return {
+        **backend.describe(),
+        "load_seconds": round(load_seconds, 3),
+        "requests": len(prompts),
+        "prompt_tokens": prompt_tokens,
+        "tokens_generated": generated,
+        "latency_mean_s": round(statistics.mean(latencies), 4),
+        "latency_p95_s": round(sorted(latencies)[max(0, int(len(latencies) * 0.95) - 1)], 4),
+        "tokens_per_second": round(generated / total, 2) if total > 0 else 0.0,
+        "requests_per_second": round(len(prompts) / total, 3) if total > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark generation backends')
+    parser.add_argument('--backends', default='stub', help=f"Comma-separated: {','.join(BACKENDS)}")
+    parser.add_argument('-n', '--requests', type=int, default=10, help='Prompts per backend')
+    parser.add_argument('--context-words', type=int, default=600, help='Words of synthetic lecture context per prompt')
+    parser.add_argument('--max-tokens', type=int, default=128)
+    parser.add_argument('--temperature', type=float, default=0.0)
+    parser.add_argument('-o', '--output', help='Write results as JSON')
+    args = parser.parse_args()
+
+    prompts = make_prompts(args.requests, args.context_words)
+    results = []
+    for name in [b.strip() for b in args.backends.split(',') if b.strip()]:
+        print(f"Benchmarking {name}...")
+        try:
+            results.append(bench_backend(name, prompts, args.max_tokens, args.temperature))
+        except Exception as e:
+            print(f"  {name} failed: {e}")
+            results.append({"backend": name, "error": str(e)})
+
+    print(f"\n{'Backend':<10} {'Load s':>8} {'Mean s':>8} {'p95 s':>8} {'Tok/s':>9} {'Req/s':>8}")
+    print("=" * 56)
+    for r in results:
+        if "error" in r:
+            print(f"{r['backend']:<10} error: {r['error']}")
+        else:
+            print(f"{r['backend']:<10} {r['load_seconds']:>8.2f} {r['latency_mean_s']:>8.3f} {r['latency_p95_s']:>8.3f} "
+                  f"{r['tokens_per_second']:>9.1f} {r['requests_per_second']:>8.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                "run_at": datetime.now().isoformat(),
+                "host": platform.node(),
+                "settings": vars(args),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
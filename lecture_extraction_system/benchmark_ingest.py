@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""
+End-to-end ingest benchmark on synthetic lectures.
+
+Generates lecture videos offline (slide images with known text that change
+at known times, plus a tone or a supplied audio track), then times each
+LectureProcessor stage: audio extraction, transcription, frame extraction,
+OCR and DB persistence. Results are written as JSON so runs can be compared.
+
+Usage: python benchmark_ingest.py --durations 60,300 --resolutions 640x360,1280x720 -o ingest_bench.json
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import FRAME_EXTRACTION_RATE, WHISPER_MODEL
+from database import Base, Lecture, Transcript, Frame
+from video_processor import VideoProcessor
+from frame_store import FrameStore, disk_usage
+from audio_processor import AudioProcessor
+from ocr_processor import OCRProcessor
+
+SLIDE_TITLES = [
+    "Introduction to Neural Networks", "Gradient Descent", "Backpropagation",
+    "Convolutional Layers", "Pooling and Stride", "Regularization", "Summary",
+]
+
+
+def render_slide(path: Path, width: int, height: int, title: str, index: int):
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    scale = width / 640
+    cv2.putText(img, title, (int(30 * scale), int(80 * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                1.0 * scale, (20, 20, 20), max(1, int(2 * scale)), cv2.LINE_AA)
+    for line in range(3):
+        cv2.putText(img, f"Point {line + 1} of slide {index + 1}", (int(50 * scale), int((160 + 50 * line) * scale)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7 * scale, (60, 60, 60), max(1, int(2 * scale)), cv2.LINE_AA)
+    cv2.imwrite(str(path), img)
+
+
+def make_synthetic_lecture(out_dir: Path, duration: float, width: int, height: int,
+                           slide_seconds: float, audio_path: str = None, fps: int = 30):
+    """Render slides and mux them into an mp4. Returns (video_path, [(start, end, title), ...])."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    schedule = []
+    concat_lines = []
+    t, index = 0.0, 0
+    while t < duration:
+        seg = min(slide_seconds, duration - t)
+        title = SLIDE_TITLES[index % len(SLIDE_TITLES)]
+        slide_path = out_dir / f"slide_{index:03d}.png"
+        render_slide(slide_path, width, height, title, index)
+        schedule.append((t, t + seg, title))
+        concat_lines += [f"file '{slide_path.name}'", f"duration {seg:.3f}"]
+        t += seg
+        index += 1
+    # concat demuxer needs the last file repeated to honour its duration
+    concat_lines.append(f"file 'slide_{index - 1:03d}.png'")
+    (out_dir / "slides.txt").write_text("\n".join(concat_lines) + "\n")
+
+    audio_input = ["-stream_loop", "-1", "-i", audio_path] if audio_path else \
+        ["-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=16000:duration={duration}"]
+    video_path = out_dir / f"lecture_{int(duration)}s_{width}x{height}.mp4"
+    subprocess.run(
+        ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(out_dir / "slides.txt"), *audio_input,
+         "-t", str(duration), "-r", str(fps), "-vf", "format=yuv420p", "-c:v", "libx264", "-preset", "veryfast",
+         "-c:a", "aac", "-shortest", str(video_path)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+    )
+    return video_path, schedule
+
+
+def slide_at(schedule, timestamp: float) -> str:
+    for start, end, title in schedule:
+        if start <= timestamp < end:
+            return title
+    return schedule[-1][2]
+
+
+def timed(timings: dict, stage: str, fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings[stage] = round(time.perf_counter() - t0, 3)
+    return result
+
+
+def bench_case(video_path: Path, schedule, duration: float, work_dir: Path, bench_id: str,
+               audio: AudioProcessor, ocr: OCRProcessor, db_url: str):
+    timings = {}
+    # A private store keeps benchmark frames out of processed/frame_store
+    store = FrameStore(work_dir / "frame_store")
+    vp = VideoProcessor(str(video_path))
+    vp.open_video()
+    info = vp.get_video_info()
+
+    audio_path = work_dir / f"{bench_id}.wav"
+    timed(timings, "audio_extraction", vp.extract_audio, str(audio_path))
+    segments = timed(timings, "transcription", audio.get_segments_with_timestamps, str(audio_path))
+    frames = timed(timings, "frame_extraction", vp.extract_frames, bench_id, store)
+
+    t0 = time.perf_counter()
+    ocr_cache = {}
+    for _, path in frames:
+        if path not in ocr_cache:
+            ocr_cache[path] = ocr.extract_text(path)
+    ocr_results = [(ts, path, ocr_cache[path]) for ts, path in frames]
+    timings["ocr"] = round(time.perf_counter() - t0, 3)
+
+    # Slide text is known, so OCR quality is checked alongside speed
+    hits = sum(1 for ts, _, r in ocr_results if slide_at(schedule, ts).lower() in r.get("full_text", "").lower())
+
+    engine = create_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    t0 = time.perf_counter()
+    lecture = Lecture(title=bench_id, video_path=str(video_path), duration=info.get("duration"), status="completed")
+    db.add(lecture)
+    db.flush()
+    db.bulk_insert_mappings(Transcript, [
+        {"lecture_id": lecture.id, "timestamp_start": s["start"], "timestamp_end": s["end"],
+         "text": s["text"], "confidence": s["confidence"]} for s in segments
+    ])
+    db.bulk_insert_mappings(Frame, [
+        {"lecture_id": lecture.id, "timestamp": ts, "frame_path": path, "extracted_text": r.get("full_text", ""),
+         "printed_text": r.get("printed_text", ""), "handwritten_text": r.get("handwritten_text", ""),
+         "ocr_confidence": float(r.get("average_confidence", 0.0))} for ts, path, r in ocr_results
+    ])
+    db.commit()
+    timings["db_persistence"] = round(time.perf_counter() - t0, 3)
+    db.close()
+    engine.dispose()
+
+    total = sum(timings.values())
+    return {
+        "duration_s": duration,
+        "width": info.get("width"),
+        "height": info.get("height"),
+        "fps": info.get("fps"),
+        "stages_s": timings,
+        "total_s": round(total, 3),
+        "realtime_factor": round(duration / total, 3) if total > 0 else 0.0,
+        "frames_sampled": len(frames),
+        "frames_ocrd": len(ocr_cache),
+        "frame_store_mb": round(disk_usage(set(ocr_cache)) / 2**20, 2),
+        "transcript_segments": len(segments),
+        "ocr_slide_accuracy": round(hits / len(frames), 3) if frames else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the local ingest pipeline on synthetic lectures')
+    parser.add_argument('--durations', default='60,300', help='Comma-separated video lengths in seconds')
+    parser.add_argument('--resolutions', default='640x360,1280x720', help='Comma-separated WxH')
+    parser.add_argument('--slide-seconds', type=float, default=20.0, help='Seconds each slide stays on screen')
+    parser.add_argument('--audio', help='Audio file to use instead of a sine tone (looped to length)')
+    parser.add_argument('--whisper-model', default=WHISPER_MODEL)
+    parser.add_argument('--keep', action='store_true', help='Keep generated videos')
+    parser.add_argument('-o', '--output', default='ingest_bench.json', help='JSON results path')
+    args = parser.parse_args()
+
+    durations = [float(d) for d in args.durations.split(',')]
+    resolutions = [tuple(int(x) for x in r.lower().split('x')) for r in args.resolutions.split(',')]
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ingest_bench_"))
+    audio = AudioProcessor(args.whisper_model)
+    ocr = OCRProcessor()
+
+    t0 = time.perf_counter()
+    audio.load_model()
+    ocr.load_reader()
+    model_load_s = round(time.perf_counter() - t0, 3)
+
+    results = []
+    try:
+        for duration in durations:
+            for width, height in resolutions:
+                case_dir = work_dir / f"{int(duration)}s_{width}x{height}"
+                print(f"Generating {int(duration)}s {width}x{height} lecture...")
+                video_path, schedule = make_synthetic_lecture(case_dir, duration, width, height, args.slide_seconds, args.audio)
+                print("  Running pipeline...")
+                result = bench_case(video_path, schedule, duration, case_dir, f"bench_{int(duration)}_{width}x{height}",
+                                    audio, ocr, f"sqlite:///{case_dir / 'bench.db'}")
+                results.append(result)
+                stages = ", ".join(f"{k}={v:.1f}s" for k, v in result["stages_s"].items())
+                print(f"  {stages} | {result['realtime_factor']:.2f}x realtime | OCR slide accuracy {result['ocr_slide_accuracy']:.0%}")
+    finally:
+        if args.keep:
+            print(f"Videos kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "run_at": datetime.now().isoformat(),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "settings": {**vars(args), "frame_extraction_rate": FRAME_EXTRACTION_RATE},
+        "model_load_s": model_load_s,
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
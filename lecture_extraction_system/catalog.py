@@ -0,0 +1,106 @@
+"""
+Lecture catalog for the UI: one page of lectures matching a search, and the
+per-lecture transcript/frame/question counts for that page in one query.
+
+fingerprint() is a cheap summary of every table the catalog reads (row
+counts per status, newest ids and timestamps). The UI passes it into its
+st.cache_data calls, so any change, including one made by a worker process,
+gives a new cache key and the next rerun reads fresh rows.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import func, select, or_, case
+from sqlalchemy.orm import Session
+
+from config import CATALOG_PAGE_SIZE
+from database import Lecture, Transcript, Frame, Query
+
+STATUSES = ("uploaded", "processing", "completed", "failed", "cancelled")
+
+
+class LectureEntry(NamedTuple):
+    """Plain copy of a lectures row, safe to cache and use after the session closes."""
+    id: int
+    title: str
+    video_path: str
+    duration: Optional[float]
+    uploaded_at: datetime
+    processed_at: Optional[datetime]
+    status: str
+    rag_job_id: Optional[str]
+    archived_at: Optional[datetime]
+
+
+_COLUMNS = [getattr(Lecture, name) for name in LectureEntry._fields]
+
+
+def _like(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _filtered(query, search: str = "", statuses: Sequence[str] = (),
+              date_from: Optional[date] = None, date_to: Optional[date] = None):
+    for term in (search or "").split():
+        # "#12" or "12" also matches lecture 12
+        number = term.lstrip("#")
+        condition = Lecture.title.ilike(_like(term), escape="\\")
+        query = query.filter(or_(condition, Lecture.id == int(number)) if number.isdigit() else condition)
+    if statuses:
+        query = query.filter(Lecture.status.in_(list(statuses)))
+    if date_from:
+        query = query.filter(Lecture.uploaded_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.filter(Lecture.uploaded_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    return query
+
+
+def search_lectures(db: Session, search: str = "", statuses: Sequence[str] = (), date_from: Optional[date] = None,
+                    date_to: Optional[date] = None, page: int = 0, page_size: int = CATALOG_PAGE_SIZE) -> Dict[str, Any]:
+    """Newest first. page is 0-based and clamped to the last page."""
+    total = _filtered(db.query(func.count(Lecture.id)), search, statuses, date_from, date_to).scalar() or 0
+    pages = max(1, -(-total // page_size))
+    page = min(max(page, 0), pages - 1)
+    rows = (
+        _filtered(db.query(*_COLUMNS), search, statuses, date_from, date_to)
+        .order_by(Lecture.uploaded_at.desc(), Lecture.id.desc())
+        .offset(page * page_size)
+        .limit(page_size)
+    )
+    return {"total": total, "page": page, "pages": pages, "lectures": [LectureEntry(*row) for row in rows]}
+
+
+def get_lecture(db: Session, lecture_id: int) -> Optional[LectureEntry]:
+    """One lecture read fresh, bypassing any cached page."""
+    row = db.query(*_COLUMNS).filter(Lecture.id == lecture_id).first()
+    return LectureEntry(*row) if row else None
+
+
+def _count(model):
+    return select(func.count(model.id)).where(model.lecture_id == Lecture.id).scalar_subquery()
+
+
+def lecture_counts(db: Session, lecture_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    """{lecture_id: {"transcripts", "frames", "queries"}} for a page of lectures, in one query."""
+    if not lecture_ids:
+        return {}
+    rows = db.query(Lecture.id, _count(Transcript), _count(Frame), _count(Query)).filter(Lecture.id.in_(lecture_ids))
+    return {lid: {"transcripts": t, "frames": f, "queries": q} for lid, t, f, q in rows}
+
+
+def fingerprint(db: Session) -> tuple:
+    """Changes whenever a lecture is added, removed, re-statused, processed, indexed or archived, or gains rows.
+
+    Replacing one rag_job_id with another is not seen here; read the selected lecture with get_lecture()."""
+    return tuple(db.query(
+        func.count(Lecture.id),
+        func.max(Lecture.id),
+        func.max(Lecture.processed_at),
+        func.max(Lecture.archived_at),
+        func.count(Lecture.rag_job_id),
+        *[func.sum(case((Lecture.status == status, 1), else_=0)) for status in STATUSES],
+        select(func.max(Transcript.id)).scalar_subquery(),
+        select(func.max(Frame.id)).scalar_subquery(),
+        select(func.max(Query.id)).scalar_subquery(),
+    ).one())
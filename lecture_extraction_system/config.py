@@ -15,14 +15,44 @@ DB_DIR.mkdir(exist_ok=True)
 DATABASE_URL = f"sqlite:///{DB_DIR}/lectures.db"
 
 # API
-COLAB_API_URL = os.getenv("COLAB_API_URL", "http://localhost:8000")
+# Several backends can be given comma-separated; LLMClient spreads work across them
+COLAB_API_URLS = [u.strip() for u in os.getenv("COLAB_API_URL", "http://localhost:8000").split(",") if u.strip()]
+COLAB_API_URL = ",".join(COLAB_API_URLS)
 API_TIMEOUT = 300
 UPLOAD_TIMEOUT = 900
+API_CONNECT_TIMEOUT = 10
+API_MAX_CONNECTIONS = 20        # httpx pool per backend; keep-alive avoids a TLS handshake per call through ngrok
+API_MAX_KEEPALIVE = 10
+API_RETRY_ATTEMPTS = 4          # idempotent calls only (status, result, generate, delete, health)
+API_RETRY_BASE_DELAY = 0.5      # seconds; doubles per attempt with full jitter
+API_RETRY_MAX_DELAY = 8
+API_BREAKER_THRESHOLD = 5       # consecutive failures before calls fail fast
+API_BREAKER_COOLDOWN = 30       # seconds before a trial call is let through
+API_HEALTH_INTERVAL = 15        # seconds between /health checks when several backends are configured
+
+# Local processing worker (python worker.py)
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "1"))
+WORKER_POLL_INTERVAL = 2
 
 # Video
 FRAME_EXTRACTION_RATE = 30
 VIDEO_FORMATS = ['.mp4', '.avi', '.mov', '.mkv', '.webm']
 MAX_VIDEO_SIZE_MB = 500
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Frame store (frame_store.py) - one WebP per distinct slide image
+FRAME_STORE_DIR = PROCESSED_DIR / "frame_store"
+FRAME_STORE_MAX_SIDE = 1280
+FRAME_STORE_QUALITY = 80
+FRAME_DEDUP_DISTANCE = 3  # dHash bits; 0 keeps every changed pixel pattern
+
+# Retention (manage.py gc / archive) - set a day count to None to disable that policy
+ARCHIVE_DIR = PROCESSED_DIR / "archive"
+RETENTION_DROP_AUDIO = True           # audio.wav is only needed until transcription succeeds
+RETENTION_DOWNSAMPLE_DAYS = 90        # shrink frames of lectures processed this long ago
+RETENTION_DOWNSAMPLE_MAX_SIDE = 640
+RETENTION_DOWNSAMPLE_QUALITY = 60
+RETENTION_ARCHIVE_DAYS = None         # e.g. 365 to move old lectures' files into ARCHIVE_DIR
 
 # Whisper - change to tiny/small/medium/large for speed or accuracy
 WHISPER_MODEL = "base"
@@ -33,3 +63,31 @@ OCR_CONFIDENCE_THRESHOLD = 0.5
 
 # LLM - Phi-2 has 2048 token limit, ~4 chars per token
 MAX_PROMPT_LENGTH = 6000
+
+# Hierarchical summaries (summarizer.py)
+SUMMARY_WINDOW_SECONDS = 300    # transcript window summarised on its own; fixed boundaries keep edits local
+SUMMARY_WINDOW_TOKENS = 200
+SUMMARY_WORDS = 300             # length of the final summary
+SUMMARY_BATCH_SIZE = 8          # windows per /summarize request
+SUMMARY_REDUCE_CHARS = MAX_PROMPT_LENGTH  # partial summaries combined per reduce call
+
+# Lecture catalog in the UI (catalog.py)
+CATALOG_PAGE_SIZE = 25
+CATALOG_CACHE_TTL = 300         # seconds; changes are also picked up immediately through catalog.fingerprint()
+
+# Q&A chat history: messages rendered per window, added by "Load earlier", and cached bubble HTML entries
+CHAT_WINDOW = 20
+CHAT_LOAD_STEP = 20
+CHAT_HTML_CACHE_SIZE = 5000
+
+# Conversation memory sent with each question (conversation.py): rolling summary + last MEMORY_TURNS exchanges
+MEMORY_TURNS = int(os.getenv("MEMORY_TURNS", "3"))
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "600"))   # cap on summary + turns, ~4 chars per token
+MEMORY_SUMMARY_TOKENS = 200     # length of the rolling summary
+
+# Bulk export (exporter.py / manage.py export)
+EXPORT_WORKERS = 4
+EXPORT_BATCH_ROWS = 1000        # rows fetched per yield_per batch and per Parquet row group
+
+# Queue a low-priority summary job (summary + chapters, see summarizer.build_digest) after each lecture is processed
+INGEST_SUMMARIES = os.getenv("INGEST_SUMMARIES", "0").lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,177 @@
+"""
+Rolling conversation memory for Q&A chats.
+
+/generate is stateless, so each question is sent with a compact history:
+the chat's rolling summary plus its last MEMORY_TURNS exchanges verbatim,
+trimmed to MEMORY_MAX_TOKENS (newest exchange first, then the summary,
+then older exchanges).
+
+After every exchange update_memory() folds the exchanges that slid out of
+that window into chats.memory_summary: one LLM call on the previous
+summary plus only the new exchanges, so the cost per question stays flat
+however long the chat grows. chats.memory_message_id marks the last
+message folded in, and the update is a compare-and-set on it, so two
+overlapping updates never fold the same messages twice.
+"""
+
+import threading
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from config import MEMORY_TURNS, MEMORY_MAX_TOKENS, MEMORY_SUMMARY_TOKENS, SUMMARY_REDUCE_CHARS
+from database import SessionLocal, Chat, ChatMessage
+
+CHARS_PER_TOKEN = 4
+MESSAGE_FOLD_CHARS = 2000   # longer messages are cut before folding; the summary keeps only the gist anyway
+
+FOLD_INSTRUCTION = (
+    "You keep the memory of a conversation between a student and a lecture assistant. "
+    "Update the summary so far with the new exchanges. Keep the topics asked about, the key "
+    "explanations given and anything the student said they did not understand. Be brief."
+)
+
+_updating = set()
+_updating_lock = threading.Lock()
+
+
+def _line(msg: ChatMessage, limit: Optional[int] = None) -> str:
+    speaker = "Student" if msg.role == "user" else "Assistant"
+    text = " ".join((msg.content or "").split())
+    if limit is not None and len(text) > limit:
+        text = text[:max(0, limit)].rsplit(" ", 1)[0] + " …"
+    return f"{speaker}: {text}"
+
+
+def _turns(messages: List[ChatMessage]) -> List[List[ChatMessage]]:
+    """Group messages into exchanges, each starting at a student message."""
+    turns = []
+    for msg in messages:
+        if msg.role == "user" or not turns:
+            turns.append([])
+        turns[-1].append(msg)
+    return turns
+
+
+def build_history(db: Session, chat_id: int, turns: int = MEMORY_TURNS, max_tokens: int = MEMORY_MAX_TOKENS) -> str:
+    """Summary plus recent exchanges for the next question, at most max_tokens (estimated) long."""
+    chat = db.query(Chat).filter(Chat.id == chat_id).first()
+    if not chat:
+        return ""
+    recent = []
+    if turns > 0:
+        recent = (
+            db.query(ChatMessage)
+            .filter(ChatMessage.chat_id == chat_id, ChatMessage.id > (chat.memory_message_id or 0))
+            .order_by(ChatMessage.id.desc())
+            .limit(turns * 2)
+            .all()
+        )[::-1]
+    exchanges = _turns(recent)[-turns:] if turns > 0 else []
+
+    budget = max_tokens * CHARS_PER_TOKEN - 20  # "Recent exchanges:" header
+    summary = " ".join((chat.memory_summary or "").split())
+    # Up to a third of the budget stays reserved for the summary, however long the last answer was
+    reserve = min(len(summary) + 20, budget // 3) if summary else 0
+    kept = []
+    if exchanges:
+        # The newest exchange is what follow-ups refer to: always kept, its answer cut if needed
+        room = budget - reserve
+        newest = [_line(m) for m in exchanges[-1]]
+        if sum(len(line) + 1 for line in newest) > room:
+            question = _line(exchanges[-1][0], room // 2)
+            newest = [question] + [_line(m, room - len(question) - 16) for m in exchanges[-1][1:]]
+        kept.append(newest)
+        budget -= sum(len(line) + 1 for line in newest)
+
+    if summary and len(summary) + 20 > budget:
+        summary = summary[:budget - 20].rsplit(" ", 1)[0] + " …" if budget > 40 else ""
+    if summary:
+        budget -= len(summary) + 20
+
+    for exchange in reversed(exchanges[:-1]):
+        lines = [_line(m) for m in exchange]
+        size = sum(len(line) + 1 for line in lines)
+        if size > budget:
+            break
+        kept.insert(0, lines)
+        budget -= size
+
+    parts = []
+    if summary:
+        parts.append(f"Summary: {summary}")
+    if kept:
+        parts.append("Recent exchanges:\n" + "\n".join(line for lines in kept for line in lines))
+    return "\n".join(parts)
+
+
+def update_memory(db: Session, chat_id: int, client, turns: int = MEMORY_TURNS) -> bool:
+    """Fold exchanges older than the last `turns` into the rolling summary. Returns True when it changed."""
+    chat = db.query(Chat).filter(Chat.id == chat_id).first()
+    if not chat:
+        return False
+    folded_until = chat.memory_message_id
+    query = db.query(ChatMessage).filter(ChatMessage.chat_id == chat_id, ChatMessage.id > (folded_until or 0))
+    if turns > 0:
+        window_start = (
+            db.query(ChatMessage.id)
+            .filter(ChatMessage.chat_id == chat_id, ChatMessage.role == "user")
+            .order_by(ChatMessage.id.desc())
+            .offset(turns - 1)
+            .limit(1)
+            .scalar()
+        )
+        if window_start is None:
+            return False
+        query = query.filter(ChatMessage.id < window_start)
+    messages = query.order_by(ChatMessage.id).all()
+    if not messages:
+        return False
+
+    # Normally one call; a long chat that predates memory is folded in several
+    summary, chunk, size = chat.memory_summary or "", [], 0
+    for i, msg in enumerate(messages):
+        line = _line(msg, MESSAGE_FOLD_CHARS)
+        chunk.append(line)
+        size += len(line) + 1
+        if size < SUMMARY_REDUCE_CHARS and i < len(messages) - 1:
+            continue
+        text = f"Summary so far:\n{summary or '(empty)'}\n\nNew exchanges:\n" + "\n".join(chunk)
+        reply = client.summarize_many([{"id": f"chat_{chat_id}", "instruction": FOLD_INSTRUCTION, "text": text}],
+                                      MEMORY_SUMMARY_TOKENS, 0.3)
+        if not reply["success"]:
+            print(f"Could not update memory of chat {chat_id}: {reply.get('error')}")
+            return False
+        summary = reply["results"][0]["text"].strip()
+        chunk, size = [], 0
+
+    unchanged = Chat.memory_message_id.is_(None) if folded_until is None else Chat.memory_message_id == folded_until
+    updated = (
+        db.query(Chat)
+        .filter(Chat.id == chat_id, unchanged)
+        .update({"memory_summary": summary, "memory_message_id": messages[-1].id}, synchronize_session=False)
+    )
+    db.commit()
+    return bool(updated)
+
+
+def _update_worker(chat_id: int, client):
+    db = SessionLocal()
+    try:
+        update_memory(db, chat_id, client)
+    except Exception as e:
+        db.rollback()
+        print(f"Could not update memory of chat {chat_id}: {e}")
+    finally:
+        db.close()
+        with _updating_lock:
+            _updating.discard(chat_id)
+
+
+def update_memory_in_background(chat_id: int, client):
+    """Run update_memory off the request path; a chat already being updated is skipped (the next exchange catches up)."""
+    with _updating_lock:
+        if chat_id in _updating:
+            return
+        _updating.add(chat_id)
+    threading.Thread(target=_update_worker, args=(chat_id, client), daemon=True).start()
@@ -1,14 +1,22 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime, ForeignKey, text
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 from config import DATABASE_URL
 
 Base = declarative_base()
-engine = create_engine(DATABASE_URL, echo=False)
+engine = create_engine(DATABASE_URL, echo=False, connect_args={"timeout": 30})
 SessionLocal = sessionmaker(bind=engine)
 
 
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_conn, _):
+    # WAL lets the UI read while worker processes write progress/results
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
 class Lecture(Base):
     __tablename__ = "lectures"
 
@@ -16,21 +24,27 @@ class Lecture(Base):
     title = Column(String(255), nullable=False)
     video_path = Column(String(500), nullable=False)
     duration = Column(Float)
-    uploaded_at = Column(DateTime, default=datetime.utcnow)
+    uploaded_at = Column(DateTime, default=datetime.utcnow, index=True)
     processed_at = Column(DateTime)
     status = Column(String(50), default="uploaded")
     rag_job_id = Column(String(100), nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
+    archived_at = Column(DateTime, nullable=True)
 
     transcripts = relationship("Transcript", back_populates="lecture", cascade="all, delete-orphan")
     frames = relationship("Frame", back_populates="lecture", cascade="all, delete-orphan")
     queries = relationship("Query", back_populates="lecture", cascade="all, delete-orphan")
+    metrics = relationship("JobMetric", cascade="all, delete-orphan")
+    storage = relationship("StorageLedger", cascade="all, delete-orphan")
+    summary = relationship("LectureSummary", uselist=False, cascade="all, delete-orphan")
+    chapters = relationship("Chapter", order_by="Chapter.position", cascade="all, delete-orphan")
 
 
 class Transcript(Base):
     __tablename__ = "transcripts"
 
     id = Column(Integer, primary_key=True, index=True)
-    lecture_id = Column(Integer, ForeignKey("lectures.id"))
+    lecture_id = Column(Integer, ForeignKey("lectures.id"), index=True)
     timestamp_start = Column(Float)
     timestamp_end = Column(Float)
     text = Column(Text)
@@ -43,7 +57,7 @@ class Frame(Base):
     __tablename__ = "frames"
 
     id = Column(Integer, primary_key=True, index=True)
-    lecture_id = Column(Integer, ForeignKey("lectures.id"))
+    lecture_id = Column(Integer, ForeignKey("lectures.id"), index=True)
     timestamp = Column(Float)
     frame_path = Column(String(500))
     extracted_text = Column(Text)
@@ -58,7 +72,7 @@ class Query(Base):
     __tablename__ = "queries"
 
     id = Column(Integer, primary_key=True, index=True)
-    lecture_id = Column(Integer, ForeignKey("lectures.id"))
+    lecture_id = Column(Integer, ForeignKey("lectures.id"), index=True)
     query_text = Column(Text)
     response_text = Column(Text)
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -74,12 +88,16 @@ class Chat(Base):
     title = Column(String(255), default="New chat")
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Rolling summary of every message up to memory_message_id (see conversation.py)
+    memory_summary = Column(Text, nullable=True)
+    memory_message_id = Column(Integer, nullable=True)
+
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
     id = Column(Integer, primary_key=True, index=True)
-    chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False)
+    chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False, index=True)
     role = Column(String(20), nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -91,6 +109,87 @@ class ChatMessage(Base):
     timestamp_end = Column(Float, nullable=True)
 
 
+class ProcessingJob(Base):
+    """Queue row for local processing, claimed and run by worker.py."""
+    __tablename__ = "processing_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lecture_id = Column(Integer, ForeignKey("lectures.id"), nullable=False, index=True)
+    video_path = Column(String(500), nullable=False)
+    status = Column(String(20), default="queued", index=True)
+    progress = Column(Integer, default=0)
+    message = Column(String(255), default="Queued")
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, default=False)
+    worker_pid = Column(Integer, nullable=True)
+    profile = Column(Boolean, default=False)
+    kind = Column(String(20), default="process")  # process / summary (claimed after process jobs)
+    api_url = Column(String(500), nullable=True)  # summary jobs: backend chosen when queued
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class JobMetric(Base):
+    """One span total or counter from a processing run (see metrics.py)."""
+    __tablename__ = "job_metrics"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lecture_id = Column(Integer, ForeignKey("lectures.id"), nullable=False, index=True)
+    run_id = Column(String(100), nullable=False, index=True)
+    source = Column(String(20), default="local")  # local / backend
+    kind = Column(String(10), nullable=False)      # span / counter
+    name = Column(String(100), nullable=False)
+    value = Column(Float, nullable=False)          # seconds for spans
+    count = Column(Integer, default=1)
+    recorded_at = Column(DateTime, default=datetime.utcnow)
+
+
+class StorageLedger(Base):
+    """Files and bytes on disk per lecture and artifact type (see storage.py)."""
+    __tablename__ = "storage_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lecture_id = Column(Integer, ForeignKey("lectures.id"), nullable=True, index=True)  # NULL: unreferenced files
+    artifact = Column(String(20), nullable=False)  # video / audio / frames / profile / archive
+    files = Column(Integer, default=0)
+    bytes = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SummaryCache(Base):
+    """LLM summary of one transcript window or group of partial summaries, keyed by input hash (see summarizer.py)."""
+    __tablename__ = "summary_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, unique=True, index=True)
+    kind = Column(String(20), nullable=False)  # window / reduce / final / short / title
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class LectureSummary(Base):
+    """Summary generated at ingest so pages can show it without an LLM call."""
+    __tablename__ = "lecture_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lecture_id = Column(Integer, ForeignKey("lectures.id"), nullable=False, unique=True, index=True)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Chapter(Base):
+    __tablename__ = "chapters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lecture_id = Column(Integer, ForeignKey("lectures.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    start = Column(Float, nullable=False)
+    end = Column(Float, nullable=False)
+    title = Column(String(255), nullable=False)
+    summary = Column(Text)
+
+
 def _safe_add_column(conn, ddl: str):
     try:
         conn.execute(text(ddl))
@@ -104,12 +203,31 @@ def init_database():
     with engine.connect() as conn:
         # lectures table additions
         _safe_add_column(conn, "ALTER TABLE lectures ADD COLUMN rag_job_id VARCHAR(100)")
+        _safe_add_column(conn, "ALTER TABLE lectures ADD COLUMN content_hash VARCHAR(64)")
+        _safe_add_column(conn, "CREATE INDEX IF NOT EXISTS ix_lectures_content_hash ON lectures (content_hash)")
+        _safe_add_column(conn, "ALTER TABLE lectures ADD COLUMN archived_at DATETIME")
+        _safe_add_column(conn, "CREATE INDEX IF NOT EXISTS ix_lectures_uploaded_at ON lectures (uploaded_at)")
+
+        # lecture_id indexes: per-lecture counts and deletes on databases created before they existed
+        _safe_add_column(conn, "CREATE INDEX IF NOT EXISTS ix_transcripts_lecture_id ON transcripts (lecture_id)")
+        _safe_add_column(conn, "CREATE INDEX IF NOT EXISTS ix_frames_lecture_id ON frames (lecture_id)")
+        _safe_add_column(conn, "CREATE INDEX IF NOT EXISTS ix_queries_lecture_id ON queries (lecture_id)")
+
+        # processing_jobs table additions
+        _safe_add_column(conn, "ALTER TABLE processing_jobs ADD COLUMN profile BOOLEAN DEFAULT 0")
+        _safe_add_column(conn, "ALTER TABLE processing_jobs ADD COLUMN kind VARCHAR(20) DEFAULT 'process'")
+        _safe_add_column(conn, "ALTER TABLE processing_jobs ADD COLUMN api_url VARCHAR(500)")
+
+        # chats table additions
+        _safe_add_column(conn, "ALTER TABLE chats ADD COLUMN memory_summary TEXT")
+        _safe_add_column(conn, "ALTER TABLE chats ADD COLUMN memory_message_id INTEGER")
 
         # chat_messages table additions
         _safe_add_column(conn, "ALTER TABLE chat_messages ADD COLUMN clip_id VARCHAR(100)")
         _safe_add_column(conn, "ALTER TABLE chat_messages ADD COLUMN timestamp_label VARCHAR(50)")
         _safe_add_column(conn, "ALTER TABLE chat_messages ADD COLUMN timestamp_start FLOAT")
         _safe_add_column(conn, "ALTER TABLE chat_messages ADD COLUMN timestamp_end FLOAT")
+        _safe_add_column(conn, "CREATE INDEX IF NOT EXISTS ix_chat_messages_chat_id ON chat_messages (chat_id)")
 
 
 def get_db():
@@ -0,0 +1,260 @@
+"""
+Streaming export of transcripts and OCR text.
+
+Formats (per lecture, in lecture_<id>/):
+  txt      transcript.txt   plain text with [mm:ss] stamps
+  srt      transcript.srt   SubRip captions
+  vtt      transcript.vtt   WebVTT captions
+  jsonl    content.jsonl    one record per transcript segment, then per OCR'd frame
+  parquet  content.parquet  the same records (needs pyarrow)
+
+Rows are read with yield_per and written as they arrive, so memory stays
+flat however long a lecture is. export_lectures() runs lectures in a
+thread pool, each with its own session, into a directory or a single
+.tar.gz / .tar.xz. For tarballs each lecture is staged in a temp directory,
+appended by the main thread and deleted, and only a few lectures are in
+flight at once, so staging space is bounded too.
+"""
+
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from config import EXPORT_BATCH_ROWS, EXPORT_WORKERS
+from database import SessionLocal, Lecture, Transcript, Frame
+
+FORMATS = ("txt", "srt", "vtt", "jsonl", "parquet")
+FILE_NAMES = {
+    "txt": "transcript.txt",
+    "srt": "transcript.srt",
+    "vtt": "transcript.vtt",
+    "jsonl": "content.jsonl",
+    "parquet": "content.parquet",
+}
+TARBALL_MODES = {".tar.gz": "w:gz", ".tgz": "w:gz", ".tar.xz": "w:xz", ".tar": "w"}
+
+RECORD_FIELDS = ("lecture_id", "kind", "start", "end", "text", "confidence", "printed_text", "handwritten_text", "frame_path")
+
+
+def parse_formats(value: str) -> List[str]:
+    formats = [f.strip().lower() for f in value.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown or not formats:
+        raise ValueError(f"Unknown export format(s): {', '.join(unknown) or value!r}. Choose from {', '.join(FORMATS)}")
+    if "parquet" in formats:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+    return formats
+
+
+def tarball_mode(path: str) -> Optional[str]:
+    return next((mode for suffix, mode in TARBALL_MODES.items() if path.lower().endswith(suffix)), None)
+
+
+def _clock(seconds: float, sep: str) -> str:
+    ms = int(round((seconds or 0.0) * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}{sep}{ms % 1000:03d}"
+
+
+def _caption(text: str) -> str:
+    # A blank line ends a cue in both SRT and VTT, and "-->" would start a new one in VTT
+    return " ".join((text or "").split()).replace("-->", "->")
+
+
+def _transcript_rows(db: Session, lecture_id: int) -> Iterable:
+    return (
+        db.query(Transcript.timestamp_start, Transcript.timestamp_end, Transcript.text, Transcript.confidence)
+        .filter(Transcript.lecture_id == lecture_id)
+        .order_by(Transcript.timestamp_start)
+        .yield_per(EXPORT_BATCH_ROWS)
+    )
+
+
+def _frame_rows(db: Session, lecture_id: int) -> Iterable:
+    return (
+        db.query(Frame.timestamp, Frame.extracted_text, Frame.ocr_confidence, Frame.printed_text,
+                 Frame.handwritten_text, Frame.frame_path)
+        .filter(Frame.lecture_id == lecture_id)
+        .order_by(Frame.timestamp)
+        .yield_per(EXPORT_BATCH_ROWS)
+    )
+
+
+class _ParquetSink:
+    """Buffers EXPORT_BATCH_ROWS records, then writes them as one row group."""
+
+    def __init__(self, path: Path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("lecture_id", pa.int64()), ("kind", pa.string()), ("start", pa.float64()), ("end", pa.float64()),
+            ("text", pa.string()), ("confidence", pa.float64()), ("printed_text", pa.string()),
+            ("handwritten_text", pa.string()), ("frame_path", pa.string()),
+        ])
+        self.writer = pq.ParquetWriter(str(path), self.schema, compression="zstd")
+        self.rows = []
+
+    def write(self, record: Dict[str, Any]):
+        self.rows.append(record)
+        if len(self.rows) >= EXPORT_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def lecture_paths(directory: Path, formats: Iterable[str]) -> Dict[str, Path]:
+    return {fmt: directory / FILE_NAMES[fmt] for fmt in formats}
+
+
+def write_lecture(db: Session, lecture: Lecture, paths: Dict[str, Path]) -> Dict[str, Any]:
+    """Write {format: path} for one lecture in a single pass over transcripts and one over frames.
+
+    On failure every file is closed and the partial files are removed."""
+    for path in paths.values():
+        path.parent.mkdir(parents=True, exist_ok=True)
+    text_files = {}
+    parquet = None
+    segments = frames = 0
+
+    def record(**fields):
+        row = {name: fields.get(name) for name in RECORD_FIELDS}
+        if "jsonl" in text_files:
+            text_files["jsonl"].write(json.dumps(row, ensure_ascii=False) + "\n")
+        if parquet:
+            parquet.write(row)
+
+    try:
+        with ExitStack() as stack:
+            for fmt, path in paths.items():
+                if fmt != "parquet":
+                    text_files[fmt] = stack.enter_context(open(path, "w", encoding="utf-8", newline="\n"))
+            if "parquet" in paths:
+                parquet = _ParquetSink(paths["parquet"])
+                stack.callback(parquet.close)
+
+            if "txt" in text_files:
+                text_files["txt"].write(f"Lecture: {lecture.title}\n")
+                text_files["txt"].write(f"Duration: {lecture.duration or 0:.1f}s\n")
+                text_files["txt"].write(f"Exported: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                text_files["txt"].write("=" * 80 + "\n\n")
+            if "vtt" in text_files:
+                text_files["vtt"].write("WEBVTT\n\n")
+
+            for start, end, text, confidence in _transcript_rows(db, lecture.id):
+                start = start or 0.0
+                end = max(end or start, start)
+                segments += 1
+                if "txt" in text_files:
+                    text_files["txt"].write(f"[{int(start // 60):02d}:{int(start % 60):02d}] {text}\n")
+                if "srt" in text_files:
+                    text_files["srt"].write(f"{segments}\n{_clock(start, ',')} --> {_clock(end, ',')}\n{_caption(text)}\n\n")
+                if "vtt" in text_files:
+                    text_files["vtt"].write(f"{_clock(start, '.')} --> {_clock(end, '.')}\n{_caption(text)}\n\n")
+                record(lecture_id=lecture.id, kind="transcript", start=start, end=end, text=text, confidence=confidence)
+
+            if "jsonl" in text_files or parquet:
+                for timestamp, text, confidence, printed, handwritten, frame_path in _frame_rows(db, lecture.id):
+                    if not (text or "").strip():
+                        continue
+                    frames += 1
+                    record(lecture_id=lecture.id, kind="ocr", start=timestamp, end=timestamp, text=text,
+                           confidence=confidence, printed_text=printed, handwritten_text=handwritten, frame_path=frame_path)
+    except BaseException:
+        # A partial file would pass for a finished export
+        for path in paths.values():
+            path.unlink(missing_ok=True)
+        raise
+
+    return {"lecture_id": lecture.id, "segments": segments, "frames": frames,
+            "files": len(paths), "bytes": sum(p.stat().st_size for p in paths.values())}
+
+
+def _export_one(lecture_id: int, directory: Path, formats: List[str]) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+        if not lecture:
+            return {"lecture_id": lecture_id, "error": "not found"}
+        return write_lecture(db, lecture, lecture_paths(directory, formats))
+    except Exception as e:
+        return {"lecture_id": lecture_id, "error": str(e)}
+    finally:
+        db.close()
+
+
+def export_lectures(lecture_ids: List[int], output: str, formats: List[str], workers: int = EXPORT_WORKERS,
+                    progress=None) -> Dict[str, Any]:
+    """Export lectures to output/lecture_<id>/, or into one tarball when output ends in .tar(.gz/.xz)/.tgz.
+
+    progress(result) is called from the main thread as each lecture finishes."""
+    mode = tarball_mode(output)
+    staging = Path(tempfile.mkdtemp(prefix="export_", dir=os.path.dirname(os.path.abspath(output)) or None)) if mode else None
+    base = staging if mode else Path(output)
+    part = f"{output}.part"
+    tar = tarfile.open(part, mode) if mode else None
+    results = []
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            queue = iter(lecture_ids)
+            # Keep at most 2 x workers lectures staged, so a tarball export never holds the whole archive on disk twice
+            while True:
+                for lecture_id in queue:
+                    pending.add(pool.submit(_export_one, lecture_id, base / f"lecture_{lecture_id}", formats))
+                    if len(pending) >= workers * 2:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    lecture_dir = base / f"lecture_{result['lecture_id']}"
+                    if tar is not None and lecture_dir.exists():
+                        if "error" not in result:
+                            tar.add(str(lecture_dir), arcname=lecture_dir.name)
+                        shutil.rmtree(lecture_dir, ignore_errors=True)
+                    results.append(result)
+                    if progress:
+                        progress(result)
+        if tar is not None:
+            tar.close()
+            tar = None
+            os.replace(part, output)
+    finally:
+        if tar is not None:
+            tar.close()
+            if os.path.exists(part):
+                os.remove(part)
+        if staging:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    ok = [r for r in results if "error" not in r]
+    return {
+        "output": output,
+        "lectures": len(ok),
+        "failed": [r for r in results if "error" in r],
+        "segments": sum(r["segments"] for r in ok),
+        "frames": sum(r["frames"] for r in ok),
+        "bytes": os.path.getsize(output) if mode else sum(r["bytes"] for r in ok),
+    }
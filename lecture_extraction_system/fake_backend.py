@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+"""
+Lightweight stand-in for the Colab backend (app.py), for local development
+and load testing without a GPU or ngrok. Stdlib only.
+
+Implements every route LLMClient uses: /health, /upload, /index, /status,
+/status/<id>/stream, /result, /job, /generate, /summarize and /clip, with
+configurable latency and failure injection.
+
+Usage: python fake_backend.py --port 8000 --latency-ms 50 --jitter-ms 20 --failure-rate 0.02
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeBackendConfig:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, failure_rate: float = 0.0,
+                 job_seconds: float = 5.0, generate_ms: float = 200.0, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.job_seconds = job_seconds
+        self.generate_ms = generate_ms
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def delay(self, extra_ms: float = 0.0):
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        total = max(0.0, self.latency_ms + jitter + extra_ms)
+        if total:
+            time.sleep(total / 1000.0)
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.failure_rate
+
+
+class FakeJobs:
+    """Jobs advance on wall-clock time: progress = elapsed / job_seconds."""
+
+    def __init__(self, job_seconds: float):
+        self.job_seconds = job_seconds
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    def create(self, kind: str, payload: dict = None) -> str:
+        job_id = str(uuid.uuid4())
+        with self.lock:
+            self.jobs[job_id] = {"kind": kind, "created": time.time(), "payload": payload or {}}
+        return job_id
+
+    def status(self, job_id: str):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        elapsed = time.time() - job["created"]
+        duration = self.job_seconds if job["kind"] == "upload" else self.job_seconds / 5
+        progress = min(100, int(100 * elapsed / duration)) if duration > 0 else 100
+        if progress >= 100:
+            return {"status": "completed", "progress": 100, "message": "Done", "error": None}
+        message = "Transcribing with Whisper..." if progress < 50 else "Building RAG index..."
+        return {"status": "processing", "progress": progress, "message": message, "error": None}
+
+    def result(self, job_id: str):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job["kind"] == "index":
+            transcript = job["payload"].get("transcript", [])
+            frames = job["payload"].get("frames", [])
+        else:
+            transcript = [{"start": i * 5.0, "end": i * 5.0 + 5.0, "text": f"Synthetic sentence number {i}.", "confidence": 0.0}
+                          for i in range(120)]
+            frames = [{"timestamp": i * 1.0, "printed_text": f"Slide {i // 30 + 1}", "handwritten_text": "", "ocr_confidence": 0.0}
+                      for i in range(0, 600, 30)]
+        return {"transcript": transcript, "frames": frames,
+                "duration": transcript[-1]["end"] if transcript else 0, "chunks_indexed": max(1, len(transcript) // 20)}
+
+    def active(self) -> int:
+        with self.lock:
+            ids = list(self.jobs)
+        return sum(1 for job_id in ids if (self.status(job_id) or {}).get("status") == "processing")
+
+    def delete(self, job_id: str) -> bool:
+        with self.lock:
+            return self.jobs.pop(job_id, None) is not None
+
+
+def make_handler(config: FakeBackendConfig, jobs: FakeJobs):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send_json(self, code: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _injected_failure(self) -> bool:
+            # /health stays honest so the UI's connect step is predictable
+            if self.path != "/health" and config.should_fail():
+                self._send_json(502, {"error": "Injected failure"})
+                return True
+            return False
+
+        def do_GET(self):
+            config.delay()
+            if self._injected_failure():
+                return
+            path = self.path.split("?", 1)[0]
+
+            if path == "/health":
+                return self._send_json(200, {"status": "healthy", "model_loaded": True, "fake": True, "active_jobs": jobs.active()})
+
+            m = re.fullmatch(r"/status/([\w-]+)/stream", path)
+            if m:
+                return self._stream_status(m.group(1))
+
+            m = re.fullmatch(r"/status/([\w-]+)", path)
+            if m:
+                status = jobs.status(m.group(1))
+                if status is None:
+                    return self._send_json(404, {"error": "Job not found"})
+                return self._send_json(200, status)
+
+            m = re.fullmatch(r"/result/([\w-]+)", path)
+            if m:
+                status = jobs.status(m.group(1))
+                if status is None:
+                    return self._send_json(404, {"error": "Job not found"})
+                if status["status"] != "completed":
+                    return self._send_json(400, {"error": "Job not ready"})
+                return self._send_json(200, jobs.result(m.group(1)))
+
+            m = re.fullmatch(r"/clip/([\w-]+)", path)
+            if m:
+                data = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 1024
+                self.send_response(200)
+                self.send_header("Content-Type", "video/mp4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+            self._send_json(404, {"error": "Not found"})
+
+        def _stream_status(self, job_id: str):
+            if jobs.status(job_id) is None:
+                return self._send_json(404, {"error": "Job not found"})
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            last = None
+            while True:
+                status = jobs.status(job_id) or {"status": "failed", "progress": 0, "message": "Job removed", "error": "Job not found"}
+                if status != last:
+                    self.wfile.write(f"data: {json.dumps(status)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    last = status
+                if status["status"] in ("completed", "failed"):
+                    return
+                time.sleep(0.25)
+
+        def do_POST(self):
+            body = self._read_body()
+            config.delay()
+            if self._injected_failure():
+                return
+            path = self.path.split("?", 1)[0]
+
+            if path == "/upload":
+                if not body:
+                    return self._send_json(400, {"error": "No video file"})
+                return self._send_json(200, {"job_id": jobs.create("upload")})
+
+            if path == "/index":
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    return self._send_json(400, {"error": "Invalid JSON"})
+                if not payload.get("transcript") and not payload.get("frames"):
+                    return self._send_json(400, {"error": "Nothing to index"})
+                return self._send_json(200, {"job_id": jobs.create("index", payload)})
+
+            if path == "/generate":
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    return self._send_json(400, {"error": "Invalid JSON"})
+                job_id = payload.get("job_id")
+                if job_id and jobs.status(job_id) is None:
+                    return self._send_json(400, {"error": "RAG retrieval failed: unknown job"})
+                max_tokens = int(payload.get("max_tokens", 500))
+                # Generation time scales loosely with the requested length
+                config.delay(config.generate_ms * min(1.0, max_tokens / 500))
+                question = payload.get("prompt", "")
+                start = float(zlib.crc32(question.encode('utf-8')) % 600)
+                return self._send_json(200, {
+                    "text": f"(fake) Answer to: {question}",
+                    "clip_id": str(uuid.uuid4()) if job_id else None,
+                    "timestamp": {"start": start, "end": start + 30, "label": f"{int(start // 60):02d}:{int(start % 60):02d}"} if job_id else None,
+                    "metadata": {"backend": "fake", "rag_used": bool(job_id), "tokens_generated": min(max_tokens, 50), "cache_hit": False,
+                                 "history_chars": len(payload.get("history") or "")},
+                })
+
+            if path == "/summarize":
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    return self._send_json(400, {"error": "Invalid JSON"})
+                items = payload.get("items") or []
+                if not items:
+                    return self._send_json(400, {"error": "No items"})
+                # One batched generation, so latency barely grows with the batch size
+                config.delay(config.generate_ms * min(1.0, int(payload.get("max_tokens", 200)) / 500))
+                return self._send_json(200, {
+                    "results": [{"id": item.get("id"), "text": "(fake) Summary: " + " ".join(item.get("text", "").split()[:20])}
+                                for item in items],
+                    "metadata": {"backend": "fake", "batch_size": len(items)},
+                })
+
+            self._send_json(404, {"error": "Not found"})
+
+        def do_DELETE(self):
+            config.delay()
+            if self._injected_failure():
+                return
+            m = re.fullmatch(r"/job/([\w-]+)", self.path.split("?", 1)[0])
+            if m:
+                jobs.delete(m.group(1))
+                return self._send_json(200, {"ok": True})
+            self._send_json(404, {"error": "Not found"})
+
+    return Handler
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8000, config: FakeBackendConfig = None) -> ThreadingHTTPServer:
+    config = config or FakeBackendConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(config, FakeJobs(config.job_seconds)))
+    server.daemon_threads = True
+    return server
+
+
+def start_in_background(config: FakeBackendConfig = None, host: str = "127.0.0.1", port: int = 0):
+    """Start on a free port in a daemon thread; returns (server, base_url)."""
+    server = create_server(host, port, config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake AI backend for local testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Base latency added to every request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform +/- jitter on the base latency')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests answered with 502')
+    parser.add_argument('--job-seconds', type=float, default=5.0, help='Time for an upload job to complete')
+    parser.add_argument('--generate-ms', type=float, default=200.0, help='Extra latency for /generate at 500 tokens')
+    parser.add_argument('--seed', type=int, help='Random seed for jitter/failures')
+    args = parser.parse_args()
+
+    config = FakeBackendConfig(args.latency_ms, args.jitter_ms, args.failure_rate,
+                               args.job_seconds, args.generate_ms, args.seed)
+    server = create_server(args.host, args.port, config)
+    print(f"Fake backend listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+
+if __name__ == '__main__':
+    main()
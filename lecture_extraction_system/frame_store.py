@@ -0,0 +1,171 @@
+"""
+Content-addressed frame storage.
+
+Sampled frames are downscaled to FRAME_STORE_MAX_SIDE, encoded as WebP and
+stored once under processed/frame_store/<ab>/<sha256>.webp. A frame that is
+perceptually identical to the previous one (dHash within
+FRAME_DEDUP_DISTANCE bits) reuses its file, so a slide shown for ten
+minutes is stored once instead of twenty times. Files can be shared between
+lectures, so deleting a lecture must go through release_frames().
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional, Set
+
+import cv2
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config import PROCESSED_DIR, FRAME_STORE_DIR, FRAME_STORE_MAX_SIDE, FRAME_STORE_QUALITY, FRAME_DEDUP_DISTANCE
+from database import Frame, Lecture
+
+
+def dhash(image: np.ndarray, size: int = 8) -> int:
+    """64-bit difference hash: robust to compression noise, sensitive to slide changes."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def is_store_path(path: Optional[str]) -> bool:
+    if not path:
+        return False
+    try:
+        return Path(path).resolve().is_relative_to(FRAME_STORE_DIR.resolve())
+    except (OSError, ValueError):
+        return False
+
+
+class FrameStore:
+    """Use one instance per lecture: near-duplicate detection compares against the last frame put."""
+
+    def __init__(self, root: Path = FRAME_STORE_DIR, max_side: int = FRAME_STORE_MAX_SIDE,
+                 quality: int = FRAME_STORE_QUALITY, dedup_distance: int = FRAME_DEDUP_DISTANCE):
+        self.root = Path(root)
+        self.max_side = max_side
+        self.quality = quality
+        self.dedup_distance = dedup_distance
+        self.last_hash = None
+        self.last_path = None
+        self.stored = 0
+        self.reused = 0
+
+    def encode(self, image: np.ndarray) -> bytes:
+        h, w = image.shape[:2]
+        scale = self.max_side / max(h, w)
+        if scale < 1:
+            image = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("WebP encoding failed")
+        return buf.tobytes()
+
+    def add(self, image: np.ndarray) -> str:
+        """Encode and store an image under its content hash, without near-duplicate checks."""
+        data = self.encode(image)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.root / digest[:2] / f"{digest}.webp"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self.stored += 1
+        else:
+            # Marks the file as in use until this lecture's Frame rows are committed
+            os.utime(path)
+            self.reused += 1
+        return str(path)
+
+    def put(self, image: np.ndarray) -> str:
+        """Store a BGR frame; returns the path of the (possibly shared) WebP file."""
+        phash = dhash(image)
+        if self.last_path is not None and hamming(phash, self.last_hash) <= self.dedup_distance:
+            self.reused += 1
+            return self.last_path
+        self.last_hash, self.last_path = phash, self.add(image)
+        return self.last_path
+
+
+def release_frames(db: Session, paths: Iterable[str], grace_seconds: float = 3600) -> int:
+    """Delete store files that no Frame row references any more. Call after deleting rows.
+
+    Files touched within grace_seconds may belong to a lecture that is still
+    processing and has not committed its rows; they are left for a later sweep."""
+    freed = 0
+    cutoff = time.time() - grace_seconds
+    for path in set(p for p in paths if is_store_path(p)):
+        if db.query(Frame.id).filter(Frame.frame_path == path).first() is None:
+            try:
+                if os.path.getmtime(path) > cutoff:
+                    continue
+                size = os.path.getsize(path)
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+    return freed
+
+
+def lecture_frame_paths(db: Session, lecture_id: int) -> Set[str]:
+    return {p for (p,) in db.query(Frame.frame_path).filter(Frame.lecture_id == lecture_id).distinct() if p}
+
+
+def disk_usage(paths: Iterable[str]) -> int:
+    total = 0
+    for p in paths:
+        try:
+            total += os.path.getsize(p)
+        except OSError:
+            pass
+    return total
+
+
+def migrate_lecture_frames(db: Session, lecture_id: int, store_root: Path = FRAME_STORE_DIR) -> Dict[str, Any]:
+    """Move a lecture's legacy processed/lecture_<id>/frames/*.jpg into the store and repoint its rows."""
+    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    frames_dir = PROCESSED_DIR / f"lecture_{lecture_id}" / "frames"
+    legacy_files = [p for p in frames_dir.glob("*") if p.is_file()] if frames_dir.exists() else []
+    report = {
+        "lecture_id": lecture_id,
+        "hours": (lecture.duration or 0.0) / 3600 if lecture else 0.0,
+        "bytes_before": disk_usage(legacy_files) + disk_usage(p for p in lecture_frame_paths(db, lecture_id) if is_store_path(p)),
+        "frames": 0,
+        "unique_images": 0,
+        "missing": 0,
+    }
+
+    store = FrameStore(store_root)
+    rows = db.query(Frame).filter(Frame.lecture_id == lecture_id).order_by(Frame.timestamp).all()
+    for row in rows:
+        if is_store_path(row.frame_path):
+            continue
+        image = cv2.imread(row.frame_path) if row.frame_path and os.path.exists(row.frame_path) else None
+        if image is None:
+            report["missing"] += 1
+            continue
+        row.frame_path = store.put(image)
+        report["frames"] += 1
+    db.commit()
+
+    # Rows are committed before any JPEG is removed, so an interrupted run is safe to repeat
+    for path in legacy_files:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    if frames_dir.exists() and not any(frames_dir.iterdir()):
+        frames_dir.rmdir()
+
+    paths = lecture_frame_paths(db, lecture_id)
+    report["unique_images"] = len(paths)
+    report["bytes_after"] = disk_usage(paths)
+    return report
@@ -0,0 +1,275 @@
+"""
+Text generation backends for the RAG server (app.py).
+
+  hf        Mistral-7B-Instruct via transformers + bitsandbytes 4-bit (CUDA)
+  llamacpp  Quantized GGUF model through llama-cpp-python (CPU)
+  stub      Deterministic, dependency-free backend for tests and staging
+
+Pick one with GENERATION_BACKEND. Each backend imports its libraries in
+load(), so only the selected one has to be installed. app.py itself still
+needs sentence-transformers (and so torch, CPU-only is enough) for
+retrieval embeddings; Whisper, EasyOCR and OpenCV only for /upload jobs.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List
+
+GENERATION_BACKEND = os.getenv("GENERATION_BACKEND", "hf")
+HF_MODEL_NAME = os.getenv("HF_MODEL_NAME", "mistralai/Mistral-7B-Instruct-v0.2")
+GGUF_MODEL_PATH = os.getenv("GGUF_MODEL_PATH", "models/mistral-7b-instruct-v0.2.Q4_K_M.gguf")
+LLAMA_THREADS = int(os.getenv("LLAMA_THREADS", "0")) or None
+MODEL_CONTEXT_TOKENS = int(os.getenv("MODEL_CONTEXT_TOKENS", "4096"))
+MIN_NEW_TOKENS = 16     # smallest answer budget worth generating
+PACKING_MARGIN = 8      # BOS token and merges across chunk boundaries
+
+
+class PromptTooLong(ValueError):
+    """The question (plus history) alone leaves no room for an answer in the context window."""
+
+
+def build_prompt(context: str, question: str, history: str = "") -> str:
+    """history: the client's conversation memory (rolling summary plus recent turns), if any."""
+    conversation = f"\nConversation so far:\n{history}\n" if history else ""
+    return f"""<s>[INST] Based on the following lecture content, answer the question.
+
+Lecture Content:
+{context}
+{conversation}
+Question: {question} [/INST]"""
+
+
+def build_summary_prompt(context: str, instruction: str) -> str:
+    return f"""<s>[INST] {instruction}
+
+Lecture Content:
+{context} [/INST]"""
+
+
+class GenerationBackend(ABC):
+    """Interface used by /generate: token counting for prompt packing plus generation."""
+
+    name = "base"
+    context_window = MODEL_CONTEXT_TOKENS
+
+    @abstractmethod
+    def load(self):
+        ...
+
+    @abstractmethod
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        ...
+
+    def count_tokens(self, text: str) -> int:
+        return self.count_tokens_batch([text])[0]
+
+    @abstractmethod
+    def generate(self, prompt: str, max_new_tokens: int, temperature: float) -> Dict[str, Any]:
+        """Returns {"text", "prompt_tokens", "tokens_generated"}."""
+
+    def generate_batch(self, prompts: List[str], max_new_tokens: int, temperature: float) -> List[Dict[str, Any]]:
+        """One result per prompt. Backends that can pad and batch on the GPU override this."""
+        return [self.generate(p, max_new_tokens, temperature) for p in prompts]
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+    def check_fits(self, prompt_tokens: int, max_new_tokens: int):
+        """Last line of defence for callers that did not go through pack_context."""
+        if prompt_tokens + max_new_tokens > self.context_window:
+            raise PromptTooLong(f"Prompt of {prompt_tokens} tokens plus {max_new_tokens} new tokens exceeds "
+                                f"the model's {self.context_window}-token context window")
+
+
+def pack_context(backend: GenerationBackend, question: str, chunks: List[str], max_new_tokens: int,
+                 context_window: int = MODEL_CONTEXT_TOKENS, template=build_prompt):
+    """Fill the prompt with whole chunks, in the given (relevance) order, within the token budget.
+
+    Instruction, question and max_new_tokens are reserved first so the question
+    can never be cut off. Chunks that do not fit are skipped, not truncated.
+    Raises PromptTooLong when the question alone leaves less than MIN_NEW_TOKENS
+    for the answer: cutting it would answer a different question."""
+    base_tokens = backend.count_tokens(template("", question))
+    if base_tokens + MIN_NEW_TOKENS + PACKING_MARGIN > context_window:
+        raise PromptTooLong(
+            f"Question is too long: with the prompt template it takes {base_tokens} of the model's "
+            f"{context_window}-token context window, leaving no room for an answer. Shorten the question."
+        )
+    max_new_tokens = max(MIN_NEW_TOKENS, min(max_new_tokens, context_window - base_tokens - PACKING_MARGIN))
+    budget = context_window - base_tokens - max_new_tokens - PACKING_MARGIN
+    sep_tokens = backend.count_tokens("\n\n")
+    chunk_tokens = backend.count_tokens_batch(chunks)
+
+    packed, used = [], 0
+    for chunk, n_tokens in zip(chunks, chunk_tokens):
+        cost = n_tokens + (sep_tokens if packed else 0)
+        if used + cost > budget:
+            continue
+        packed.append(chunk)
+        used += cost
+
+    return "\n\n".join(packed), {
+        "context_chunks_used": len(packed),
+        "context_chunks_available": len(chunks),
+        "context_tokens": used,
+        "context_budget_tokens": max(0, budget),
+        "max_new_tokens": max_new_tokens,
+    }
+
+
+class HFBackend(GenerationBackend):
+    name = "hf"
+
+    def __init__(self, model_name: str = HF_MODEL_NAME, load_in_4bit: bool = True):
+        self.model_name = model_name
+        self.load_in_4bit = load_in_4bit
+        self.model = None
+        self.tokenizer = None
+
+    def load(self):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
+
+        print(f"Loading model: {self.model_name}")
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        # Decoder-only models must be left-padded for batched generation
+        self.tokenizer.padding_side = "left"
+
+        kwargs = {"device_map": "auto"}
+        if self.load_in_4bit:
+            kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=torch.float16,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_use_double_quant=True
+            )
+        self.model = AutoModelForCausalLM.from_pretrained(self.model_name, **kwargs)
+        print(f"{self.model_name} loaded successfully!")
+
+    def count_tokens_batch(self, texts):
+        if not texts:
+            return []
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def generate(self, prompt, max_new_tokens, temperature):
+        import torch
+
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+        self.check_fits(inputs["input_ids"].shape[1], max_new_tokens)
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                temperature=temperature if temperature > 0 else None,
+                do_sample=temperature > 0,
+                pad_token_id=self.tokenizer.eos_token_id,
+            )
+        prompt_len = inputs["input_ids"].shape[1]
+        generated_ids = outputs[0][prompt_len:]
+        return {
+            "text": self.tokenizer.decode(generated_ids, skip_special_tokens=True).strip(),
+            "prompt_tokens": int(prompt_len),
+            "tokens_generated": int(len(generated_ids)),
+        }
+
+    def generate_batch(self, prompts, max_new_tokens, temperature):
+        import torch
+
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.model.device)
+        self.check_fits(inputs["input_ids"].shape[1], max_new_tokens)
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                temperature=temperature if temperature > 0 else None,
+                do_sample=temperature > 0,
+                pad_token_id=self.tokenizer.eos_token_id,
+            )
+        prompt_len = inputs["input_ids"].shape[1]
+        results = []
+        for i, row in enumerate(outputs):
+            generated_ids = row[prompt_len:]
+            results.append({
+                "text": self.tokenizer.decode(generated_ids, skip_special_tokens=True).strip(),
+                "prompt_tokens": int(inputs["attention_mask"][i].sum()),
+                # Finished rows are padded with EOS up to the longest one
+                "tokens_generated": int((generated_ids != self.tokenizer.eos_token_id).sum()),
+            })
+        return results
+
+    def describe(self):
+        return {"backend": self.name, "model": self.model_name, "4bit": self.load_in_4bit}
+
+
+class LlamaCppBackend(GenerationBackend):
+    name = "llamacpp"
+
+    def __init__(self, model_path: str = GGUF_MODEL_PATH, n_ctx: int = MODEL_CONTEXT_TOKENS, n_threads: int = LLAMA_THREADS):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.context_window = n_ctx
+        self.n_threads = n_threads
+        self.llm = None
+
+    def load(self):
+        from llama_cpp import Llama
+
+        print(f"Loading GGUF model: {self.model_path}")
+        self.llm = Llama(model_path=self.model_path, n_ctx=self.n_ctx, n_threads=self.n_threads, verbose=False)
+        print("GGUF model loaded.")
+
+    def count_tokens_batch(self, texts):
+        return [len(self.llm.tokenize(t.encode("utf-8"), add_bos=False)) for t in texts]
+
+    def generate(self, prompt, max_new_tokens, temperature):
+        # llama.cpp adds BOS itself; a literal "<s>" would be tokenized as text
+        if prompt.startswith("<s>"):
+            prompt = prompt[len("<s>"):]
+        # llama.cpp raises on prompts longer than n_ctx; fail with the same error as pack_context
+        self.check_fits(len(self.llm.tokenize(prompt.encode("utf-8"))), max_new_tokens)
+        out = self.llm(prompt, max_tokens=max_new_tokens, temperature=temperature)
+        usage = out.get("usage", {})
+        return {
+            "text": out["choices"][0]["text"].strip(),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "tokens_generated": usage.get("completion_tokens", 0),
+        }
+
+    def describe(self):
+        return {"backend": self.name, "model": os.path.basename(self.model_path), "n_ctx": self.n_ctx}
+
+
+class StubBackend(GenerationBackend):
+    """Deterministic answers built from the prompt's lecture content; whitespace tokens."""
+
+    name = "stub"
+
+    def load(self):
+        pass
+
+    def count_tokens_batch(self, texts):
+        return [len(t.split()) for t in texts]
+
+    def generate(self, prompt, max_new_tokens, temperature):
+        content = prompt.split("Lecture Content:", 1)[-1].split("Question:", 1)[0]
+        words = content.split()[:max_new_tokens] or ["No", "lecture", "content", "provided."]
+        return {
+            "text": " ".join(words),
+            "prompt_tokens": len(prompt.split()),
+            "tokens_generated": len(words),
+        }
+
+
+BACKENDS = {
+    HFBackend.name: HFBackend,
+    LlamaCppBackend.name: LlamaCppBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def create_backend(name: str = GENERATION_BACKEND) -> GenerationBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown generation backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
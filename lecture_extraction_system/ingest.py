@@ -0,0 +1,173 @@
+"""
+Bulk ingest of lecture videos (manage.py ingest).
+Registers each video as a Lecture and processes them across a process pool,
+one LectureProcessor (and so one Whisper/OCR model set) per worker process.
+State lives in the database, so an interrupted run resumes where it left off.
+"""
+
+import glob
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any
+
+from database import SessionLocal, Lecture, Transcript, Frame, ProcessingJob
+from config import VIDEO_FORMATS, PROCESSED_DIR
+from video_processor import file_sha256
+from frame_store import lecture_frame_paths, release_frames
+from job_queue import ACTIVE_STATUSES
+
+_processor = None
+
+
+def find_videos(source: str) -> List[Path]:
+    """Videos in a directory (recursive) or matching a glob pattern."""
+    path = Path(source)
+    if path.is_dir():
+        candidates = path.rglob("*")
+    else:
+        candidates = (Path(p) for p in glob.glob(source, recursive=True))
+    return sorted(p.resolve() for p in candidates if p.is_file() and p.suffix.lower() in VIDEO_FORMATS)
+
+
+def register_videos(videos: List[Path]) -> Dict[str, list]:
+    """Create Lecture rows for new videos. Completed ones are skipped; unfinished ones are resumed.
+
+    Lectures with a queued or running worker job are skipped too: resuming deletes their
+    transcripts and frames, which would race the worker processing them."""
+    plan = {"pending": [], "skipped": []}
+    seen = set()
+    db = SessionLocal()
+    try:
+        busy = {lid for (lid,) in db.query(ProcessingJob.lecture_id)
+                .filter(ProcessingJob.status.in_(ACTIVE_STATUSES)).distinct()}
+        for video in videos:
+            lecture = db.query(Lecture).filter(Lecture.video_path == str(video)).first()
+            if lecture is None:
+                content_hash = file_sha256(str(video))
+                lecture = db.query(Lecture).filter(Lecture.content_hash == content_hash).first()
+                if lecture is None:
+                    lecture = Lecture(title=video.stem, video_path=str(video), status="uploaded", content_hash=content_hash)
+                    db.add(lecture)
+                    db.commit()
+                    db.refresh(lecture)
+            if lecture.status == "completed" or lecture.id in seen or lecture.id in busy:
+                plan["skipped"].append((lecture.id, str(video)))
+            else:
+                video_path = lecture.video_path if Path(lecture.video_path).exists() else str(video)
+                plan["pending"].append((lecture.id, video_path))
+            seen.add(lecture.id)
+    finally:
+        db.close()
+    return plan
+
+
+def _init_worker():
+    global _processor
+    from lecture_processor import LectureProcessor
+    _processor = LectureProcessor()
+
+
+def _ingest_one(lecture_id: int, video_path: str) -> Dict[str, Any]:
+    db = SessionLocal()
+    started = time.time()
+    try:
+        # Drop rows from an interrupted earlier attempt — process_lecture only appends
+        frame_paths = lecture_frame_paths(db, lecture_id)
+        db.query(Transcript).filter(Transcript.lecture_id == lecture_id).delete()
+        db.query(Frame).filter(Frame.lecture_id == lecture_id).delete()
+        db.commit()
+        release_frames(db, frame_paths)
+
+        ok = _processor.process_lecture(lecture_id, video_path, db)
+        lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+        return {
+            "lecture_id": lecture_id,
+            "title": lecture.title if lecture else "",
+            "video_path": video_path,
+            "status": lecture.status if lecture else ("completed" if ok else "failed"),
+            "video_seconds": (lecture.duration or 0.0) if lecture else 0.0,
+            "wall_seconds": time.time() - started,
+        }
+    finally:
+        db.close()
+
+
+def _throughput(video_seconds: float, wall_seconds: float) -> float:
+    # video-minutes processed per wall-minute
+    return video_seconds / wall_seconds if wall_seconds > 0 else 0.0
+
+
+def run_ingest(source: str, workers: int = 1, report_path: str = None) -> Dict[str, Any]:
+    videos = find_videos(source)
+    if not videos:
+        print(f"No videos found for: {source}")
+        return {}
+
+    print(f"Found {len(videos)} video(s). Registering...")
+    plan = register_videos(videos)
+    print(f"  To process: {len(plan['pending'])}")
+    print(f"  Already ingested or queued (skipped): {len(plan['skipped'])}")
+
+    results = []
+    started = time.time()
+    interrupted = False
+    if plan["pending"]:
+        ctx = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker)
+        futures = {executor.submit(_ingest_one, lid, path): (lid, path) for lid, path in plan["pending"]}
+        try:
+            for future in as_completed(futures):
+                lid, path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"lecture_id": lid, "title": Path(path).stem, "video_path": path,
+                              "status": "failed", "error": str(e), "video_seconds": 0.0, "wall_seconds": 0.0}
+                result["throughput"] = _throughput(result["video_seconds"], result["wall_seconds"])
+                results.append(result)
+                print(f"  [{len(results)}/{len(futures)}] #{lid} {result['title'][:40]}: {result['status']} "
+                      f"({result['throughput']:.2f}x realtime)")
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\nInterrupted — unfinished lectures will be resumed on the next run.")
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            executor.shutdown()
+
+    wall_seconds = time.time() - started
+    video_seconds = sum(r["video_seconds"] for r in results if r["status"] == "completed")
+    report = {
+        "source": source,
+        "started_at": datetime.fromtimestamp(started).isoformat(),
+        "workers": workers,
+        "interrupted": interrupted,
+        "found": len(videos),
+        "skipped": len(plan["skipped"]),
+        "processed": sum(1 for r in results if r["status"] == "completed"),
+        "failed": sum(1 for r in results if r["status"] != "completed"),
+        "wall_seconds": wall_seconds,
+        "video_seconds": video_seconds,
+        "throughput": _throughput(video_seconds, wall_seconds),
+        "lectures": results,
+    }
+
+    if not report_path:
+        report_path = PROCESSED_DIR / f"ingest_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 60)
+    print("Ingest Summary")
+    print("=" * 60)
+    print(f"Processed:   {report['processed']}")
+    print(f"Failed:      {report['failed']}")
+    print(f"Skipped:     {report['skipped']}")
+    print(f"Video:       {video_seconds / 60:.1f} min in {wall_seconds / 60:.1f} wall min")
+    print(f"Throughput:  {report['throughput']:.2f} video-min per wall-min ({workers} worker(s))")
+    print(f"Report:      {report_path}")
+    print("=" * 60)
+    return report
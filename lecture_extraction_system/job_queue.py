@@ -0,0 +1,143 @@
+import time
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+from database import SessionLocal, ProcessingJob, Lecture
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def enqueue_lecture(db: Session, lecture_id: int, video_path: str, profile: bool = False) -> ProcessingJob:
+    """Queue a lecture for the background worker; returns the existing job if one is active.
+
+    profile=True captures a profile for this job even without LECTURE_PROFILE."""
+    return _enqueue(db, lecture_id, video_path, "process", profile=profile)
+
+
+def enqueue_summary(db: Session, lecture_id: int, api_url: Optional[str] = None) -> ProcessingJob:
+    """Queue summary and chapter generation; the worker runs these after every queued processing job.
+
+    api_url is the backend (or comma-separated backends) to summarize with; the worker's
+    COLAB_API_URL is used when it is None."""
+    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    return _enqueue(db, lecture_id, lecture.video_path if lecture else "", "summary", api_url=api_url)
+
+
+def _enqueue(db: Session, lecture_id: int, video_path: str, kind: str, **fields) -> ProcessingJob:
+    job = (
+        db.query(ProcessingJob)
+        .filter(ProcessingJob.lecture_id == lecture_id, ProcessingJob.kind == kind,
+                ProcessingJob.status.in_(ACTIVE_STATUSES))
+        .first()
+    )
+    if job:
+        return job
+    job = ProcessingJob(lecture_id=lecture_id, video_path=video_path, kind=kind, **fields)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def latest_job(db: Session, lecture_id: int, kind: str = "process") -> Optional[ProcessingJob]:
+    return (
+        db.query(ProcessingJob)
+        .filter(ProcessingJob.lecture_id == lecture_id, ProcessingJob.kind == kind)
+        .order_by(ProcessingJob.id.desc())
+        .first()
+    )
+
+
+def request_cancel(db: Session, lecture_id: int) -> bool:
+    """Flag active jobs for a lecture. Queued jobs are cancelled outright; running ones stop at the next check."""
+    jobs = (
+        db.query(ProcessingJob)
+        .filter(ProcessingJob.lecture_id == lecture_id, ProcessingJob.status.in_(ACTIVE_STATUSES))
+        .all()
+    )
+    for job in jobs:
+        job.cancel_requested = True
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.message = "Cancelled"
+            job.finished_at = datetime.utcnow()
+    db.commit()
+    return bool(jobs)
+
+
+def claim_next_job(db: Session, worker_pid: int) -> Optional[ProcessingJob]:
+    """Atomically move the oldest queued job to running. Summary jobs wait until no processing job is queued."""
+    low_priority = case((ProcessingJob.kind == "summary", 1), else_=0)
+    while True:
+        job = (
+            db.query(ProcessingJob)
+            .filter(ProcessingJob.status == "queued")
+            .order_by(low_priority, ProcessingJob.id.asc())
+            .first()
+        )
+        if not job:
+            return None
+        claimed = (
+            db.query(ProcessingJob)
+            .filter(ProcessingJob.id == job.id, ProcessingJob.status == "queued")
+            .update({
+                "status": "running",
+                "worker_pid": worker_pid,
+                "started_at": datetime.utcnow(),
+                "message": "Starting...",
+            }, synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            db.refresh(job)
+            return job
+
+
+class QueueCancelFlag:
+    """Drop-in for the threading.Event passed as cancel_event to process_lecture.
+
+    is_set() reads the job's cancel_requested column, at most once per interval."""
+
+    def __init__(self, job_id: int, check_interval: float = 2.0):
+        self.job_id = job_id
+        self.check_interval = check_interval
+        self._cancelled = False
+        self._last_check = 0.0
+
+    def is_set(self) -> bool:
+        if self._cancelled:
+            return True
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            db = SessionLocal()
+            try:
+                row = db.query(ProcessingJob.cancel_requested).filter(ProcessingJob.id == self.job_id).first()
+                self._cancelled = bool(row and row[0])
+            finally:
+                db.close()
+        return self._cancelled
+
+
+class QueueProgressReporter:
+    """progress_callback for process_lecture that writes to the job row, throttled."""
+
+    def __init__(self, job_id: int, min_interval: float = 1.0):
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._last_write = 0.0
+
+    def __call__(self, message: str, value: int):
+        now = time.monotonic()
+        if value not in (0, 100) and now - self._last_write < self.min_interval:
+            return
+        self._last_write = now
+        db = SessionLocal()
+        try:
+            db.query(ProcessingJob).filter(ProcessingJob.id == self.job_id).update(
+                {"message": message[:255], "progress": int(value)}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
@@ -0,0 +1,52 @@
+import threading
+from typing import Dict, Any, Optional
+from llm_client import LLMClient
+
+
+class JobWatcher:
+    """Follows backend job progress on background threads.
+
+    One thread per job consumes LLMClient.iter_job_events and keeps the latest
+    event in memory, so any number of Streamlit reruns/tabs can read progress
+    without talking to the backend themselves."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._clients: Dict[str, LLMClient] = {}
+
+    def watch(self, api_url: str, job_id: str):
+        with self._lock:
+            thread = self._threads.get(job_id)
+            if thread is not None and thread.is_alive():
+                return
+            self._events.setdefault(job_id, {"success": True, "status": "processing", "progress": 0, "message": "Waiting for backend..."})
+            thread = threading.Thread(target=self._follow, args=(api_url, job_id), daemon=True)
+            self._threads[job_id] = thread
+        thread.start()
+
+    def _follow(self, api_url: str, job_id: str):
+        # Watchers of the same backend share one connection pool and circuit breaker
+        with self._lock:
+            client = self._clients.setdefault(api_url, LLMClient(api_url))
+        for event in client.iter_job_events(job_id):
+            with self._lock:
+                self._events[job_id] = event
+            if not event.get("success"):
+                break
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            event = self._events.get(job_id)
+            return dict(event) if event else None
+
+    def is_watching(self, job_id: str) -> bool:
+        with self._lock:
+            thread = self._threads.get(job_id)
+            return thread is not None and thread.is_alive()
+
+    def forget(self, job_id: str):
+        with self._lock:
+            self._events.pop(job_id, None)
+            self._threads.pop(job_id, None)
@@ -1,12 +1,37 @@
 from pathlib import Path
 from datetime import datetime
 from sqlalchemy.orm import Session
-from database import Lecture, Transcript, Frame, get_db
+from database import Lecture, Transcript, Frame, JobMetric, get_db
 from video_processor import VideoProcessor
 from audio_processor import AudioProcessor
 from ocr_processor import OCRProcessor
-from config import PROCESSED_DIR, MAX_PROMPT_LENGTH
+from config import PROCESSED_DIR, MAX_PROMPT_LENGTH, INGEST_SUMMARIES
+from metrics import JobMetrics
+from profiling import JobProfiler, profiling_enabled
+from storage import refresh_lecture
+from job_queue import enqueue_summary
 import os
+import json
+import uuid
+
+
+def save_job_metrics(db: Session, lecture_id: int, metrics: JobMetrics, run_id: str = None, source: str = "local"):
+    data = metrics.as_dict()
+    if run_id:
+        # Re-imports and requeued jobs replace their earlier rows
+        db.query(JobMetric).filter(JobMetric.lecture_id == lecture_id, JobMetric.run_id == run_id).delete()
+    run_id = run_id or uuid.uuid4().hex
+    db.bulk_insert_mappings(JobMetric, [
+        {"lecture_id": lecture_id, "run_id": run_id, "source": source, "kind": "span",
+         "name": name, "value": span["seconds"], "count": span["count"]}
+        for name, span in data["spans"].items()
+    ] + [
+        {"lecture_id": lecture_id, "run_id": run_id, "source": source, "kind": "counter",
+         "name": name, "value": value, "count": 1}
+        for name, value in data["counters"].items()
+    ])
+    db.commit()
+
 
 class LectureProcessor:
     
@@ -15,7 +40,42 @@ class LectureProcessor:
         self.audio_processor = AudioProcessor()
         self.ocr_processor = OCRProcessor()
     
-    def process_lecture(self, lecture_id: int, video_path: str, db: Session, progress_callback=None, cancel_event=None):
+    def process_lecture(self, lecture_id: int, video_path: str, db: Session, progress_callback=None, cancel_event=None,
+                        run_id: str = None, profile: bool = None):
+        """profile=None follows the LECTURE_PROFILE env var (see profiling.py)."""
+        try:
+            if not profiling_enabled(profile):
+                return self._process_lecture(lecture_id, video_path, db, progress_callback, cancel_event, run_id)
+            label = f"{run_id or 'local'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            with JobProfiler(PROCESSED_DIR / f"lecture_{lecture_id}" / "profile", label):
+                return self._process_lecture(lecture_id, video_path, db, progress_callback, cancel_event, run_id)
+        finally:
+            # After the profiler exits so its files are counted too
+            self._refresh_storage(db, lecture_id)
+
+    @staticmethod
+    def _refresh_storage(db: Session, lecture_id: int):
+        try:
+            refresh_lecture(db, lecture_id)
+        except Exception as e:
+            db.rollback()
+            print(f"Could not update storage ledger: {e}")
+
+    @staticmethod
+    def _queue_digest(db: Session, lecture_id: int):
+        """With INGEST_SUMMARIES, hand the summary and chapter index to the worker as a low-priority job."""
+        if not INGEST_SUMMARIES:
+            return
+        try:
+            enqueue_summary(db, lecture_id)
+        except Exception as e:
+            db.rollback()
+            print(f"Could not queue summary job: {e}")
+
+    def _process_lecture(self, lecture_id: int, video_path: str, db: Session, progress_callback, cancel_event, run_id):
+        metrics = JobMetrics()
+        lecture = None
+        started = datetime.utcnow()
         try:
             def cancelled():
                 return cancel_event is not None and cancel_event.is_set()
@@ -31,11 +91,11 @@ class LectureProcessor:
                 db.commit()
                 return False
             
-            self.video_processor = VideoProcessor(video_path)
-            if not self.video_processor.open_video():
-                raise Exception("Failed to open video")
-            
-            video_info = self.video_processor.get_video_info()
+            with metrics.span("open_video"):
+                self.video_processor = VideoProcessor(video_path)
+                if not self.video_processor.open_video():
+                    raise Exception("Failed to open video")
+                video_info = self.video_processor.get_video_info()
             lecture.duration = video_info["duration"]
             db.commit()
             
@@ -49,8 +109,9 @@ class LectureProcessor:
             audio_path = PROCESSED_DIR / f"lecture_{lecture_id}" / "audio.wav"
             audio_path.parent.mkdir(parents=True, exist_ok=True)
             
-            if not self.video_processor.extract_audio(str(audio_path)):
-                raise Exception("Failed to extract audio")
+            with metrics.span("audio_extraction"):
+                if not self.video_processor.extract_audio(str(audio_path)):
+                    raise Exception("Failed to extract audio")
             
             if progress_callback:
                 progress_callback("Transcribing audio with Whisper...", 30)
@@ -59,21 +120,24 @@ class LectureProcessor:
                 db.commit()
                 return False
 
-            segments = self.audio_processor.get_segments_with_timestamps(str(audio_path))
+            with metrics.span("transcription"):
+                segments = self.audio_processor.get_segments_with_timestamps(str(audio_path))
+            metrics.incr("transcript_segments", len(segments))
             
             if progress_callback:
                 progress_callback("Saving transcripts...", 50)
             
-            for segment in segments:
-                transcript = Transcript(
-                    lecture_id=lecture_id,
-                    timestamp_start=segment["start"],
-                    timestamp_end=segment["end"],
-                    text=segment["text"],
-                    confidence=segment["confidence"]
-                )
-                db.add(transcript)
-            db.commit()
+            with metrics.span("db_write"):
+                for segment in segments:
+                    transcript = Transcript(
+                        lecture_id=lecture_id,
+                        timestamp_start=segment["start"],
+                        timestamp_end=segment["end"],
+                        text=segment["text"],
+                        confidence=segment["confidence"]
+                    )
+                    db.add(transcript)
+                db.commit()
             
             if progress_callback:
                 progress_callback("Extracting frames...", 60)
@@ -82,18 +146,28 @@ class LectureProcessor:
                 db.commit()
                 return False
 
-            frames_data = self.video_processor.extract_frames(lecture_id)
+            with metrics.span("frame_extraction"):
+                frames_data = self.video_processor.extract_frames(lecture_id)
+            metrics.incr("frames_extracted", len(frames_data))
             
             if progress_callback:
                 progress_callback("Performing OCR on frames...", 70)
             
             total_frames = len(frames_data)
+            ocr_results = {}  # deduplicated frames share a stored image, so OCR it once
             for idx, (timestamp, frame_path) in enumerate(frames_data):
                 if cancelled():
                     lecture.status = "cancelled"
                     db.commit()
                     return False
-                ocr_result = self.ocr_processor.extract_text(frame_path)
+                ocr_result = ocr_results.get(frame_path)
+                if ocr_result is None:
+                    with metrics.span("ocr"):
+                        ocr_result = self.ocr_processor.extract_text(frame_path)
+                    ocr_results[frame_path] = ocr_result
+                    metrics.incr("frames_ocrd")
+                else:
+                    metrics.incr("frames_deduplicated")
 
                 frame = Frame(
                     lecture_id=lecture_id,
@@ -110,7 +184,8 @@ class LectureProcessor:
                     progress = 70 + (20 * (idx / total_frames))
                     progress_callback(f"Processing frames... ({idx}/{total_frames})", int(progress))
             
-            db.commit()
+            with metrics.span("db_write"):
+                db.commit()
             
             if progress_callback:
                 progress_callback("Finalizing...", 95)
@@ -118,6 +193,7 @@ class LectureProcessor:
             lecture.status = "completed"
             lecture.processed_at = datetime.utcnow()
             db.commit()
+            self._queue_digest(db, lecture_id)
             
             if progress_callback:
                 progress_callback("Processing complete!", 100)
@@ -126,6 +202,7 @@ class LectureProcessor:
             
         except Exception as e:
             print(f"Error processing lecture: {e}")
+            metrics.incr("errors")
             lecture.status = "failed"
             db.commit()
             
@@ -136,7 +213,90 @@ class LectureProcessor:
         finally:
             if self.video_processor:
                 self.video_processor.close()
+            if lecture is not None:
+                metrics.add_time("total", (datetime.utcnow() - started).total_seconds())
+                try:
+                    save_job_metrics(db, lecture_id, metrics, run_id)
+                except Exception as e:
+                    print(f"Could not save job metrics: {e}")
+                    db.rollback()
     
+    def import_job_result(self, lecture_id: int, job_result: dict, db: Session, progress_callback=None, batch_size: int = 500) -> bool:
+        """Store a backend /result payload as Transcript/Frame rows so local processing can be skipped."""
+        try:
+            lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+            if not lecture:
+                return False
+
+            # Replace anything a previous import or local run left behind
+            db.query(Transcript).filter(Transcript.lecture_id == lecture_id).delete()
+            db.query(Frame).filter(Frame.lecture_id == lecture_id).delete()
+
+            if progress_callback:
+                progress_callback("Importing transcript...", 20)
+
+            segments = job_result.get("transcript") or []
+            for i in range(0, len(segments), batch_size):
+                db.bulk_insert_mappings(Transcript, [
+                    {
+                        "lecture_id": lecture_id,
+                        "timestamp_start": seg.get("start"),
+                        "timestamp_end": seg.get("end"),
+                        "text": seg.get("text", ""),
+                        "confidence": seg.get("confidence", 0.0),
+                    }
+                    for seg in segments[i:i + batch_size]
+                ])
+
+            if progress_callback:
+                progress_callback("Importing frame OCR...", 60)
+
+            frames = job_result.get("frames") or []
+            for i in range(0, len(frames), batch_size):
+                db.bulk_insert_mappings(Frame, [
+                    {
+                        "lecture_id": lecture_id,
+                        "timestamp": fr.get("timestamp"),
+                        "frame_path": fr.get("frame_path"),
+                        "extracted_text": " ".join(
+                            t for t in (fr.get("printed_text"), fr.get("handwritten_text")) if t
+                        ),
+                        "printed_text": fr.get("printed_text", ""),
+                        "handwritten_text": fr.get("handwritten_text", ""),
+                        "ocr_confidence": fr.get("ocr_confidence", 0.0),
+                    }
+                    for fr in frames[i:i + batch_size]
+                ])
+
+            if job_result.get("duration"):
+                lecture.duration = job_result["duration"]
+            lecture.status = "completed"
+            lecture.processed_at = datetime.utcnow()
+            db.commit()
+
+            if job_result.get("profile"):
+                profile_dir = PROCESSED_DIR / f"lecture_{lecture_id}" / "profile"
+                profile_dir.mkdir(parents=True, exist_ok=True)
+                with open(profile_dir / f"backend_{job_result.get('job_id', 'job')}.json", "w", encoding="utf-8") as f:
+                    json.dump(job_result["profile"], f, indent=2)
+
+            if job_result.get("metrics"):
+                save_job_metrics(db, lecture_id, JobMetrics.from_dict(job_result["metrics"]),
+                                 job_result.get("job_id"), source="backend")
+            self._refresh_storage(db, lecture_id)
+            self._queue_digest(db, lecture_id)
+
+            if progress_callback:
+                progress_callback("Import complete!", 100)
+            return True
+
+        except Exception as e:
+            print(f"Error importing job result: {e}")
+            db.rollback()
+            if progress_callback:
+                progress_callback(f"Error: {str(e)}", 0)
+            return False
+
     def get_lecture_context(self, lecture_id: int, db: Session) -> str:
         lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
         if not lecture:
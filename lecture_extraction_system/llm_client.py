@@ -1,41 +1,348 @@
-import requests
+import asyncio
 import json
-from typing import Dict, Any, Optional
-from config import COLAB_API_URL, API_TIMEOUT, UPLOAD_TIMEOUT
+import random
+import threading
+import time
+import weakref
+from typing import Dict, Any, Optional, Sequence, Iterator, AsyncIterator, List, Tuple
 
-class LLMClient:
-    
-    def __init__(self, api_url: Optional[str] = None):
-        self.api_url = api_url or COLAB_API_URL
-        self.session = requests.Session()
-    
-    def test_connection(self) -> bool:
+import httpx
+
+from config import (
+    COLAB_API_URLS, API_TIMEOUT, UPLOAD_TIMEOUT, API_CONNECT_TIMEOUT, API_MAX_CONNECTIONS, API_MAX_KEEPALIVE,
+    API_RETRY_ATTEMPTS, API_RETRY_BASE_DELAY, API_RETRY_MAX_DELAY, API_BREAKER_THRESHOLD, API_BREAKER_COOLDOWN,
+    API_HEALTH_INTERVAL, SUMMARY_BATCH_SIZE,
+)
+
+# Gateway errors from ngrok/Colab restarts that are worth another attempt
+RETRY_STATUSES = {502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_in: float, trial: bool = False):
+        if trial:
+            super().__init__("Backend unavailable; a trial request is checking whether it has recovered")
+        else:
+            super().__init__(f"Backend unavailable after repeated failures; retrying in {max(0.0, retry_in):.0f}s")
+        self.retry_in = max(0.0, retry_in)
+
+
+class CircuitBreaker:
+    """Fails calls fast after `threshold` consecutive failures, then lets one trial through after `cooldown`.
+
+    While the trial is in flight every other caller is rejected; its outcome closes
+    or re-opens the breaker. A caller that gets the trial from check() must end it with
+    record_success(), record_failure() or release()."""
+
+    def __init__(self, threshold: int = API_BREAKER_THRESHOLD, cooldown: float = API_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.cooldown else "half_open"
+
+    @property
+    def available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.trial)
+
+    def check(self) -> bool:
+        """Raise CircuitOpenError if the call may not go through; True when it is the half-open trial."""
+        state = self.state
+        if state == "open":
+            raise CircuitOpenError(self.cooldown - (time.monotonic() - self.opened_at))
+        if state == "half_open":
+            if self.trial:
+                raise CircuitOpenError(0, trial=True)
+            self.trial = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        # A failed trial call re-opens immediately
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self.trial = False
+
+    def release(self):
+        """The call ended without telling whether the backend works (e.g. cancelled); let another trial through."""
+        self.trial = False
+
+    def reset(self):
+        self.record_success()
+
+
+def _rewind(kwargs: Dict[str, Any]):
+    for value in (kwargs.get("files") or {}).values():
+        f = value[1] if isinstance(value, tuple) else value
+        if hasattr(f, "seek"):
+            f.seek(0)
+
+
+def parse_urls(api_url) -> List[str]:
+    """Accept one URL, a comma-separated string, or a list."""
+    if not api_url:
+        return list(COLAB_API_URLS)
+    items = api_url.split(",") if isinstance(api_url, str) else api_url
+    return [u.strip().rstrip("/") for u in items if u and u.strip()]
+
+
+class Backend:
+    """One backend URL with its own breaker and load counters."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.breaker = CircuitBreaker()
+        self.outstanding = 0   # requests in flight from this client
+        self.active_jobs = 0   # processing jobs, from /health
+        self.healthy = True
+        self.checked_at = None
+
+    @property
+    def load(self) -> int:
+        return self.outstanding + self.active_jobs
+
+    def describe(self) -> Dict[str, Any]:
+        return {"url": self.url, "healthy": self.healthy, "breaker": self.breaker.state,
+                "outstanding": self.outstanding, "active_jobs": self.active_jobs}
+
+
+class AsyncLLMClient:
+    """httpx-based client for one or more Colab backends. Methods return the same dicts as LLMClient.
+
+    Idempotent calls are retried on connection errors and 502/503/504 with
+    jittered exponential backoff; uploads and /index create jobs, so they are
+    only retried when the connection failed before anything was sent.
+    /generate and /summarize are not resent after a read timeout either: the
+    GPU may still be working on the first request. Each backend has a circuit
+    breaker, so a dead tunnel fails fast instead of each caller waiting out
+    its own timeouts; once it cools down a single trial request is let through.
+
+    With several backends, new work (uploads, /index, /generate without a
+    job) goes to the healthy backend with the fewest outstanding requests
+    plus active jobs, and fails over on errors. Calls for a job_id
+    (/status, /result, /generate, /clip, /job) go to the backend that owns
+    the job; owners of jobs created by another client are found by asking
+    every backend once."""
+
+    def __init__(self, api_url=None, max_attempts: int = API_RETRY_ATTEMPTS,
+                 health_interval: float = API_HEALTH_INTERVAL):
+        self.backends: List[Backend] = []
+        self._owners: Dict[str, Backend] = {}  # job_id / clip_id -> backend
+        self.max_attempts = max(1, max_attempts)
+        self.health_interval = health_interval
+        self._client = None
+        self._health_task = None
+        self.set_urls(api_url)
+
+    @property
+    def api_url(self) -> str:
+        return ",".join(b.url for b in self.backends)
+
+    def set_urls(self, api_url):
+        existing = {b.url: b for b in self.backends}
+        self.backends = [existing.get(url) or Backend(url) for url in parse_urls(api_url)]
+        self._owners = {key: b for key, b in self._owners.items() if b in self.backends}
+
+    def breaker_state(self) -> str:
+        """closed while any backend is usable; open when all of them fail fast."""
+        states = {b.breaker.state for b in self.backends}
+        for state in ("closed", "half_open"):
+            if state in states:
+                return state
+        return "open"
+
+    def _http(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the event loop that first uses it
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(API_TIMEOUT, connect=API_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=API_MAX_CONNECTIONS, max_keepalive_connections=API_MAX_KEEPALIVE,
+                                    keepalive_expiry=30),
+            )
+        if len(self.backends) > 1 and self._health_task is None and self.health_interval:
+            self._health_task = asyncio.get_running_loop().create_task(
+                self._health_loop(weakref.ref(self), self.health_interval))
+        return self._client
+
+    async def aclose(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    @staticmethod
+    async def _health_loop(ref, interval: float):
+        # Holds only a weak reference so an abandoned client is not kept alive by its own task
+        while True:
+            client = ref()
+            if client is None:
+                return
+            await client.check_health()
+            del client
+            await asyncio.sleep(interval)
+
+    async def _probe(self, backend: Backend):
+        try:
+            response = await self._http().get(f"{backend.url}/health", timeout=5)
+            ok = response.status_code == 200
+            if ok:
+                backend.active_jobs = int(response.json().get("active_jobs") or 0)
+        except Exception as e:
+            print(f"Health check failed for {backend.url}: {e}")
+            ok = False
+        backend.healthy = ok
+        backend.checked_at = time.monotonic()
+        if ok:
+            backend.breaker.record_success()
+        else:
+            backend.breaker.record_failure()
+
+    async def check_health(self) -> List[Dict[str, Any]]:
+        await asyncio.gather(*(self._probe(b) for b in self.backends))
+        return [b.describe() for b in self.backends]
+
+    def _select(self, exclude=()) -> Backend:
+        candidates = [b for b in self.backends if b.breaker.available]
+        if not candidates:
+            if any(b.breaker.state == "half_open" for b in self.backends):
+                raise CircuitOpenError(0, trial=True)
+            raise CircuitOpenError(min(b.breaker.cooldown - (time.monotonic() - b.breaker.opened_at) for b in self.backends))
+        candidates = [b for b in candidates if b not in exclude] or candidates
+        candidates = [b for b in candidates if b.healthy] or candidates
+        least = min(b.load for b in candidates)
+        return random.choice([b for b in candidates if b.load == least])
+
+    async def _owner(self, key: str) -> Backend:
+        backend = self._owners.get(key)
+        if backend is not None:
+            return backend
+        if len(self.backends) == 1:
+            return self.backends[0]
+
+        async def has_job(b):
+            try:
+                response = await self._http().get(f"{b.url}/status/{key}", timeout=10)
+                return response.status_code == 200
+            except Exception:
+                return False
+
+        found = await asyncio.gather(*(has_job(b) for b in self.backends))
+        for b, ok in zip(self.backends, found):
+            if ok:
+                self._owners[key] = b
+                return b
+        raise LookupError(f"Job {key} not found on any backend")
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), API_RETRY_MAX_DELAY)
+        return random.uniform(0, min(API_RETRY_MAX_DELAY, API_RETRY_BASE_DELAY * 2 ** attempt))
+
+    async def _request(self, method: str, path: str, idempotent: bool, backend: Optional[Backend] = None,
+                       attempts: Optional[int] = None, expensive: bool = False, **kwargs) -> Tuple[Backend, httpx.Response]:
+        """Send to `backend`, or to the least-loaded one (failing over between attempts) when it is None.
+
+        expensive=True (generation) is idempotent but never resent once the server may be working on it:
+        a read timeout or dropped response raises instead of queueing a duplicate generation on the GPU.
+        Connect errors and 502/503/504 are still retried."""
+        attempts = attempts or self.max_attempts
+        attempt = 0
+        tried = set()
+        while True:
+            target = backend or self._select(exclude=tried)
+            trial = target.breaker.check()
+            target.outstanding += 1
+            try:
+                response = await self._http().request(method, f"{target.url}{path}", **kwargs)
+            except httpx.TransportError as e:
+                target.breaker.record_failure()
+                tried.add(target)
+                # A failed connect never reached the server, so even a POST is safe to resend
+                unsent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if not (unsent or (idempotent and not expensive)) or attempt + 1 >= attempts:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                _rewind(kwargs)
+                attempt += 1
+                continue
+            except BaseException:
+                if trial:
+                    target.breaker.release()
+                raise
+            finally:
+                target.outstanding -= 1
+
+            if response.status_code in RETRY_STATUSES:
+                target.breaker.record_failure()
+                tried.add(target)
+                if idempotent and attempt + 1 < attempts:
+                    await asyncio.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                    attempt += 1
+                    continue
+            else:
+                target.breaker.record_success()
+            return target, response
+
+    @staticmethod
+    def _error(response: httpx.Response) -> str:
+        try:
+            return response.json().get("error", f"Status {response.status_code}")
+        except ValueError:
+            return f"Status {response.status_code}"
+
+    async def test_connection(self) -> bool:
+        # An explicit test probes every backend, and closes their breakers again on success
         try:
-            response = self.session.get(f"{self.api_url}/health", timeout=5)
-            return response.status_code == 200
+            return any(b["healthy"] for b in await self.check_health())
         except Exception as e:
             print(f"Connection test failed: {e}")
             return False
-    
-    def generate_response(self, prompt: str, context: str = "", max_tokens: int = 500, temperature: float = 0.7, job_id: Optional[str] = None) -> Dict[str, Any]:
+
+    async def generate_response(self, prompt: str, context: str = "", max_tokens: int = 500, temperature: float = 0.7,
+                                job_id: Optional[str] = None, history: str = "") -> Dict[str, Any]:
+        """history: conversation memory (see conversation.build_history), sent alongside job_id."""
+        payload = {
+            "prompt": prompt,
+            "context": context,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if job_id:
+            payload["job_id"] = job_id
+        if history:
+            payload["history"] = history
         try:
-            payload = {
-                "prompt": prompt,
-                "context": context,
-                "max_tokens": max_tokens,
-                "temperature": temperature
-            }
-            if job_id:
-                payload["job_id"] = job_id
-            
-            response = self.session.post(
-                f"{self.api_url}/generate",
-                json=payload,
-                timeout=API_TIMEOUT
-            )
-            
+            # The job's vector index lives on one backend; without a job any backend will do
+            owner = await self._owner(job_id) if job_id else None
+            # /generate changes no server state, but a timed-out generation is not queued twice
+            backend, response = await self._request("POST", "/generate", idempotent=True, expensive=True,
+                                                    backend=owner, json=payload)
             if response.status_code == 200:
                 data = response.json()
+                if data.get("clip_id"):
+                    self._owners[data["clip_id"]] = backend
                 return {
                     "success": True,
                     "response": data.get("text", ""),
@@ -43,14 +350,12 @@ class LLMClient:
                     "timestamp": data.get("timestamp"),
                     "metadata": data.get("metadata", {})
                 }
-            else:
-                return {
-                    "success": False,
-                    "error": f"API returned status {response.status_code}",
-                    "response": ""
-                }
-                
-        except requests.exceptions.Timeout:
+            return {
+                "success": False,
+                "error": self._error(response),
+                "response": ""
+            }
+        except httpx.TimeoutException:
             return {
                 "success": False,
                 "error": "Request timed out. The LLM is taking too long to respond.",
@@ -63,42 +368,113 @@ class LLMClient:
                 "response": ""
             }
 
+    async def summarize_batch(self, items: Sequence[Dict[str, str]], max_tokens: int = 200,
+                              temperature: float = 0.3, priority: Optional[str] = None) -> Dict[str, Any]:
+        """Summarize [{"id", "text", "instruction"}] in one /summarize call (one GPU batch).
+
+        priority="low" asks the backend to wait until no questions are being answered.
+        Backends without /summarize get one /generate call per item instead."""
+        payload = {"items": list(items), "max_tokens": max_tokens, "temperature": temperature}
+        if priority:
+            payload["priority"] = priority
+        try:
+            _, response = await self._request("POST", "/summarize", idempotent=True, expensive=True, json=payload)
+            if response.status_code == 200:
+                return {"success": True, "results": response.json()["results"]}
+            if response.status_code != 404:
+                return {"success": False, "error": self._error(response)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+        answers = await asyncio.gather(*(
+            self.generate_response(item.get("instruction", "Summarize this part of the lecture."), item["text"],
+                                   max_tokens, temperature)
+            for item in items))
+        failed = next((a for a in answers if not a["success"]), None)
+        if failed:
+            return {"success": False, "error": failed["error"]}
+        return {"success": True, "results": [{"id": item.get("id"), "text": a["response"]} for item, a in zip(items, answers)]}
+
+    async def summarize_many(self, items: Sequence[Dict[str, str]], max_tokens: int = 200, temperature: float = 0.3,
+                             priority: Optional[str] = None, batch_size: int = SUMMARY_BATCH_SIZE) -> Dict[str, Any]:
+        """Split items into batches and send them concurrently; with several backends they spread across the pool.
+
+        Low-priority batches go one at a time so background work never holds more than one slot."""
+        items = list(items)
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        if priority == "low":
+            replies = []
+            for b in batches:
+                replies.append(await self.summarize_batch(b, max_tokens, temperature, priority))
+                if not replies[-1]["success"]:
+                    break
+        else:
+            replies = await asyncio.gather(*(self.summarize_batch(b, max_tokens, temperature, priority) for b in batches))
+        failed = next((r for r in replies if not r["success"]), None)
+        if failed:
+            return failed
+        return {"success": True, "results": [r for reply in replies for r in reply["results"]]}
+
     def get_clip_url(self, clip_id: str) -> str:
-        return f"{self.api_url}/clip/{clip_id}"
-    
-    def summarize_lecture(self, transcript: str, max_length: int = 300) -> Dict[str, Any]:
-        prompt = f"Summarize the following lecture in about {max_length} words:\n\n{transcript}"
-        return self.generate_response(prompt, context="", max_tokens=max_length * 2)
-    
-    def explain_topic(self, topic: str, context: str) -> Dict[str, Any]:
-        prompt = f"Based on the lecture content, explain the topic: {topic}"
-        return self.generate_response(prompt, context=context)
-    
-    def answer_question(self, question: str, context: str) -> Dict[str, Any]:
-        prompt = f"Answer the following question based on the lecture content: {question}"
-        return self.generate_response(prompt, context=context)
-    
-    def update_api_url(self, new_url: str):
-        self.api_url = new_url
+        # Clips from a previous session have no known owner; the first backend is the best guess
+        backend = self._owners.get(clip_id) or self.backends[0]
+        return f"{backend.url}/clip/{clip_id}"
+
+    def _claim(self, backend: Backend, response: httpx.Response) -> Dict[str, Any]:
+        if response.status_code != 200:
+            return {"success": False, "error": self._error(response)}
+        job_id = response.json().get("job_id")
+        if job_id:
+            self._owners[job_id] = backend
+            # Counted until the next health check reports the real number
+            backend.active_jobs += 1
+        return {"success": True, "job_id": job_id}
 
-    def upload_video(self, video_path: str) -> Dict[str, Any]:
+    async def upload_video(self, video_path: str, profile: bool = False) -> Dict[str, Any]:
         try:
             filename = video_path.split("/")[-1].split("\\")[-1]
             with open(video_path, "rb") as f:
-                response = self.session.post(
-                    f"{self.api_url}/upload",
+                backend, response = await self._request(
+                    "POST", "/upload", idempotent=False,
                     files={"video": (filename, f)},
-                    timeout=UPLOAD_TIMEOUT
+                    data={"profile": "1"} if profile else None,
+                    timeout=httpx.Timeout(UPLOAD_TIMEOUT, connect=API_CONNECT_TIMEOUT),
                 )
-            if response.status_code == 200:
-                return {"success": True, "job_id": response.json().get("job_id")}
-            return {"success": False, "error": response.json().get("error", f"Status {response.status_code}")}
+            return self._claim(backend, response)
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_job_status(self, job_id: str) -> Dict[str, Any]:
+    async def index_lecture(self, transcripts: Sequence[Any], frames: Sequence[Any],
+                            duration: Optional[float] = None) -> Dict[str, Any]:
+        """Push already-extracted Transcript/Frame rows to /index so the backend only chunks and embeds."""
         try:
-            response = self.session.get(f"{self.api_url}/status/{job_id}", timeout=10)
+            payload = {
+                "transcript": [
+                    {"start": t.timestamp_start, "end": t.timestamp_end, "text": t.text or "", "confidence": t.confidence or 0.0}
+                    for t in transcripts
+                ],
+                "frames": [
+                    {
+                        "timestamp": f.timestamp,
+                        "printed_text": f.printed_text or "",
+                        "handwritten_text": f.handwritten_text or "",
+                        "ocr_confidence": f.ocr_confidence or 0.0,
+                    }
+                    for f in frames
+                    if (f.printed_text or f.handwritten_text)
+                ],
+            }
+            if duration:
+                payload["duration"] = duration
+            backend, response = await self._request("POST", "/index", idempotent=False, json=payload)
+            return self._claim(backend, response)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def get_job_status(self, job_id: str) -> Dict[str, Any]:
+        try:
+            owner = await self._owner(job_id)
+            _, response = await self._request("GET", f"/status/{job_id}", idempotent=True, backend=owner, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 return {"success": True, "status": data["status"], "progress": data["progress"], "message": data["message"], "error": data.get("error")}
@@ -106,20 +482,207 @@ class LLMClient:
         except Exception as e:
             return {"success": False, "status": "error", "error": str(e)}
 
-    def get_job_result(self, job_id: str) -> Dict[str, Any]:
+    async def get_job_statuses(self, job_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Status of several jobs at once, over the shared connection pool."""
+        results = await asyncio.gather(*(self.get_job_status(job_id) for job_id in job_ids))
+        return dict(zip(job_ids, results))
+
+    async def iter_job_events(self, job_id: str, poll_interval: float = 2.0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield get_job_status-shaped dicts as the job progresses until it completes or fails.
+
+        Uses the /status/<job_id>/stream SSE endpoint and falls back to polling
+        for backends that do not have it."""
+        while True:
+            owner, trial = None, False
+            try:
+                owner = await self._owner(job_id)
+                trial = owner.breaker.check()
+                async with self._http().stream(
+                    "GET", f"{owner.url}/status/{job_id}/stream",
+                    timeout=httpx.Timeout(API_TIMEOUT, connect=API_CONNECT_TIMEOUT),
+                    headers={"Accept": "text/event-stream"},
+                ) as response:
+                    if response.status_code == 200 and response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                        owner.breaker.record_success()
+                        trial = False
+                        async for line in response.aiter_lines():
+                            if not line or not line.startswith("data:"):
+                                continue
+                            data = json.loads(line[len("data:"):].strip())
+                            yield {"success": True, **data}
+                            if data.get("status") in ("completed", "failed"):
+                                return
+                        # Stream closed without a terminal event (server-side timeout) — resume
+                        continue
+                    body = (await response.aread()).decode("utf-8", "replace")
+                    if response.status_code in RETRY_STATUSES:
+                        owner.breaker.record_failure()
+                    else:
+                        owner.breaker.record_success()
+            except Exception as e:
+                if isinstance(e, httpx.TransportError):
+                    owner.breaker.record_failure()
+                elif trial:
+                    owner.breaker.release()
+                yield {"success": False, "status": "error", "error": str(e)}
+                return
+            except BaseException:
+                # Cancelled or closed by the consumer: give up a trial this call may hold
+                if trial:
+                    owner.breaker.release()
+                raise
+
+            if response.status_code != 404 or "Job not found" in body:
+                yield {"success": False, "status": "unknown", "error": f"Status {response.status_code}"}
+                return
+            break
+
+        # Older backend without the stream route
+        while True:
+            status = await self.get_job_status(job_id)
+            yield status
+            if not status.get("success") or status.get("status") in ("completed", "failed"):
+                return
+            await asyncio.sleep(poll_interval)
+
+    async def get_job_result(self, job_id: str) -> Dict[str, Any]:
         try:
-            response = self.session.get(f"{self.api_url}/result/{job_id}", timeout=60)
+            owner = await self._owner(job_id)
+            _, response = await self._request("GET", f"/result/{job_id}", idempotent=True, backend=owner, timeout=60)
             if response.status_code == 200:
                 return {"success": True, "data": response.json()}
-            return {"success": False, "error": response.json().get("error", f"Status {response.status_code}")}
+            return {"success": False, "error": self._error(response)}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def delete_job(self, job_id: str) -> Dict[str, Any]:
+    async def get_job_results(self, job_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        results = await asyncio.gather(*(self.get_job_result(job_id) for job_id in job_ids))
+        return dict(zip(job_ids, results))
+
+    async def delete_job(self, job_id: str) -> Dict[str, Any]:
         try:
-            response = self.session.delete(f"{self.api_url}/job/{job_id}", timeout=10)
+            owner = await self._owner(job_id)
+            _, response = await self._request("DELETE", f"/job/{job_id}", idempotent=True, backend=owner, timeout=10)
             if response.status_code == 200:
+                self._owners.pop(job_id, None)
                 return {"success": True}
-            return {"success": False, "error": response.json().get("error", f"Status {response.status_code}")}
+            return {"success": False, "error": self._error(response)}
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+
+class _LoopThread:
+    """One event loop on a daemon thread that runs every sync LLMClient call."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="llm-client-loop", daemon=True).start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> _LoopThread:
+    global _loop_thread
+    with _loop_lock:
+        if _loop_thread is None:
+            _loop_thread = _LoopThread()
+        return _loop_thread
+
+
+class LLMClient:
+    """Blocking wrapper around AsyncLLMClient for Streamlit and worker threads.
+
+    Calls run on a shared background event loop, so one instance can be used
+    from several threads and they all share its connection pool, breakers and
+    job-to-backend map."""
+
+    def __init__(self, api_url: Optional[str] = None):
+        self._loop = _background_loop()
+        self.aio = AsyncLLMClient(api_url)
+
+    def _run(self, coro):
+        return self._loop.run(coro)
+
+    @property
+    def api_url(self) -> str:
+        return self.aio.api_url
+
+    def test_connection(self) -> bool:
+        return self._run(self.aio.test_connection())
+
+    def generate_response(self, prompt: str, context: str = "", max_tokens: int = 500, temperature: float = 0.7,
+                          job_id: Optional[str] = None, history: str = "") -> Dict[str, Any]:
+        return self._run(self.aio.generate_response(prompt, context, max_tokens, temperature, job_id, history))
+
+    def get_clip_url(self, clip_id: str) -> str:
+        return self.aio.get_clip_url(clip_id)
+
+    def summarize_lecture(self, transcript: str, max_length: int = 300) -> Dict[str, Any]:
+        """Map-reduce summary of arbitrarily long text; see summarizer.py for the cached, per-lecture version."""
+        from summarizer import summarize_text
+        return summarize_text(self, transcript, max_length)
+
+    def summarize_many(self, items: Sequence[Dict[str, str]], max_tokens: int = 200, temperature: float = 0.3,
+                       priority: Optional[str] = None) -> Dict[str, Any]:
+        return self._run(self.aio.summarize_many(items, max_tokens, temperature, priority))
+
+    def explain_topic(self, topic: str, context: str) -> Dict[str, Any]:
+        prompt = f"Based on the lecture content, explain the topic: {topic}"
+        return self.generate_response(prompt, context=context)
+
+    def answer_question(self, question: str, context: str) -> Dict[str, Any]:
+        prompt = f"Answer the following question based on the lecture content: {question}"
+        return self.generate_response(prompt, context=context)
+
+    def update_api_url(self, new_url: str):
+        """Accepts one URL or a comma-separated list; backends that stay keep their state."""
+        async def apply():
+            self.aio.set_urls(new_url)
+        if parse_urls(new_url) != [b.url for b in self.aio.backends]:
+            self._run(apply())
+
+    def upload_video(self, video_path: str, profile: bool = False) -> Dict[str, Any]:
+        return self._run(self.aio.upload_video(video_path, profile))
+
+    def index_lecture(self, transcripts: Sequence[Any], frames: Sequence[Any], duration: Optional[float] = None) -> Dict[str, Any]:
+        return self._run(self.aio.index_lecture(transcripts, frames, duration))
+
+    def get_job_status(self, job_id: str) -> Dict[str, Any]:
+        return self._run(self.aio.get_job_status(job_id))
+
+    def get_job_statuses(self, job_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        return self._run(self.aio.get_job_statuses(list(job_ids)))
+
+    def iter_job_events(self, job_id: str, poll_interval: float = 2.0) -> Iterator[Dict[str, Any]]:
+        events = self.aio.iter_job_events(job_id, poll_interval)
+        try:
+            while True:
+                try:
+                    yield self._run(events.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(events.aclose())
+
+    def get_job_result(self, job_id: str) -> Dict[str, Any]:
+        return self._run(self.aio.get_job_result(job_id))
+
+    def get_job_results(self, job_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        return self._run(self.aio.get_job_results(list(job_ids)))
+
+    def delete_job(self, job_id: str) -> Dict[str, Any]:
+        return self._run(self.aio.delete_job(job_id))
+
+    def breaker_state(self) -> str:
+        return self.aio.breaker_state()
+
+    def check_health(self) -> List[Dict[str, Any]]:
+        return self._run(self.aio.check_health())
+
+    def backend_status(self) -> List[Dict[str, Any]]:
+        return [b.describe() for b in self.aio.backends]
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Load generator for LLMClient against a backend (the fake one by default).
+Simulates N concurrent users running the upload -> wait -> result -> ask flow
+and reports p50/p95/p99 latency and throughput per operation.
+
+Usage:
+  python loadtest.py --users 20 --iterations 3                 # starts fake_backend in-process
+  python loadtest.py --url http://localhost:8000 --users 50    # existing backend
+  python loadtest.py --users 40 --backends 4                   # spread over 4 fake backends
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_client import LLMClient
+
+QUESTIONS = [
+    "What is backpropagation?",
+    "Explain that again more simply.",
+    "What was on the slide about gradient descent?",
+]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, op: str, seconds: float, ok: bool):
+        with self.lock:
+            self.samples.setdefault(op, []).append(seconds)
+            if not ok:
+                self.errors[op] = self.errors.get(op, 0) + 1
+
+    def timed(self, op: str, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        ok = bool(result.get("success")) if isinstance(result, dict) else bool(result)
+        self.record(op, time.perf_counter() - t0, ok)
+        return result
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def simulate_user(api_url: str, video_path: str, recorder: LatencyRecorder, iterations: int,
+                  questions: int, poll_interval: float, use_stream: bool):
+    client = LLMClient(api_url)
+    for _ in range(iterations):
+        recorder.timed("health", client.test_connection)
+        upload = recorder.timed("upload", client.upload_video, video_path)
+        if not upload.get("success"):
+            continue
+        job_id = upload["job_id"]
+
+        t0 = time.perf_counter()
+        final = None
+        if use_stream:
+            for event in client.iter_job_events(job_id, poll_interval):
+                final = event
+        else:
+            while True:
+                final = recorder.timed("status", client.get_job_status, job_id)
+                if not final.get("success") or final.get("status") in ("completed", "failed"):
+                    break
+                time.sleep(poll_interval)
+        recorder.record("wait_for_job", time.perf_counter() - t0, bool(final and final.get("status") == "completed"))
+        if not final or final.get("status") != "completed":
+            continue
+
+        recorder.timed("result", client.get_job_result, job_id)
+        for i in range(questions):
+            recorder.timed("generate", client.generate_response, QUESTIONS[i % len(QUESTIONS)],
+                           max_tokens=200, temperature=0.2, job_id=job_id)
+        recorder.timed("delete", client.delete_job, job_id)
+
+
+def run_load_test(api_url: str, users: int, iterations: int, questions: int,
+                  poll_interval: float, use_stream: bool, video_kb: int):
+    fd, video_path = tempfile.mkstemp(suffix=".mp4")
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"\x00\x00\x00\x18ftypmp42" + os.urandom(video_kb * 1024))
+
+    recorder = LatencyRecorder()
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=users) as pool:
+            futures = [pool.submit(simulate_user, api_url, video_path, recorder, iterations,
+                                   questions, poll_interval, use_stream) for _ in range(users)]
+            for future in futures:
+                future.result()
+    finally:
+        os.remove(video_path)
+    wall = time.perf_counter() - started
+
+    report = {"api_url": api_url, "users": users, "iterations": iterations, "wall_seconds": round(wall, 3), "operations": {}}
+    for op, values in recorder.samples.items():
+        report["operations"][op] = {
+            "count": len(values),
+            "errors": recorder.errors.get(op, 0),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "mean_ms": round(statistics.mean(values) * 1000, 1),
+            "throughput_rps": round(len(values) / wall, 2) if wall > 0 else 0.0,
+        }
+    report["total_requests"] = sum(o["count"] for op, o in report["operations"].items() if op != "wait_for_job")
+    report["throughput_rps"] = round(report["total_requests"] / wall, 2) if wall > 0 else 0.0
+    return report
+
+
+def print_report(report: dict):
+    print(f"\n{'Operation':<14} {'Count':>6} {'Errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Req/s':>8}")
+    print("=" * 68)
+    for op, o in sorted(report["operations"].items()):
+        print(f"{op:<14} {o['count']:>6} {o['errors']:>7} {o['p50_ms']:>9.1f} {o['p95_ms']:>9.1f} {o['p99_ms']:>9.1f} {o['throughput_rps']:>8.2f}")
+    print("=" * 68)
+    print(f"{report['users']} users, {report['total_requests']} requests in {report['wall_seconds']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test LLMClient against a backend')
+    parser.add_argument('--url', help='Backend URL (default: start fake_backend in-process)')
+    parser.add_argument('-u', '--users', type=int, default=10, help='Concurrent simulated users')
+    parser.add_argument('-i', '--iterations', type=int, default=1, help='Upload/ask cycles per user')
+    parser.add_argument('-q', '--questions', type=int, default=3, help='Questions per cycle')
+    parser.add_argument('--poll-interval', type=float, default=2.0)
+    parser.add_argument('--poll', action='store_true', help='Poll /status instead of using the event stream')
+    parser.add_argument('--video-kb', type=int, default=256, help='Size of the dummy upload')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Fake backend: base latency')
+    parser.add_argument('--jitter-ms', type=float, default=20.0, help='Fake backend: latency jitter')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fake backend: injected 502 rate')
+    parser.add_argument('--job-seconds', type=float, default=3.0, help='Fake backend: upload job duration')
+    parser.add_argument('--backends', type=int, default=1, help='Fake backend: number of instances to spread load across')
+    parser.add_argument('-o', '--output', help='Write the report as JSON')
+    args = parser.parse_args()
+
+    servers = []
+    api_url = args.url
+    if not api_url:
+        from fake_backend import FakeBackendConfig, start_in_background
+        urls = []
+        for _ in range(max(1, args.backends)):
+            server, url = start_in_background(FakeBackendConfig(
+                args.latency_ms, args.jitter_ms, args.failure_rate, args.job_seconds))
+            servers.append(server)
+            urls.append(url)
+        # LLMClient takes several backends as a comma-separated list
+        api_url = ",".join(urls)
+        print(f"Started fake backend at {api_url}")
+
+    try:
+        report = run_load_test(api_url, args.users, args.iterations, args.questions,
+                               args.poll_interval, not args.poll, args.video_kb)
+    finally:
+        for server in servers:
+            server.shutdown()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,13 +5,21 @@ Provides commands for database management, cleanup, etc.
 """
 
 import argparse
+import json
+import os
 import sys
 from pathlib import Path
-from datetime import datetime
 from sqlalchemy.orm import Session
 
-from database import SessionLocal, Lecture, Transcript, Frame, Query, init_database
-from config import UPLOAD_DIR, PROCESSED_DIR, DB_DIR
+from database import engine, SessionLocal, Lecture, Transcript, Frame, Query, ProcessingJob, JobMetric, init_database
+from config import PROCESSED_DIR, EXPORT_WORKERS
+from job_queue import enqueue_lecture, enqueue_summary, request_cancel
+from frame_store import lecture_frame_paths, release_frames, migrate_lecture_frames, disk_usage
+from retention import run_gc, archive_lecture, restore_lecture
+from summarizer import build_digest
+from llm_client import LLMClient
+from exporter import FILE_NAMES, export_lectures, parse_formats, tarball_mode, write_lecture
+from storage import ARTIFACTS, archive_file, refresh_lecture, refresh_sharing_lectures, lecture_storage, storage_totals, rescan
 
 def list_lectures():
     """List all lectures in database"""
@@ -61,6 +69,15 @@ def lecture_info(lecture_id: int):
     print(f"\nTranscripts:     {transcript_count} segments")
     print(f"Frames:          {frame_count} frames")
     print(f"Queries:         {query_count} questions asked")
+    
+    storage = lecture_storage(db, lecture_id)
+    print(f"\nStorage:")
+    for artifact in ARTIFACTS:
+        files, size = storage.get(artifact, (0, 0))
+        print(f"  {artifact.capitalize() + ':':<14} {_fmt_bytes(size):>10}  ({files} files)")
+    print(f"  {'Total:':<14} {_fmt_bytes(sum(b for _, b in storage.values())):>10}")
+    if lecture.archived_at:
+        print(f"  Archived:      {lecture.archived_at}")
     print("=" * 60)
     
     db.close()
@@ -90,9 +107,17 @@ def delete_lecture(lecture_id: int, confirm: bool = False):
         shutil.rmtree(processed_dir)
         print(f"Deleted processed files: {processed_dir}")
     
+    # Stop any background processing before the rows disappear
+    request_cancel(db, lecture_id)
+    
     # Delete from database (cascades to transcripts, frames, queries)
+    frame_paths = lecture_frame_paths(db, lecture_id)
     db.delete(lecture)
     db.commit()
+    # Store images shared with other lectures are kept
+    release_frames(db, frame_paths)
+    archive_file(lecture_id).unlink(missing_ok=True)
+    refresh_sharing_lectures(db, frame_paths)
     print(f"Deleted lecture: {lecture.title} (ID: {lecture_id})")
     
     db.close()
@@ -123,8 +148,8 @@ def cleanup_old():
     
     db.close()
 
-def export_transcript(lecture_id: int, output_file: str = None):
-    """Export lecture transcript to text file"""
+def export_transcript(lecture_id: int, output_file: str = None, fmt: str = None):
+    """Export one lecture to a single file (txt, srt, vtt, jsonl or parquet, from the extension by default)"""
     db = SessionLocal()
     lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
     
@@ -133,37 +158,103 @@ def export_transcript(lecture_id: int, output_file: str = None):
         db.close()
         return
     
-    transcripts = db.query(Transcript).filter(
-        Transcript.lecture_id == lecture_id
-    ).order_by(Transcript.timestamp_start).all()
-    
-    if not transcripts:
+    if not db.query(Transcript.id).filter(Transcript.lecture_id == lecture_id).first():
         print(f"No transcript found for lecture ID {lecture_id}")
         db.close()
         return
     
+    fmt = fmt or (Path(output_file).suffix.lstrip('.').lower() if output_file else 'txt')
+    try:
+        fmt = parse_formats(fmt)[0]
+    except ValueError as e:
+        print(e)
+        db.close()
+        return
+    
     # Generate filename if not provided
     if not output_file:
         safe_title = "".join(c for c in lecture.title if c.isalnum() or c in (' ', '-', '_')).strip()
-        output_file = f"{safe_title}_transcript.txt"
-    
-    # Write transcript
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(f"Lecture: {lecture.title}\n")
-        f.write(f"Duration: {lecture.duration:.1f}s\n")
-        f.write(f"Exported: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write("=" * 80 + "\n\n")
-        
-        for transcript in transcripts:
-            mins = int(transcript.timestamp_start // 60)
-            secs = int(transcript.timestamp_start % 60)
-            f.write(f"[{mins:02d}:{secs:02d}] {transcript.text}\n")
+        output_file = f"{safe_title}_{FILE_NAMES[fmt]}"
     
-    print(f"Transcript exported to: {output_file}")
+    result = write_lecture(db, lecture, {fmt: Path(output_file)})
+    print(f"Transcript exported to: {output_file} ({result['segments']} segments, {result['frames']} OCR frames)")
     db.close()
 
-def stats():
+def export(lecture_ids: list, all_lectures: bool = False, output: str = None, formats: str = None, workers: int = EXPORT_WORKERS):
+    """Export one lecture to a file, or many lectures in parallel to a directory or a .tar.gz/.tar.xz"""
+    single_file = (len(lecture_ids) == 1 and not all_lectures and not (output and tarball_mode(output))
+                   and (not output or Path(output).suffix.lstrip('.').lower() in FILE_NAMES))
+    if single_file:
+        fmt = formats.split(',')[0] if formats else None
+        export_transcript(lecture_ids[0], output, fmt)
+        return
+    
+    if not output:
+        print("Bulk export needs -o: a directory, or an archive path ending in .tar.gz, .tgz or .tar.xz")
+        return
+    try:
+        formats = parse_formats(formats or 'srt,vtt,jsonl')
+    except ValueError as e:
+        print(e)
+        return
+    
+    if all_lectures:
+        db = SessionLocal()
+        lecture_ids = [lid for (lid,) in db.query(Lecture.id).order_by(Lecture.id)]
+        db.close()
+    if not lecture_ids:
+        print("No lectures to export.")
+        return
+    
+    print(f"Exporting {len(lecture_ids)} lecture(s) as {', '.join(formats)} to {output} with {workers} workers...")
+    def progress(result):
+        if 'error' in result:
+            print(f"  #{result['lecture_id']}: failed ({result['error']})")
+        else:
+            print(f"  #{result['lecture_id']}: {result['segments']} segments, {result['frames']} OCR frames")
+    
+    summary = export_lectures(lecture_ids, output, formats, max(1, workers), progress)
+    print(f"\nExported {summary['lectures']} lecture(s): {summary['segments']} segments, "
+          f"{summary['frames']} OCR frames, {summary['bytes'] / (1024 * 1024):.1f} MB")
+    if summary['failed']:
+        print(f"{len(summary['failed'])} lecture(s) failed")
+
+def summarize(lecture_id: int, window: float = None, api_url: str = None, queue: bool = False):
+    """Build and save a lecture's summary and chapters through the backend; unchanged windows come from the cache"""
+    db = SessionLocal()
+    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    
+    if not lecture:
+        print(f"Lecture with ID {lecture_id} not found.")
+        db.close()
+        return
+    
+    if queue:
+        job = enqueue_summary(db, lecture_id, api_url)
+        print(f"Summary job {job.id} for '{lecture.title}' is {job.status}. Start it with: python worker.py")
+        db.close()
+        return
+    
+    client = LLMClient(api_url)
+    print(f"Summarizing '{lecture.title}' via {client.api_url}...")
+    kwargs = {"window_seconds": window} if window else {}
+    result = build_digest(db, lecture_id, client, priority=None, **kwargs)
+    db.close()
+    
+    if not result["success"]:
+        print(f"Summarization failed: {result['error']}")
+        return
+    print(f"\n{result['summary']}\n")
+    for ch in result["chapters"]:
+        print(f"  {int(ch['start'] // 60):3d}:{int(ch['start'] % 60):02d}  {ch['title']}")
+    print(f"\n{len(result['chapters'])} chapters, {result['llm_calls']} LLM calls, {result['cached']} from cache")
+
+def stats(rescan_storage: bool = False, workers: int = 8):
     """Show system statistics"""
+    if rescan_storage:
+        print(f"Rescanning storage with {workers} threads...")
+        result = rescan(workers)
+        print(f"Ledger rebuilt: {result['files']} files across {result['lectures']} lectures")
     db = SessionLocal()
     
     total_lectures = db.query(Lecture).count()
@@ -188,19 +279,271 @@ def stats():
     print(f"  Frames:      {total_frames} frames")
     print(f"  Queries:     {total_queries} questions")
     
-    # Storage info
-    upload_size = sum(f.stat().st_size for f in UPLOAD_DIR.rglob('*') if f.is_file()) / (1024**3)
-    processed_size = sum(f.stat().st_size for f in PROCESSED_DIR.rglob('*') if f.is_file()) / (1024**3)
+    # Storage info comes from the ledger; walking processed/ gets slow with many lectures
+    totals = storage_totals(db)
+    db_size = disk_usage(f"{engine.url.database}{suffix}" for suffix in ("", "-wal", "-shm"))
     
     print(f"\nStorage:")
-    print(f"  Uploads:     {upload_size:.2f} GB")
-    print(f"  Processed:   {processed_size:.2f} GB")
-    print(f"  Total:       {upload_size + processed_size:.2f} GB")
+    if not totals["updated_at"]:
+        print("  Ledger is empty - run `python manage.py stats --rescan` to build it.")
+    for artifact in ARTIFACTS:
+        files, size = totals["lectures"].get(artifact, (0, 0))
+        print(f"  {artifact.capitalize() + ':':<13}{_fmt_bytes(size):>10}  ({files} files)")
+    orphan_files = sum(f for f, _ in totals["unreferenced"].values())
+    orphan_bytes = sum(b for _, b in totals["unreferenced"].values())
+    if orphan_files:
+        print(f"  {'Unreferenced:':<13}{_fmt_bytes(orphan_bytes):>10}  ({orphan_files} files, see `manage.py gc`)")
+    print(f"  {'Database:':<13}{_fmt_bytes(db_size):>10}")
+    total = sum(b for _, b in totals["lectures"].values()) + orphan_bytes + db_size
+    print(f"  {'Total:':<13}{_fmt_bytes(total):>10}")
+    if totals["updated_at"]:
+        print(f"  (ledger last updated {totals['updated_at'].strftime('%Y-%m-%d %H:%M')} UTC)")
     
     print("=" * 50)
     
     db.close()
 
+def enqueue(lecture_id: int, profile: bool = False):
+    """Queue a lecture for the background worker"""
+    db = SessionLocal()
+    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    
+    if not lecture:
+        print(f"Lecture with ID {lecture_id} not found.")
+        db.close()
+        return
+    
+    if not Path(lecture.video_path).exists():
+        print(f"Video file not found: {lecture.video_path}")
+        db.close()
+        return
+    
+    job = enqueue_lecture(db, lecture_id, lecture.video_path, profile)
+    print(f"Lecture {lecture_id} queued as job {job.id} ({job.status}){' with profiling' if job.profile else ''}.")
+    print("Make sure a worker is running: python worker.py")
+    db.close()
+
+def cancel(lecture_id: int):
+    """Cancel queued or running processing for a lecture"""
+    db = SessionLocal()
+    if request_cancel(db, lecture_id):
+        print(f"Cancellation requested for lecture {lecture_id}.")
+    else:
+        print(f"No active processing job for lecture {lecture_id}.")
+    db.close()
+
+def show_queue():
+    """Show queued, running and recently finished processing jobs"""
+    db = SessionLocal()
+    jobs = db.query(ProcessingJob).order_by(ProcessingJob.id.desc()).limit(20).all()
+    
+    if not jobs:
+        print("Processing queue is empty.")
+        db.close()
+        return
+    
+    print(f"\n{'Job':<6} {'Lecture':<8} {'Kind':<8} {'Status':<10} {'Progress':<9} {'Message':<40}")
+    print("=" * 84)
+    for job in jobs:
+        flag = " (cancel requested)" if job.cancel_requested and job.status == 'running' else ""
+        print(f"{job.id:<6} {job.lecture_id:<8} {job.kind or 'process':<8} {job.status:<10} "
+              f"{str(job.progress or 0) + '%':<9} {(job.message or '')[:39]:<40}{flag}")
+    db.close()
+
+def perf_report(lecture_id: int, all_runs: bool = False):
+    """Show per-stage timings and counters recorded for a lecture"""
+    db = SessionLocal()
+    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    
+    if not lecture:
+        print(f"Lecture with ID {lecture_id} not found.")
+        db.close()
+        return
+    
+    rows = db.query(JobMetric).filter(JobMetric.lecture_id == lecture_id).order_by(JobMetric.recorded_at.desc()).all()
+    db.close()
+    if not rows:
+        print(f"No metrics recorded for lecture {lecture_id}.")
+        return
+    
+    runs = {}
+    for row in rows:
+        runs.setdefault(row.run_id, []).append(row)
+    # Newest run per source (local / backend) unless --all
+    shown, sources = [], set()
+    for run_id, run_rows in runs.items():
+        if all_runs or run_rows[0].source not in sources:
+            shown.append((run_id, run_rows))
+            sources.add(run_rows[0].source)
+    
+    print(f"\nPerformance: {lecture.title} (ID: {lecture_id}, duration {lecture.duration or 0:.1f}s)")
+    for run_id, run_rows in shown:
+        spans = sorted((r for r in run_rows if r.kind == 'span'), key=lambda r: -r.value)
+        counters = {r.name: r.value for r in run_rows if r.kind == 'counter'}
+        total = next((r.value for r in spans if r.name == 'total'), sum(r.value for r in spans))
+        
+        print("\n" + "=" * 64)
+        print(f"Run {run_id} ({run_rows[0].source}) recorded {run_rows[0].recorded_at.strftime('%Y-%m-%d %H:%M')}")
+        print("=" * 64)
+        print(f"{'Stage':<22} {'Seconds':>10} {'Calls':>8} {'Avg ms':>10} {'% total':>9}")
+        for r in spans:
+            avg_ms = 1000 * r.value / r.count if r.count else 0.0
+            share = 100 * r.value / total if total and r.name != 'total' else 100.0
+            print(f"{r.name:<22} {r.value:>10.2f} {r.count:>8} {avg_ms:>10.1f} {share:>8.1f}%")
+        if counters:
+            print("\nCounters:")
+            for name, value in sorted(counters.items()):
+                print(f"  {name:<24} {value:g}")
+        if total and lecture.duration:
+            print(f"\nRealtime factor: {lecture.duration / total:.2f}x")
+    
+    if not all_runs and len(runs) > len(shown):
+        print(f"\n{len(runs) - len(shown)} older run(s) hidden; use --all to show them.")
+
+def show_profile(lecture_id: int, limit: int = 20, sort: str = 'cumulative', label: str = None):
+    """List captured profiles for a lecture and show the hottest functions"""
+    from profiling import top_functions
+    import pstats
+    
+    profile_dir = PROCESSED_DIR / f"lecture_{lecture_id}" / "profile"
+    summaries = sorted(profile_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True) if profile_dir.exists() else []
+    if not summaries:
+        print(f"No profiles for lecture {lecture_id}.")
+        print("Capture one with: python manage.py enqueue <id> --profile  (or set LECTURE_PROFILE=1)")
+        return
+    
+    print(f"\n{'Profile':<36} {'Wall s':>9} {'Peak RSS MB':>12} {'GPU MB':>8}")
+    print("=" * 68)
+    loaded = []
+    for path in summaries:
+        with open(path, encoding='utf-8') as f:
+            summary = json.load(f)
+        loaded.append((path, summary))
+        gpu = f"{summary['gpu_peak_mb']:.0f}" if summary.get('gpu_peak_mb') is not None else "-"
+        rss = f"{summary['peak_rss_mb']:.0f}" if summary.get('peak_rss_mb') is not None else "-"
+        print(f"{path.stem[:35]:<36} {summary.get('wall_seconds', 0):>9.1f} {rss:>12} {gpu:>8}")
+    
+    path, summary = next(((p, s) for p, s in loaded if p.stem == label), loaded[0]) if label else loaded[0]
+    prof_path = path.with_suffix('.prof')
+    if prof_path.exists():
+        rows = top_functions(pstats.Stats(str(prof_path)), limit, sort)
+    else:
+        # Backend profiles only carry the summary
+        key = 'tottime' if sort == 'tottime' else 'cumtime'
+        rows = sorted(summary.get('top_functions', []), key=lambda r: -r[key])[:limit]
+    
+    print(f"\nTop {len(rows)} functions in {path.stem} (by {sort})")
+    print(f"{'cumtime':>9} {'tottime':>9} {'calls':>9}  function")
+    print("-" * 80)
+    for r in rows:
+        location = f"{Path(r['file']).name}:{r['line']}" if r['line'] else r['file']
+        print(f"{r['cumtime']:>9.2f} {r['tottime']:>9.2f} {r['ncalls']:>9}  {r['function']} ({location})")
+    if prof_path.exists():
+        print(f"\nFull profile: {prof_path}  (open with snakeviz or python -m pstats)")
+
+def migrate_frames(lecture_id: int = None):
+    """Move legacy per-lecture frame JPEGs into the content-addressed frame store"""
+    db = SessionLocal()
+    if lecture_id:
+        ids = [lecture_id]
+    else:
+        ids = [lid for (lid,) in db.query(Lecture.id).order_by(Lecture.id)
+               if (PROCESSED_DIR / f"lecture_{lid}" / "frames").exists()]
+    if not ids:
+        print("No lectures with legacy frame directories.")
+        db.close()
+        return
+    
+    def per_hour(size, hours):
+        return f"{size / 2**20 / hours:.1f}" if hours else "-"
+    
+    print(f"\n{'ID':<5} {'Frames':>7} {'Unique':>7} {'Before MB':>10} {'After MB':>9} {'MB/h before':>12} {'MB/h after':>11}")
+    print("=" * 68)
+    before, hours, all_paths = 0, 0.0, set()
+    for lid in ids:
+        r = migrate_lecture_frames(db, lid)
+        refresh_lecture(db, lid)
+        before += r["bytes_before"]
+        hours += r["hours"]
+        all_paths |= lecture_frame_paths(db, lid)
+        missing = f"  ({r['missing']} missing)" if r["missing"] else ""
+        print(f"{lid:<5} {r['frames']:>7} {r['unique_images']:>7} {r['bytes_before'] / 2**20:>10.1f} "
+              f"{r['bytes_after'] / 2**20:>9.1f} {per_hour(r['bytes_before'], r['hours']):>12} "
+              f"{per_hour(r['bytes_after'], r['hours']):>11}{missing}")
+    
+    # Images shared between lectures count once in the total
+    after = disk_usage(all_paths)
+    print("=" * 68)
+    print(f"Total: {before / 2**20:.1f} MB -> {after / 2**20:.1f} MB", end="")
+    if hours:
+        print(f"  ({per_hour(before, hours)} -> {per_hour(after, hours)} MB per lecture-hour)")
+    else:
+        print()
+    db.close()
+
+def _fmt_bytes(n: int) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024 or unit == 'GB':
+            return f"{n:.1f} {unit}" if unit != 'B' else f"{n} B"
+        n /= 1024
+
+def garbage_collect(dry_run: bool = False, keep_audio: bool = False, downsample_days: int = None,
+                    archive_days: int = None, vacuum: bool = True):
+    """Apply retention policies and report reclaimed space"""
+    from config import RETENTION_DROP_AUDIO, RETENTION_DOWNSAMPLE_DAYS, RETENTION_ARCHIVE_DAYS
+    
+    db = SessionLocal()
+    steps = run_gc(
+        db,
+        drop_audio_files=RETENTION_DROP_AUDIO and not keep_audio,
+        downsample_days=RETENTION_DOWNSAMPLE_DAYS if downsample_days is None else downsample_days,
+        archive_days=RETENTION_ARCHIVE_DAYS if archive_days is None else archive_days,
+        vacuum=vacuum,
+        dry_run=dry_run,
+    )
+    db.close()
+    
+    labels = {
+        "drop_audio": "Extracted audio removed",
+        "archive": "Old lectures archived",
+        "downsample_frames": "Frames downsampled",
+        "sweep_frame_store": "Unreferenced frames removed",
+        "vacuum": "Database compacted",
+    }
+    print("\n" + "=" * 60)
+    print("Garbage Collection" + (" (dry run)" if dry_run else ""))
+    print("=" * 60)
+    for name, report in steps.items():
+        count = next((f"{v} {k}" for k, v in report.items() if k in ("files", "images", "lectures")), "")
+        print(f"  {labels[name]:<30} {count:<14} {_fmt_bytes(report['bytes']):>12}")
+    total = sum(r["bytes"] for r in steps.values())
+    print("-" * 60)
+    print(f"  {'Reclaimed' if not dry_run else 'Would reclaim':<45} {_fmt_bytes(total):>12}")
+    print("=" * 60)
+
+def archive(lecture_id: int, dry_run: bool = False):
+    """Move a lecture's frame images and processed files into a compressed archive"""
+    db = SessionLocal()
+    report = archive_lecture(db, lecture_id, dry_run)
+    db.close()
+    if report.get("error"):
+        print(f"Lecture {lecture_id}: {report['error']}")
+    elif dry_run:
+        print(f"Lecture {lecture_id}: would archive {report['images']} images, freeing up to {_fmt_bytes(report['bytes'])}")
+    else:
+        print(f"Lecture {lecture_id} archived to {report['archive']} ({_fmt_bytes(report['archive_bytes'])}), "
+              f"reclaimed {_fmt_bytes(report['bytes'])}")
+
+def restore(lecture_id: int, keep_archive: bool = False):
+    """Restore an archived lecture's files"""
+    db = SessionLocal()
+    report = restore_lecture(db, lecture_id, keep_archive)
+    db.close()
+    if report.get("error"):
+        print(f"Lecture {lecture_id}: {report['error']}")
+    else:
+        print(f"Lecture {lecture_id} restored ({report['files']} files).")
+
 def reset_database():
     """Reset the entire database (DANGEROUS!)"""
     print("\n⚠️  WARNING: This will DELETE ALL DATA!")
@@ -243,12 +586,69 @@ def main():
     subparsers.add_parser('cleanup', help='Clean up failed lectures')
     
     # Export transcript
-    export_parser = subparsers.add_parser('export', help='Export transcript to file')
-    export_parser.add_argument('lecture_id', type=int, help='Lecture ID')
-    export_parser.add_argument('-o', '--output', help='Output file path')
+    export_parser = subparsers.add_parser('export', help='Export transcripts and OCR text (txt, srt, vtt, jsonl, parquet)')
+    export_parser.add_argument('lecture_ids', type=int, nargs='*', help='Lecture ID(s)')
+    export_parser.add_argument('--all', action='store_true', help='Export every lecture')
+    export_parser.add_argument('-o', '--output', help='Output file, directory, or .tar.gz/.tgz/.tar.xz archive')
+    export_parser.add_argument('-f', '--formats', help='Comma-separated formats (bulk default: srt,vtt,jsonl)')
+    export_parser.add_argument('-w', '--workers', type=int, default=EXPORT_WORKERS, help=f'Parallel exports (default: {EXPORT_WORKERS})')
+    
+    # Summarize
+    summarize_parser = subparsers.add_parser('summarize', help='Build a lecture summary and chapters through the AI backend')
+    summarize_parser.add_argument('lecture_id', type=int, help='Lecture ID')
+    summarize_parser.add_argument('--window', type=float, help='Window length in seconds (default: SUMMARY_WINDOW_SECONDS)')
+    summarize_parser.add_argument('--url', help='Backend URL(s), comma-separated (default: COLAB_API_URL)')
+    summarize_parser.add_argument('--queue', action='store_true', help='Queue a low-priority summary job for the worker instead')
     
     # Stats
-    subparsers.add_parser('stats', help='Show system statistics')
+    stats_parser = subparsers.add_parser('stats', help='Show system statistics')
+    stats_parser.add_argument('--rescan', action='store_true', help='Rebuild the storage ledger from disk first')
+    stats_parser.add_argument('-w', '--workers', type=int, default=8, help='Threads for --rescan (default: 8)')
+    
+    # Processing queue
+    enqueue_parser = subparsers.add_parser('enqueue', help='Queue a lecture for the background worker')
+    enqueue_parser.add_argument('lecture_id', type=int, help='Lecture ID')
+    enqueue_parser.add_argument('--profile', action='store_true', help='Capture a cProfile and peak memory for this job')
+    cancel_parser = subparsers.add_parser('cancel', help='Cancel processing for a lecture')
+    cancel_parser.add_argument('lecture_id', type=int, help='Lecture ID')
+    subparsers.add_parser('queue', help='Show processing queue')
+    
+    # Bulk ingest
+    ingest_parser = subparsers.add_parser('ingest', help='Register and process every video in a directory or glob')
+    ingest_parser.add_argument('source', help='Directory or glob pattern, e.g. "semester/**/*.mp4"')
+    ingest_parser.add_argument('-w', '--workers', type=int, default=1, help='Parallel worker processes')
+    ingest_parser.add_argument('-r', '--report', help='Summary report path (JSON)')
+    ingest_parser.add_argument('--profile', action='store_true', help='Profile every lecture processed')
+    
+    # Retention
+    gc_parser = subparsers.add_parser('gc', help='Apply retention policies (see config.py) and compact the database')
+    gc_parser.add_argument('--dry-run', action='store_true', help='Report what would be reclaimed')
+    gc_parser.add_argument('--keep-audio', action='store_true', help='Keep extracted audio.wav files')
+    gc_parser.add_argument('--downsample-days', type=int, help='Downsample frames of lectures older than N days (0 = off)')
+    gc_parser.add_argument('--archive-days', type=int, help='Archive lectures older than N days (0 = off)')
+    gc_parser.add_argument('--no-vacuum', action='store_true', help='Skip VACUUM/ANALYZE')
+    archive_parser = subparsers.add_parser('archive', help="Pack a lecture's files into a compressed archive")
+    archive_parser.add_argument('lecture_id', type=int, help='Lecture ID')
+    archive_parser.add_argument('--dry-run', action='store_true')
+    restore_parser = subparsers.add_parser('restore', help='Restore an archived lecture')
+    restore_parser.add_argument('lecture_id', type=int, help='Lecture ID')
+    restore_parser.add_argument('--keep-archive', action='store_true', help='Keep the archive file after restoring')
+    
+    # Frame store migration
+    migrate_parser = subparsers.add_parser('migrate-frames', help='Move legacy frame JPEGs into the deduplicated frame store')
+    migrate_parser.add_argument('lecture_id', type=int, nargs='?', help='Lecture ID (default: all with legacy frames)')
+    
+    # Performance report
+    perf_parser = subparsers.add_parser('perf', help='Show per-stage timings for a lecture')
+    perf_parser.add_argument('lecture_id', type=int, help='Lecture ID')
+    perf_parser.add_argument('--all', action='store_true', help='Show every recorded run')
+    
+    # Profiles
+    profile_parser = subparsers.add_parser('profile', help='Show captured profiles for a lecture')
+    profile_parser.add_argument('lecture_id', type=int, help='Lecture ID')
+    profile_parser.add_argument('-n', '--limit', type=int, default=20, help='Number of functions to show')
+    profile_parser.add_argument('--sort', choices=['cumulative', 'tottime'], default='cumulative')
+    profile_parser.add_argument('--name', help='Profile to show (default: newest)')
     
     # Reset
     subparsers.add_parser('reset', help='Reset database (DANGEROUS!)')
@@ -272,9 +672,38 @@ def main():
     elif args.command == 'cleanup':
         cleanup_old()
     elif args.command == 'export':
-        export_transcript(args.lecture_id, args.output)
+        if not args.lecture_ids and not args.all:
+            export_parser.error("give lecture IDs or --all")
+        export(args.lecture_ids, args.all, args.output, args.formats, args.workers)
+    elif args.command == 'summarize':
+        summarize(args.lecture_id, args.window, args.url, args.queue)
     elif args.command == 'stats':
-        stats()
+        stats(args.rescan, args.workers)
+    elif args.command == 'enqueue':
+        enqueue(args.lecture_id, args.profile)
+    elif args.command == 'cancel':
+        cancel(args.lecture_id)
+    elif args.command == 'queue':
+        show_queue()
+    elif args.command == 'ingest':
+        from ingest import run_ingest
+        if args.profile:
+            # Inherited by the spawned ingest processes
+            from profiling import PROFILE_ENV
+            os.environ[PROFILE_ENV] = "1"
+        run_ingest(args.source, max(1, args.workers), args.report)
+    elif args.command == 'gc':
+        garbage_collect(args.dry_run, args.keep_audio, args.downsample_days, args.archive_days, not args.no_vacuum)
+    elif args.command == 'archive':
+        archive(args.lecture_id, args.dry_run)
+    elif args.command == 'restore':
+        restore(args.lecture_id, args.keep_archive)
+    elif args.command == 'migrate-frames':
+        migrate_frames(args.lecture_id)
+    elif args.command == 'perf':
+        perf_report(args.lecture_id, args.all)
+    elif args.command == 'profile':
+        show_profile(args.lecture_id, args.limit, args.sort, args.name)
     elif args.command == 'reset':
         reset_database()
 
@@ -0,0 +1,88 @@
+"""
+Timed spans and counters for the processing pipelines.
+
+Stdlib only, so both the local pipeline (lecture_processor.py, which stores
+a job's metrics in the job_metrics table) and the backend (app.py, which
+serves process-wide totals at /metrics) can use it.
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any
+
+
+class JobMetrics:
+    """Accumulates seconds/count per span name and integer counters."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = {}     # name -> [seconds, count]
+        self.counters = {}  # name -> value
+
+    @contextmanager
+    def span(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name: str, seconds: float, count: int = 1):
+        with self.lock:
+            entry = self.spans.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += count
+
+    def incr(self, name: str, n: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other: "JobMetrics"):
+        data = other.as_dict()
+        for name, span in data["spans"].items():
+            self.add_time(name, span["seconds"], span["count"])
+        for name, value in data["counters"].items():
+            self.incr(name, value)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "spans": {k: {"seconds": round(v[0], 4), "count": v[1]} for k, v in self.spans.items()},
+                "counters": dict(self.counters),
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "JobMetrics":
+        metrics = cls()
+        for name, span in (data or {}).get("spans", {}).items():
+            metrics.add_time(name, span.get("seconds", 0.0), span.get("count", 1))
+        for name, value in (data or {}).get("counters", {}).items():
+            metrics.incr(name, value)
+        return metrics
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def render_prometheus(metrics: JobMetrics, gauges: Dict[str, float] = None, prefix: str = "lecture") -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    data = metrics.as_dict()
+    lines = [
+        f"# HELP {prefix}_stage_seconds Time spent per pipeline stage.",
+        f"# TYPE {prefix}_stage_seconds summary",
+    ]
+    for name, span in sorted(data["spans"].items()):
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {span["seconds"]}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {span["count"]}')
+    for name, value in sorted(data["counters"].items()):
+        metric = f"{prefix}_{_metric_name(name)}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, value in sorted((gauges or {}).items()):
+        metric = f"{prefix}_{_metric_name(name)}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,159 @@
+"""
+Opt-in profiling for processing jobs.
+
+Captures a cProfile of the job's thread, peak RSS (the process plus child
+processes such as ffmpeg, sampled with psutil when it is installed) and
+peak CUDA memory when torch is in use. Enable with LECTURE_PROFILE=1 or
+per job (manage.py enqueue --profile). Results are read with
+`manage.py profile <lecture_id>`.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+PROFILE_ENV = "LECTURE_PROFILE"
+TOP_FUNCTIONS = 30
+
+
+def profiling_enabled(flag: Optional[bool] = None) -> bool:
+    """An explicit flag wins; otherwise LECTURE_PROFILE decides."""
+    if flag is not None:
+        return bool(flag)
+    return os.getenv(PROFILE_ENV, "").lower() in ("1", "true", "yes", "on")
+
+
+def top_functions(stats: pstats.Stats, limit: int = TOP_FUNCTIONS, sort: str = "cumulative") -> List[Dict[str, Any]]:
+    stats.sort_stats(sort)
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        cc, ncalls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            "function": name,
+            "file": filename,
+            "line": line,
+            "ncalls": ncalls,
+            "tottime": round(tottime, 4),
+            "cumtime": round(cumtime, 4),
+        })
+    return rows
+
+
+class _RSSSampler(threading.Thread):
+    def __init__(self, interval: float = 0.5):
+        super().__init__(daemon=True)
+        import psutil
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak = 0
+        self.stop_event = threading.Event()
+
+    def sample(self):
+        rss = 0
+        try:
+            rss = self.process.memory_info().rss
+            for child in self.process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except Exception:
+                    pass
+        except Exception:
+            pass
+        self.peak = max(self.peak, rss)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+
+def _rusage_peak_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _cuda():
+    torch = sys.modules.get("torch")
+    if torch is None:
+        try:
+            import torch
+        except ImportError:
+            return None
+    try:
+        return torch.cuda if torch.cuda.is_available() else None
+    except Exception:
+        return None
+
+
+class JobProfiler:
+    """Context manager. With out_dir set, writes <label>.prof and <label>.json there."""
+
+    def __init__(self, out_dir=None, label: str = "job"):
+        self.out_dir = Path(out_dir) if out_dir else None
+        self.label = label
+        self.profiler = cProfile.Profile()
+        self.sampler = None
+        self.summary = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.started_at = datetime.now()
+        try:
+            self.sampler = _RSSSampler()
+            self.sampler.sample()
+            self.sampler.start()
+        except ImportError:
+            self.sampler = None
+        cuda = _cuda()
+        if cuda:
+            cuda.reset_peak_memory_stats()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.disable()
+        wall = time.perf_counter() - self.started
+
+        if self.sampler:
+            self.sampler.stop_event.set()
+            self.sampler.sample()
+            peak_rss, rss_source = self.sampler.peak, "psutil"
+        else:
+            peak_rss, rss_source = _rusage_peak_bytes(), "rusage"
+        cuda = _cuda()
+        gpu_peak = cuda.max_memory_allocated() if cuda else None
+
+        stats = pstats.Stats(self.profiler)
+        self.summary = {
+            "label": self.label,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(wall, 3),
+            "failed": exc_type is not None,
+            "peak_rss_mb": round(peak_rss / 2**20, 1) if peak_rss else None,
+            "rss_source": rss_source,
+            "gpu_peak_mb": round(gpu_peak / 2**20, 1) if gpu_peak is not None else None,
+            "top_functions": top_functions(stats),
+        }
+
+        if self.out_dir:
+            try:
+                self.out_dir.mkdir(parents=True, exist_ok=True)
+                stats.dump_stats(str(self.out_dir / f"{self.label}.prof"))
+                with open(self.out_dir / f"{self.label}.json", "w", encoding="utf-8") as f:
+                    json.dump(self.summary, f, indent=2)
+                print(f"Profile saved to {self.out_dir / self.label}.prof")
+            except Exception as e:
+                print(f"Could not save profile: {e}")
+        return False
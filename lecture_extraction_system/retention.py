@@ -0,0 +1,281 @@
+"""
+Retention policies for processed data (manage.py gc / archive / restore).
+
+  drop_audio          remove processed/lecture_<id>/audio.wav once a transcript exists
+  downsample_frames   re-encode store images of old lectures at a smaller size
+  archive_lecture     pack a lecture's frame images and processed/ files into
+                      processed/archive/lecture_<id>.tar.gz; restore_lecture undoes it
+  sweep_frame_store   delete store images no Frame row references
+  vacuum_database     VACUUM + ANALYZE the SQLite database
+
+Transcript and frame rows stay in the database throughout, so search, chat
+and RAG registration keep working for archived lectures.
+"""
+
+import io
+import json
+import os
+import shutil
+import tarfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import cv2
+from sqlalchemy.orm import Session
+
+from config import (
+    PROCESSED_DIR, FRAME_STORE_DIR, ARCHIVE_DIR, RETENTION_DROP_AUDIO, RETENTION_DOWNSAMPLE_DAYS,
+    RETENTION_DOWNSAMPLE_MAX_SIDE, RETENTION_DOWNSAMPLE_QUALITY, RETENTION_ARCHIVE_DAYS,
+)
+from database import engine, Lecture, Transcript, Frame
+from frame_store import FrameStore, is_store_path, lecture_frame_paths, disk_usage
+from storage import archive_file, refresh_lecture, refresh_sharing_lectures, set_artifact
+
+# Store files touched this recently may be in use by a lecture that is still processing
+STORE_GRACE_SECONDS = 3600
+
+
+def _dir_size(path: Path) -> int:
+    return disk_usage(str(p) for p in path.rglob("*") if p.is_file()) if path.exists() else 0
+
+
+def _recently_used(path: str) -> bool:
+    try:
+        return os.path.getmtime(path) > time.time() - STORE_GRACE_SECONDS
+    except OSError:
+        return False
+
+
+def drop_audio(db: Session, dry_run: bool = False) -> Dict[str, Any]:
+    """Remove extracted audio of completed lectures that have a transcript."""
+    report = {"files": 0, "bytes": 0}
+    for (lecture_id,) in db.query(Lecture.id).filter(Lecture.status == "completed").all():
+        audio = PROCESSED_DIR / f"lecture_{lecture_id}" / "audio.wav"
+        if not audio.exists():
+            continue
+        if db.query(Transcript.id).filter(Transcript.lecture_id == lecture_id).first() is None:
+            continue
+        report["files"] += 1
+        report["bytes"] += audio.stat().st_size
+        if not dry_run:
+            audio.unlink()
+            set_artifact(db, lecture_id, "audio", 0, 0)
+    return report
+
+
+def downsample_frames(db: Session, older_than_days: int, max_side: int = RETENTION_DOWNSAMPLE_MAX_SIDE,
+                      quality: int = RETENTION_DOWNSAMPLE_QUALITY, dry_run: bool = False) -> Dict[str, Any]:
+    """Re-encode store images used only by lectures processed more than older_than_days ago."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    old_ids = {lid for (lid,) in db.query(Lecture.id).filter(Lecture.processed_at < cutoff, Lecture.archived_at.is_(None))}
+    store = FrameStore(max_side=max_side, quality=quality)
+    report = {"images": 0, "bytes": 0}
+    seen = set()
+    changed = set()
+
+    for lecture_id in sorted(old_ids):
+        for path in lecture_frame_paths(db, lecture_id):
+            if path in seen or not is_store_path(path) or not os.path.exists(path):
+                continue
+            seen.add(path)
+            # Shared with a recent lecture: leave it at full size
+            users = {lid for (lid,) in db.query(Frame.lecture_id).filter(Frame.frame_path == path).distinct()}
+            if not users <= old_ids:
+                continue
+            image = cv2.imread(path)
+            if image is None or max(image.shape[:2]) <= max_side:
+                continue
+
+            old_size = os.path.getsize(path)
+            if dry_run:
+                new_size = len(store.encode(image))
+            else:
+                new_path = store.add(image)
+                new_size = os.path.getsize(new_path)
+                db.query(Frame).filter(Frame.frame_path == path).update({"frame_path": new_path}, synchronize_session=False)
+                db.commit()
+                os.remove(path)
+                changed |= users
+            report["images"] += 1
+            report["bytes"] += max(0, old_size - new_size)
+    for lecture_id in changed:
+        refresh_lecture(db, lecture_id)
+    return report
+
+
+def _lecture_manifest(db: Session, lecture: Lecture) -> bytes:
+    transcripts = db.query(Transcript).filter(Transcript.lecture_id == lecture.id).order_by(Transcript.timestamp_start)
+    frames = db.query(Frame).filter(Frame.lecture_id == lecture.id).order_by(Frame.timestamp)
+    manifest = {
+        "lecture": {"id": lecture.id, "title": lecture.title, "video_path": lecture.video_path,
+                    "duration": lecture.duration, "content_hash": lecture.content_hash,
+                    "processed_at": lecture.processed_at.isoformat() if lecture.processed_at else None},
+        "transcripts": [{"start": t.timestamp_start, "end": t.timestamp_end, "text": t.text, "confidence": t.confidence}
+                        for t in transcripts.yield_per(1000)],
+        "frames": [{"timestamp": f.timestamp, "frame_path": f.frame_path, "printed_text": f.printed_text,
+                    "handwritten_text": f.handwritten_text, "ocr_confidence": f.ocr_confidence}
+                   for f in frames.yield_per(1000)],
+        "archived_at": datetime.utcnow().isoformat(),
+    }
+    return json.dumps(manifest).encode("utf-8")
+
+
+def archive_lecture(db: Session, lecture_id: int, dry_run: bool = False) -> Dict[str, Any]:
+    """Pack frame images and processed/lecture_<id> into a tarball, then free what only this lecture used.
+
+    The archive also carries a lecture.json with the transcript and OCR rows, so
+    it is a self-contained cold copy."""
+    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    if not lecture:
+        return {"lecture_id": lecture_id, "error": "Lecture not found"}
+    if lecture.archived_at:
+        return {"lecture_id": lecture_id, "error": "Already archived"}
+
+    lecture_dir = PROCESSED_DIR / f"lecture_{lecture_id}"
+    paths = sorted(p for p in lecture_frame_paths(db, lecture_id) if is_store_path(p) and os.path.exists(p))
+
+    def only_archived_users(path):
+        live = (
+            db.query(Frame.id).join(Lecture, Lecture.id == Frame.lecture_id)
+            .filter(Frame.frame_path == path, Lecture.archived_at.is_(None), Lecture.id != lecture_id)
+            .first()
+        )
+        return live is None and not _recently_used(path)
+
+    freeable = [p for p in paths if only_archived_users(p)]
+    report = {"lecture_id": lecture_id, "images": len(paths),
+              "bytes": disk_usage(freeable) + _dir_size(lecture_dir), "archive_bytes": 0}
+    if dry_run:
+        return report
+
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    target = archive_file(lecture_id)
+    part = target.with_name(target.name + ".part")
+    with tarfile.open(part, "w:gz") as tar:
+        manifest = _lecture_manifest(db, lecture)
+        info = tarfile.TarInfo("lecture.json")
+        info.size = len(manifest)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(manifest))
+        for path in paths:
+            tar.add(path, arcname=f"frame_store/{Path(path).resolve().relative_to(FRAME_STORE_DIR.resolve()).as_posix()}")
+        if lecture_dir.exists():
+            tar.add(str(lecture_dir), arcname="lecture")
+    os.replace(part, target)
+
+    # Only delete once the archive is complete and the lecture is marked
+    lecture.archived_at = datetime.utcnow()
+    db.commit()
+    for path in freeable:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    shutil.rmtree(lecture_dir, ignore_errors=True)
+    refresh_lecture(db, lecture_id)
+    refresh_sharing_lectures(db, freeable)
+    report["archive_bytes"] = target.stat().st_size
+    report["archive"] = str(target)
+    # The tarball itself now takes space
+    report["bytes"] = max(0, report["bytes"] - report["archive_bytes"])
+    return report
+
+
+def restore_lecture(db: Session, lecture_id: int, keep_archive: bool = False) -> Dict[str, Any]:
+    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    source = archive_file(lecture_id)
+    if not lecture:
+        return {"lecture_id": lecture_id, "error": "Lecture not found"}
+    if not source.exists():
+        return {"lecture_id": lecture_id, "error": f"No archive at {source}"}
+
+    roots = {"frame_store": FRAME_STORE_DIR.resolve(), "lecture": (PROCESSED_DIR / f"lecture_{lecture_id}").resolve()}
+    restored = 0
+    with tarfile.open(source, "r:gz") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            top, _, rel = member.name.partition("/")
+            if top not in roots or not rel:
+                continue
+            dest = (roots[top] / rel).resolve()
+            if not dest.is_relative_to(roots[top]):
+                continue  # never follow ../ out of the target directory
+            if dest.exists():
+                continue
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            with tar.extractfile(member) as src, open(dest, "wb") as out:
+                shutil.copyfileobj(src, out)
+            restored += 1
+
+    lecture.archived_at = None
+    db.commit()
+    if not keep_archive:
+        source.unlink()
+    refresh_lecture(db, lecture_id)
+    return {"lecture_id": lecture_id, "files": restored}
+
+
+def sweep_frame_store(db: Session, dry_run: bool = False) -> Dict[str, Any]:
+    """Delete store images (and stale temp files) that no Frame row references."""
+    report = {"files": 0, "bytes": 0}
+    if not FRAME_STORE_DIR.exists():
+        return report
+    kept = [0, 0]
+    referenced = {str(Path(p).resolve()) for (p,) in db.query(Frame.frame_path).distinct() if p}
+    for path in FRAME_STORE_DIR.rglob("*"):
+        if not path.is_file() or str(path.resolve()) in referenced:
+            continue
+        if _recently_used(str(path)):
+            kept[0] += 1
+            kept[1] += path.stat().st_size
+            continue
+        report["files"] += 1
+        report["bytes"] += path.stat().st_size
+        if not dry_run:
+            path.unlink()
+    if not dry_run:
+        set_artifact(db, None, "frames", *kept)
+    return report
+
+
+def _db_files_size() -> int:
+    db_path = engine.url.database
+    return disk_usage(f"{db_path}{suffix}" for suffix in ("", "-wal", "-shm"))
+
+
+def vacuum_database(dry_run: bool = False) -> Dict[str, Any]:
+    before = _db_files_size()
+    if not dry_run:
+        # VACUUM cannot run inside a transaction
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.exec_driver_sql("VACUUM")
+            conn.exec_driver_sql("ANALYZE")
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    after = _db_files_size()
+    return {"bytes": max(0, before - after), "size_after": after}
+
+
+def run_gc(db: Session, drop_audio_files: bool = RETENTION_DROP_AUDIO,
+           downsample_days: Optional[int] = RETENTION_DOWNSAMPLE_DAYS,
+           archive_days: Optional[int] = RETENTION_ARCHIVE_DAYS,
+           vacuum: bool = True, dry_run: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Apply every enabled policy in order; returns per-step reports with reclaimed bytes."""
+    steps = {}
+    if drop_audio_files:
+        steps["drop_audio"] = drop_audio(db, dry_run)
+    if archive_days:
+        cutoff = datetime.utcnow() - timedelta(days=archive_days)
+        old = [lid for (lid,) in db.query(Lecture.id).filter(
+            Lecture.status == "completed", Lecture.processed_at < cutoff, Lecture.archived_at.is_(None))]
+        archived = [archive_lecture(db, lid, dry_run) for lid in old]
+        steps["archive"] = {"lectures": len(archived), "bytes": sum(r.get("bytes", 0) for r in archived)}
+    if downsample_days:
+        steps["downsample_frames"] = downsample_frames(db, downsample_days, dry_run=dry_run)
+    steps["sweep_frame_store"] = sweep_frame_store(db, dry_run)
+    if vacuum:
+        steps["vacuum"] = vacuum_database(dry_run)
+    return steps
@@ -0,0 +1,184 @@
+"""
+Storage ledger: bytes and file counts per lecture and artifact type.
+
+Code that writes or deletes a lecture's files calls refresh_lecture() (or
+set_artifact() when it already knows the size), so manage.py stats can sum
+the storage_ledger table instead of walking uploads/ and processed/.
+rescan() rebuilds the whole ledger with a thread pool.
+
+Artifacts: video, audio, frames, profile, archive. A frame-store image
+shared by several lectures is counted once, for the lowest lecture id that
+references it. Rows with lecture_id NULL hold files no lecture references.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Tuple, List, Optional, Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from config import UPLOAD_DIR, PROCESSED_DIR, FRAME_STORE_DIR, ARCHIVE_DIR
+from database import SessionLocal, Lecture, Frame, StorageLedger
+
+ARTIFACTS = ("video", "audio", "frames", "profile", "archive")
+
+
+def archive_file(lecture_id: int) -> Path:
+    return ARCHIVE_DIR / f"lecture_{lecture_id}.tar.gz"
+
+
+def _measure(files: Iterable = (), dirs: Iterable = ()) -> Tuple[int, int]:
+    count = size = 0
+    for path in files:
+        try:
+            size += os.path.getsize(path)
+            count += 1
+        except OSError:
+            pass
+    for directory in dirs:
+        for root, _, names in os.walk(directory):
+            for name in names:
+                try:
+                    size += os.path.getsize(os.path.join(root, name))
+                    count += 1
+                except OSError:
+                    pass
+    return count, size
+
+
+def _owned_frames(db: Session, lecture_id: int = None) -> Dict[int, List[str]]:
+    """Frame image paths grouped by owning (lowest referencing) lecture."""
+    query = (
+        db.query(Frame.frame_path, func.min(Frame.lecture_id))
+        .filter(Frame.frame_path.isnot(None))
+        .group_by(Frame.frame_path)
+    )
+    if lecture_id is not None:
+        query = query.filter(Frame.frame_path.in_(select(Frame.frame_path).where(Frame.lecture_id == lecture_id)))
+    owned = {}
+    for path, owner in query:
+        owned.setdefault(owner, []).append(path)
+    return owned
+
+
+def _lecture_spec(lecture: Lecture, frame_paths: List[str]) -> Dict[str, dict]:
+    lecture_dir = PROCESSED_DIR / f"lecture_{lecture.id}"
+    return {
+        "video": {"files": [lecture.video_path] if lecture.video_path else []},
+        "audio": {"files": [lecture_dir / "audio.wav"]},
+        "frames": {"files": frame_paths},
+        "profile": {"dirs": [lecture_dir / "profile"]},
+        "archive": {"files": [archive_file(lecture.id)]},
+    }
+
+
+def _measure_spec(spec: Dict[str, dict]) -> Dict[str, Tuple[int, int]]:
+    return {artifact: _measure(s.get("files", ()), s.get("dirs", ())) for artifact, s in spec.items()}
+
+
+def _write_rows(db: Session, lecture_id: Optional[int], measured: Dict[str, Tuple[int, int]]):
+    owner = StorageLedger.lecture_id.is_(None) if lecture_id is None else StorageLedger.lecture_id == lecture_id
+    db.query(StorageLedger).filter(owner, StorageLedger.artifact.in_(list(measured))).delete(synchronize_session=False)
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(StorageLedger, [
+        {"lecture_id": lecture_id, "artifact": artifact, "files": files, "bytes": size, "updated_at": now}
+        for artifact, (files, size) in measured.items() if files
+    ])
+
+
+def set_artifact(db: Session, lecture_id: Optional[int], artifact: str, files: int, size: int):
+    """Record a size the caller already knows (e.g. a just-written upload) without touching the disk."""
+    _write_rows(db, lecture_id, {artifact: (files, size)})
+    db.commit()
+
+
+def refresh_lecture(db: Session, lecture_id: int) -> Dict[str, Tuple[int, int]]:
+    """Re-measure one lecture's files. Costs one stat per file it owns, not a directory walk."""
+    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    if lecture is None:
+        db.query(StorageLedger).filter(StorageLedger.lecture_id == lecture_id).delete(synchronize_session=False)
+        db.commit()
+        return {}
+    owned = _owned_frames(db, lecture_id).get(lecture_id, [])
+    measured = _measure_spec(_lecture_spec(lecture, owned))
+    _write_rows(db, lecture_id, measured)
+    db.commit()
+    return measured
+
+
+def refresh_sharing_lectures(db: Session, frame_paths: Iterable[str]):
+    """After a lecture is deleted, images it owned may now belong to another lecture."""
+    paths = list(frame_paths)
+    owners = set()
+    for i in range(0, len(paths), 500):
+        owners |= {lid for (lid,) in db.query(Frame.lecture_id).filter(Frame.frame_path.in_(paths[i:i + 500])).distinct()}
+    for lecture_id in owners:
+        refresh_lecture(db, lecture_id)
+
+
+def lecture_storage(db: Session, lecture_id: int) -> Dict[str, Tuple[int, int]]:
+    rows = db.query(StorageLedger).filter(StorageLedger.lecture_id == lecture_id).all()
+    return {r.artifact: (r.files, r.bytes) for r in rows}
+
+
+def storage_totals(db: Session) -> Dict[str, dict]:
+    """{"lectures": {artifact: (files, bytes)}, "unreferenced": {...}, "updated_at": datetime}"""
+    rows = (
+        db.query(StorageLedger.artifact, StorageLedger.lecture_id.is_(None),
+                 func.sum(StorageLedger.files), func.sum(StorageLedger.bytes))
+        .group_by(StorageLedger.artifact, StorageLedger.lecture_id.is_(None))
+        .all()
+    )
+    totals = {"lectures": {}, "unreferenced": {}}
+    for artifact, orphan, files, size in rows:
+        totals["unreferenced" if orphan else "lectures"][artifact] = (int(files or 0), int(size or 0))
+    totals["updated_at"] = db.query(func.max(StorageLedger.updated_at)).scalar()
+    return totals
+
+
+def _unreferenced_in(directory: Path, referenced: set, recursive: bool) -> Tuple[int, int]:
+    files = []
+    walker = os.walk(directory) if recursive else [(str(directory), [], os.listdir(directory))]
+    for root, _, names in walker:
+        for name in names:
+            path = os.path.abspath(os.path.join(root, name))
+            if path not in referenced and os.path.isfile(path):
+                files.append(path)
+    return _measure(files)
+
+
+def rescan(workers: int = 8) -> Dict[str, int]:
+    """Rebuild the ledger from disk. Stats run in a thread pool, which matters on network storage."""
+    db = SessionLocal()
+    try:
+        lectures = db.query(Lecture).all()
+        owned = _owned_frames(db)
+        specs = {lec.id: _lecture_spec(lec, owned.get(lec.id, [])) for lec in lectures}
+        referenced_frames = {os.path.abspath(p) for paths in owned.values() for p in paths}
+        referenced_uploads = {os.path.abspath(lec.video_path) for lec in lectures if lec.video_path}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            lecture_futures = {lid: pool.submit(_measure_spec, spec) for lid, spec in specs.items()}
+            # One task per store shard (processed/frame_store/<ab>) keeps the orphan scan parallel too
+            shards = [d for d in FRAME_STORE_DIR.iterdir() if d.is_dir()] if FRAME_STORE_DIR.exists() else []
+            shard_futures = [pool.submit(_unreferenced_in, d, referenced_frames, False) for d in shards]
+            upload_future = pool.submit(_unreferenced_in, UPLOAD_DIR, referenced_uploads, True) if UPLOAD_DIR.exists() else None
+
+            results = {lid: f.result() for lid, f in lecture_futures.items()}
+            orphan_frames = [f.result() for f in shard_futures]
+            orphan_uploads = upload_future.result() if upload_future else (0, 0)
+
+        db.query(StorageLedger).delete(synchronize_session=False)
+        for lecture_id, measured in results.items():
+            _write_rows(db, lecture_id, measured)
+        _write_rows(db, None, {
+            "frames": (sum(f for f, _ in orphan_frames), sum(b for _, b in orphan_frames)),
+            "video": orphan_uploads,
+        })
+        db.commit()
+        return {"lectures": len(results), "files": sum(f for m in results.values() for f, _ in m.values())}
+    finally:
+        db.close()
@@ -0,0 +1,256 @@
+"""
+Hierarchical (map-reduce) lecture summaries.
+
+  map     the transcript is cut into fixed SUMMARY_WINDOW_SECONDS windows and
+          every window is summarised; windows go to the backend's /summarize
+          in batches, several batches at once
+  reduce  window summaries are combined in groups that fit one prompt,
+          repeating until a single summary is left
+
+Every LLM call is cached in summary_cache under a hash of its exact input.
+Window boundaries are fixed in time, so editing one transcript segment
+changes one window's hash and re-summarises only that window (plus the
+cheap reduce calls above it).
+"""
+
+import hashlib
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import (
+    SUMMARY_WINDOW_SECONDS, SUMMARY_WINDOW_TOKENS, SUMMARY_WORDS, SUMMARY_REDUCE_CHARS,
+)
+from database import Transcript, SummaryCache, LectureSummary, Chapter
+
+# Bump when prompts change so old cache entries stop matching
+PROMPT_VERSION = 1
+
+
+def _label(start: float, end: float) -> str:
+    return f"{int(start // 60):02d}:{int(start % 60):02d}-{int(end // 60):02d}:{int(end % 60):02d}"
+
+
+def split_windows(segments: Iterable[Tuple[float, float, str]], window_seconds: float = SUMMARY_WINDOW_SECONDS) -> List[Dict[str, Any]]:
+    """Group (start, end, text) segments, in time order, into windows by the segment start time."""
+    windows = []
+    for start, end, text in segments:
+        if not text or not text.strip():
+            continue
+        index = int((start or 0.0) // window_seconds)
+        if not windows or windows[-1]["index"] != index:
+            windows.append({"index": index, "start": start or 0.0, "end": end or start or 0.0, "lines": []})
+        window = windows[-1]
+        window["end"] = max(window["end"], end or 0.0)
+        window["lines"].append(text.strip())
+    for window in windows:
+        window["text"] = "\n".join(window.pop("lines"))
+        window["label"] = _label(window["start"], window["end"])
+    return windows
+
+
+def _key(kind: str, instruction: str, text: str, max_tokens: int) -> str:
+    raw = f"{PROMPT_VERSION}\x00{kind}\x00{max_tokens}\x00{instruction}\x00{text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_get(db: Optional[Session], keys: List[str]) -> Dict[str, str]:
+    if db is None:
+        return {}
+    found = {}
+    for i in range(0, len(keys), 500):
+        rows = db.query(SummaryCache.content_hash, SummaryCache.summary).filter(SummaryCache.content_hash.in_(keys[i:i + 500]))
+        found.update(dict(rows))
+    return found
+
+
+def _cache_put(db: Optional[Session], kind: str, entries: Dict[str, str]):
+    if db is None or not entries:
+        return
+    try:
+        db.bulk_insert_mappings(SummaryCache, [
+            {"content_hash": key, "kind": kind, "summary": summary} for key, summary in entries.items()
+        ])
+        db.commit()
+    except IntegrityError:
+        # Another process summarised the same input meanwhile; its row is just as good
+        db.rollback()
+
+
+class _Run:
+    """Runs one level of LLM calls through the cache and keeps call counts."""
+
+    def __init__(self, client, db: Optional[Session], temperature: float, priority: Optional[str] = None):
+        self.client = client
+        self.db = db
+        self.temperature = temperature
+        self.priority = priority
+        self.llm_calls = 0
+        self.cached = 0
+
+    def summarize(self, kind: str, items: List[Tuple[str, str]], max_tokens: int) -> List[str]:
+        """items: (instruction, text) pairs. Raises RuntimeError when the backend fails."""
+        keys = [_key(kind, instruction, text, max_tokens) for instruction, text in items]
+        known = _cache_get(self.db, keys)
+        todo = {key: item for key, item in zip(keys, items) if key not in known}
+        self.cached += sum(1 for key in keys if key in known)
+        if todo:
+            reply = self.client.summarize_many(
+                [{"id": key, "instruction": instruction, "text": text} for key, (instruction, text) in todo.items()],
+                max_tokens, self.temperature, self.priority)
+            if not reply["success"]:
+                raise RuntimeError(reply.get("error") or "Summarization failed")
+            # Ids the reply does not belong to (another backend or a proxy rewrote them) are ignored
+            fresh = {r["id"]: (r.get("text") or "").strip() for r in reply["results"] if r.get("id") in todo}
+            self.llm_calls += len(fresh)
+            # Stored before the next level runs, so a failed reduce does not lose the window work
+            _cache_put(self.db, kind, fresh)
+            known.update(fresh)
+            missing = len(set(keys) - known.keys())
+            if missing:
+                raise RuntimeError(f"Backend reply is missing {missing} summaries")
+        return [known[key] for key in keys]
+
+
+def _groups(parts: List[str], limit: int = SUMMARY_REDUCE_CHARS) -> List[List[str]]:
+    groups, size = [[]], 0
+    for part in parts:
+        if groups[-1] and size + len(part) > limit:
+            groups.append([])
+            size = 0
+        groups[-1].append(part)
+        size += len(part) + 1
+    return groups
+
+
+def _reduce(run: _Run, parts: List[str], words: int) -> str:
+    final_instruction = (f"Combine these section summaries of one lecture into a single coherent summary of about "
+                         f"{words} words. Follow the order of the lecture and keep key terms.")
+    partial_instruction = "Combine these consecutive section summaries of a lecture into one shorter summary, keeping key terms."
+    while True:
+        groups = _groups(parts)
+        if len(groups) == 1:
+            return run.summarize("final", [(final_instruction, "\n".join(groups[0]))], words * 2)[0]
+        parts = run.summarize("reduce", [(partial_instruction, "\n".join(g)) for g in groups], SUMMARY_WINDOW_TOKENS)
+
+
+def summarize_windows(client, windows: List[Dict[str, Any]], db: Optional[Session] = None, words: int = SUMMARY_WORDS,
+                      temperature: float = 0.3, priority: Optional[str] = None, run: Optional[_Run] = None) -> Dict[str, Any]:
+    """Map-reduce over split_windows() output. db=None disables the cache.
+
+    priority="low" lets the backend hold the batch back while interactive questions are running."""
+    run = run or _Run(client, db, temperature, priority)
+    if not windows:
+        return {"success": False, "error": "No transcript to summarize"}
+    try:
+        if len(windows) == 1 and len(windows[0]["text"]) <= SUMMARY_REDUCE_CHARS:
+            # Short lecture: one call on the raw text
+            instruction = (f"Summarize this lecture in about {words} words. "
+                           f"Keep key terms, definitions, formulas and examples.")
+            summary = run.summarize("short", [(instruction, windows[0]["text"])], words * 2)[0]
+            window_summaries = [summary]
+        else:
+            instructions = [
+                f"Summarize this part of a lecture ({w['label']}) in 3-5 sentences. "
+                f"Keep key terms, definitions, formulas and examples."
+                for w in windows
+            ]
+            window_summaries = run.summarize("window", [(i, w["text"]) for i, w in zip(instructions, windows)],
+                                             SUMMARY_WINDOW_TOKENS)
+            summary = _reduce(run, [f"[{w['label']}] {s}" for w, s in zip(windows, window_summaries)], words)
+    except RuntimeError as e:
+        return {"success": False, "error": str(e), "llm_calls": run.llm_calls, "cached": run.cached}
+
+    return {
+        "success": True,
+        "summary": summary,
+        "windows": [{"start": w["start"], "end": w["end"], "summary": s} for w, s in zip(windows, window_summaries)],
+        "llm_calls": run.llm_calls,
+        "cached": run.cached,
+    }
+
+
+def _lecture_windows(db: Session, lecture_id: int, window_seconds: float) -> List[Dict[str, Any]]:
+    rows = (
+        db.query(Transcript.timestamp_start, Transcript.timestamp_end, Transcript.text)
+        .filter(Transcript.lecture_id == lecture_id)
+        .order_by(Transcript.timestamp_start)
+        .yield_per(1000)
+    )
+    return split_windows(rows, window_seconds)
+
+
+def summarize_lecture(db: Session, lecture_id: int, client, window_seconds: float = SUMMARY_WINDOW_SECONDS,
+                      words: int = SUMMARY_WORDS, priority: Optional[str] = None) -> Dict[str, Any]:
+    result = summarize_windows(client, _lecture_windows(db, lecture_id, window_seconds), db, words, priority=priority)
+    result["lecture_id"] = lecture_id
+    return result
+
+
+def build_digest(db: Session, lecture_id: int, client, window_seconds: float = SUMMARY_WINDOW_SECONDS,
+                 words: int = SUMMARY_WORDS, priority: Optional[str] = "low") -> Dict[str, Any]:
+    """Summary plus one titled chapter per window, saved to lecture_summaries / chapters.
+
+    Runs as a background summary job at ingest (see job_queue.enqueue_summary),
+    so the Past Lectures page only reads SQLite."""
+    run = _Run(client, db, 0.3, priority)
+    windows = _lecture_windows(db, lecture_id, window_seconds)
+    result = summarize_windows(client, windows, db, words, run=run)
+    if not result["success"]:
+        return result
+    try:
+        titles = run.summarize("title", [
+            ("Write a short title (at most 8 words) for this section of a lecture. Reply with the title only.", w["summary"])
+            for w in result["windows"]
+        ], 24)
+    except RuntimeError as e:
+        return {"success": False, "error": str(e)}
+
+    chapters = [
+        {"position": i, "start": w["start"], "end": w["end"], "title": _clean_title(title) or f"Part {i + 1}", "summary": w["summary"]}
+        for i, (w, title) in enumerate(zip(result["windows"], titles))
+    ]
+    save_digest(db, lecture_id, result["summary"], chapters)
+    return {**result, "lecture_id": lecture_id, "chapters": chapters, "llm_calls": run.llm_calls, "cached": run.cached}
+
+
+def _clean_title(text: str) -> str:
+    line = next((l for l in text.strip().splitlines() if l.strip()), "")
+    return line.strip().strip('"\'*#').removeprefix("Title:").strip()[:255]
+
+
+def save_digest(db: Session, lecture_id: int, summary: str, chapters: List[Dict[str, Any]]):
+    db.query(Chapter).filter(Chapter.lecture_id == lecture_id).delete(synchronize_session=False)
+    db.query(LectureSummary).filter(LectureSummary.lecture_id == lecture_id).delete(synchronize_session=False)
+    db.add(LectureSummary(lecture_id=lecture_id, summary=summary))
+    db.bulk_insert_mappings(Chapter, [{"lecture_id": lecture_id, **c} for c in chapters])
+    db.commit()
+
+
+def _lines(text: str, limit: int) -> List[str]:
+    """Non-empty lines, with any line longer than limit cut at word boundaries (the backend drops whole lines that do not fit)."""
+    out = []
+    for line in text.split("\n"):
+        words, size = [], 0
+        for word in line.split():
+            if words and size + len(word) > limit:
+                out.append(" ".join(words))
+                words, size = [], 0
+            words.append(word)
+            size += len(word) + 1
+        if words:
+            out.append(" ".join(words))
+    return out
+
+
+def summarize_text(client, text: str, max_length: int = SUMMARY_WORDS) -> Dict[str, Any]:
+    """Uncached map-reduce over plain text; returns LLMClient.summarize_lecture's result shape."""
+    chunks = _groups(_lines(text, 500))
+    windows = [{"start": 0.0, "end": 0.0, "label": f"part {i + 1} of {len(chunks)}", "text": "\n".join(c)}
+               for i, c in enumerate(chunks) if c]
+    result = summarize_windows(client, windows, None, max_length)
+    if not result["success"]:
+        return {"success": False, "error": result["error"], "response": ""}
+    return {"success": True, "response": result["summary"],
+            "metadata": {"windows": len(windows), "llm_calls": result["llm_calls"]}}
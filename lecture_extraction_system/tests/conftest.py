@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules live flat in lecture_extraction_system/, as when running app.py or manage.py from there
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("numpy")
+
+from app import AnswerCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _cache(clock, threshold=0.9, ttl=60, max_size=10):
+    return AnswerCache(threshold, ttl, max_size, clock=clock)
+
+
+def test_similar_question_hits_and_dissimilar_misses(clock):
+    cache = _cache(clock)
+    cache.put("job", [1.0, 0.0], "what is entropy", 200, "disorder", {})
+    assert cache.lookup("job", [2.0, 0.1], 200)["text"] == "disorder"   # cosine ~0.999, scale ignored
+    assert cache.lookup("job", [1.0, 1.0], 200) is None                 # cosine ~0.707
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_answers_do_not_leak_between_jobs(clock):
+    cache = _cache(clock)
+    cache.put("lecture-a", [1.0, 0.0], "what is entropy", 200, "answer for a", {})
+    assert cache.lookup("lecture-b", [1.0, 0.0], 200) is None
+    cache.invalidate("lecture-a")
+    assert cache.lookup("lecture-a", [1.0, 0.0], 200) is None
+
+
+def test_shorter_cached_answer_does_not_serve_longer_request(clock):
+    cache = _cache(clock)
+    cache.put("job", [1.0, 0.0], "q", 100, "short answer", {})
+    assert cache.lookup("job", [1.0, 0.0], 300) is None
+    assert cache.lookup("job", [1.0, 0.0], 50)["text"] == "short answer"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = _cache(clock, ttl=60)
+    cache.put("job", [1.0, 0.0], "q", 200, "answer", {})
+    clock.now += 60
+    assert cache.lookup("job", [1.0, 0.0], 200) is not None
+    clock.now += 1
+    assert cache.lookup("job", [1.0, 0.0], 200) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = _cache(clock, max_size=2)
+    cache.put("job", [1.0, 0.0], "first", 200, "one", {})
+    cache.put("job", [0.0, 1.0], "second", 200, "two", {})
+    assert cache.lookup("job", [1.0, 0.0], 200)["text"] == "one"        # "second" is now the oldest
+    cache.put("job", [-1.0, 0.0], "third", 200, "three", {})
+    assert cache.lookup("job", [0.0, 1.0], 200) is None
+    assert cache.lookup("job", [1.0, 0.0], 200)["text"] == "one"
+    assert cache.lookup("job", [-1.0, 0.0], 200)["text"] == "three"
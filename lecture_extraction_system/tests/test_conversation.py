@@ -0,0 +1,100 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from conversation import build_history, update_memory, CHARS_PER_TOKEN
+from database import Base, Chat, ChatMessage
+
+
+class FakeSummarizer:
+    """summarize_many stand-in: records each text and replies with a fixed summary.
+
+    on_call(), if given, runs before the reply, e.g. to simulate another updater winning the race."""
+
+    def __init__(self, summary="folded summary", on_call=None):
+        self.summary = summary
+        self.on_call = on_call
+        self.texts = []
+
+    def summarize_many(self, items, max_tokens, temperature, priority=None):
+        self.texts.extend(item["text"] for item in items)
+        if self.on_call:
+            self.on_call()
+        return {"success": True, "results": [{"id": item["id"], "text": self.summary} for item in items]}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _chat(db, exchanges):
+    chat = Chat(title="chat")
+    db.add(chat)
+    db.commit()
+    for i in range(1, exchanges + 1):
+        db.add(ChatMessage(chat_id=chat.id, role="user", content=f"question {i}"))
+        db.add(ChatMessage(chat_id=chat.id, role="assistant", content=f"answer {i}"))
+        db.commit()
+    return chat
+
+
+def test_history_keeps_only_the_recent_turns(db):
+    chat = _chat(db, 5)
+    history = build_history(db, chat.id, turns=2)
+    assert "question 3" not in history and "answer 3" not in history
+    assert history.endswith("Student: question 4\nAssistant: answer 4\nStudent: question 5\nAssistant: answer 5")
+
+
+def test_older_turns_are_folded_once(db):
+    chat = _chat(db, 5)
+    summarizer = FakeSummarizer()
+    assert update_memory(db, chat.id, summarizer, turns=2)
+    assert len(summarizer.texts) == 1
+    assert "question 3" in summarizer.texts[0] and "question 4" not in summarizer.texts[0]
+
+    db.refresh(chat)
+    assert chat.memory_summary == "folded summary"
+    last_folded = db.query(ChatMessage.id).filter(ChatMessage.content == "answer 3").scalar()
+    assert chat.memory_message_id == last_folded
+
+    # Nothing new slid out of the window: no second call, nothing folded twice
+    assert not update_memory(db, chat.id, summarizer, turns=2)
+    assert len(summarizer.texts) == 1
+    history = build_history(db, chat.id, turns=2)
+    assert history.startswith("Summary: folded summary\n")
+    assert "question 3" not in history and "question 5" in history
+
+
+def test_update_that_loses_the_race_changes_nothing(db):
+    chat = _chat(db, 4)
+    winner_id = db.query(ChatMessage.id).filter(ChatMessage.content == "answer 2").scalar()
+
+    def other_updater_commits():
+        db.query(Chat).filter(Chat.id == chat.id).update(
+            {"memory_summary": "winner's summary", "memory_message_id": winner_id}, synchronize_session=False)
+        db.commit()
+
+    assert not update_memory(db, chat.id, FakeSummarizer("loser's summary", other_updater_commits), turns=1)
+    db.refresh(chat)
+    assert chat.memory_summary == "winner's summary"
+    assert chat.memory_message_id == winner_id
+
+
+def test_history_is_cut_to_budget_keeping_the_newest_exchange(db):
+    chat = _chat(db, 3)
+    db.add(ChatMessage(chat_id=chat.id, role="user", content="question 4"))
+    db.add(ChatMessage(chat_id=chat.id, role="assistant", content="long " * 500))
+    db.commit()
+
+    history = build_history(db, chat.id, turns=3, max_tokens=50)
+    assert len(history) <= 50 * CHARS_PER_TOKEN
+    assert "Student: question 4" in history
+    assert "question 2" not in history
@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import exporter
+from database import Base, Lecture, Transcript
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _lecture(db, rows):
+    lecture = Lecture(title="Thermodynamics", video_path="thermo.mp4", status="completed", duration=3700.0)
+    db.add(lecture)
+    db.commit()
+    db.add_all(Transcript(lecture_id=lecture.id, timestamp_start=start, timestamp_end=end, text=text)
+               for start, end, text in rows)
+    db.commit()
+    return lecture
+
+
+def test_failed_export_leaves_no_partial_files(db, tmp_path, monkeypatch):
+    lecture = _lecture(db, [(0.0, 1.0, "hello")])
+
+    def broken(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(exporter, "_frame_rows", broken)
+    paths = exporter.lecture_paths(tmp_path / "lecture_1", ["srt", "jsonl"])
+    with pytest.raises(OSError):
+        exporter.write_lecture(db, lecture, paths)
+    assert not any(path.exists() for path in paths.values())
+
+
+CAPTION_ROWS = [
+    (0.0, 1.5, "hello"),
+    (3599.5, 3661.25, "over the hour"),
+    (10.0, 5.0, "a -->b\n\nc"),   # end before start, cue-breaking text
+]
+
+
+def test_srt_and_vtt_captions(db, tmp_path):
+    lecture = _lecture(db, CAPTION_ROWS)
+    paths = exporter.lecture_paths(tmp_path, ["srt", "vtt"])
+    result = exporter.write_lecture(db, lecture, paths)
+
+    assert result["segments"] == 3
+    assert paths["srt"].read_text(encoding="utf-8") == (
+        "1\n00:00:00,000 --> 00:00:01,500\nhello\n\n"
+        "2\n00:00:10,000 --> 00:00:10,000\na ->b c\n\n"
+        "3\n00:59:59,500 --> 01:01:01,250\nover the hour\n\n"
+    )
+    assert paths["vtt"].read_text(encoding="utf-8") == (
+        "WEBVTT\n\n"
+        "00:00:00.000 --> 00:00:01.500\nhello\n\n"
+        "00:00:10.000 --> 00:00:10.000\na ->b c\n\n"
+        "00:59:59.500 --> 01:01:01.250\nover the hour\n\n"
+    )
@@ -0,0 +1,45 @@
+import pytest
+
+from generation_backends import GenerationBackend, StubBackend, PromptTooLong, pack_context, build_prompt, MIN_NEW_TOKENS
+
+
+def test_pack_context_fits_chunks_within_budget():
+    context, packing = pack_context(StubBackend(), "what is entropy", ["a b c"] * 50, 20, context_window=100)
+    prompt_tokens = StubBackend().count_tokens(build_prompt(context, "what is entropy"))
+    assert prompt_tokens + packing["max_new_tokens"] <= 100
+    assert 0 < packing["context_chunks_used"] < 50
+
+
+def test_oversize_question_is_rejected():
+    question = " ".join(["word"] * 200)
+    with pytest.raises(PromptTooLong):
+        pack_context(StubBackend(), question, ["chunk"], 50, context_window=100)
+
+
+def test_oversize_history_is_rejected():
+    history = " ".join(["turn"] * 200)
+    template = lambda c, q: build_prompt(c, q, history)
+    with pytest.raises(PromptTooLong):
+        pack_context(StubBackend(), "and again?", [], 50, context_window=100, template=template)
+
+
+def test_question_that_just_fits_keeps_minimal_answer_budget():
+    backend = StubBackend()
+    base = backend.count_tokens(build_prompt("", "short question"))
+    _, packing = pack_context(backend, "short question", [], 500, context_window=base + MIN_NEW_TOKENS + 8)
+    assert packing["max_new_tokens"] == MIN_NEW_TOKENS
+
+
+def test_backend_rejects_prompt_past_context_window():
+    backend = StubBackend()
+    with pytest.raises(PromptTooLong):
+        backend.check_fits(backend.context_window, 1)
+
+
+def test_backend_must_implement_generation():
+    class Partial(GenerationBackend):
+        def load(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from llm_client import AsyncLLMClient, CircuitBreaker, CircuitOpenError
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure()
+    assert breaker.check() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.check() is False
+
+
+def test_released_trial_lets_the_next_caller_try():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure()
+    breaker.check()
+    breaker.release()
+    assert breaker.check() is True
+
+
+def _client(handler):
+    client = AsyncLLMClient("http://backend", max_attempts=4, health_interval=0)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client._backoff = lambda *args: 0
+    return client
+
+
+def test_generate_is_not_resent_after_read_timeout():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    reply = asyncio.run(_client(handler).generate_response("question"))
+    assert not reply["success"]
+    assert len(calls) == 1
+
+
+def test_generate_is_retried_on_gateway_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"text": "answer"})
+
+    reply = asyncio.run(_client(handler).generate_response("question"))
+    assert reply["response"] == "answer"
+    assert len(calls) == 3
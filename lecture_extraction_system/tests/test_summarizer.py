@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from summarizer import split_windows, summarize_windows
+
+
+class FakeClient:
+    """Answers summarize_many with "summary N"; drop_ids leaves those items out of the reply."""
+
+    def __init__(self, drop_ids=0):
+        self.requests = []
+        self.drop_ids = drop_ids
+
+    def summarize_many(self, items, max_tokens, temperature, priority=None):
+        self.requests.append(items)
+        results = [{"id": item["id"], "text": f"summary {i}"} for i, item in enumerate(items)]
+        return {"success": True, "results": results[self.drop_ids:]}
+
+
+def test_short_lecture_is_summarized_directly():
+    client = FakeClient()
+    windows = split_windows([(0.0, 5.0, "entropy measures disorder")], window_seconds=300)
+    result = summarize_windows(client, windows, words=50)
+    assert result["success"]
+    assert len(client.requests) == 1
+    assert client.requests[0][0]["instruction"].startswith("Summarize this lecture in about 50 words")
+    assert client.requests[0][0]["text"] == "entropy measures disorder"
+
+
+def test_reply_missing_ids_fails_cleanly():
+    windows = split_windows([(0.0, 5.0, "first part"), (400.0, 405.0, "second part")], window_seconds=300)
+    result = summarize_windows(FakeClient(drop_ids=1), windows)
+    assert not result["success"]
+    assert result["error"] == "Backend reply is missing 1 summaries"
@@ -4,10 +4,11 @@ import re
 import time
 from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Optional
 import shutil
 
 import streamlit as st
+from sqlalchemy import func
 
 from config import (
     UPLOAD_DIR,
@@ -15,6 +16,10 @@ from config import (
     MAX_VIDEO_SIZE_MB,
     COLAB_API_URL,
     PROCESSED_DIR,
+    CATALOG_CACHE_TTL,
+    CHAT_WINDOW,
+    CHAT_LOAD_STEP,
+    CHAT_HTML_CACHE_SIZE,
 )
 from database import (
     init_database,
@@ -25,9 +30,19 @@ from database import (
     Query,
     Chat,
     ChatMessage,
+    ProcessingJob,
+    LectureSummary,
+    Chapter,
 )
+from catalog import STATUSES, search_lectures, lecture_counts, fingerprint, get_lecture
+from conversation import build_history, update_memory_in_background
+from job_queue import enqueue_lecture, enqueue_summary, request_cancel, latest_job, ACTIVE_STATUSES
 from lecture_processor import LectureProcessor
 from llm_client import LLMClient
+from job_watcher import JobWatcher
+from video_processor import save_video_stream
+from frame_store import lecture_frame_paths, release_frames
+from storage import archive_file, refresh_sharing_lectures, set_artifact
 
 
 init_database()
@@ -54,6 +69,12 @@ def get_llm_client() -> LLMClient:
     return st.session_state.llm_client
 
 
+@st.cache_resource
+def get_job_watcher() -> JobWatcher:
+    # Shared by every session so concurrent viewers of a job reuse one backend stream
+    return JobWatcher()
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Page config & styles
 # ─────────────────────────────────────────────────────────────────────────────
@@ -257,7 +278,8 @@ def connection_modal():
         st.session_state.api_url = COLAB_API_URL
 
     st.markdown("**Backend URL**")
-    st.caption("Paste the ngrok URL from your Colab session. The server must expose `/health`, `/upload`, and `/generate`.")
+    st.caption("Paste the ngrok URL from your Colab session. The server must expose `/health`, `/upload`, `/index`, and `/generate`. "
+               "Separate several backend URLs with commas to spread uploads across them.")
 
     api_url = st.text_input(
         "Server URL",
@@ -275,6 +297,11 @@ def connection_modal():
             with st.spinner("Checking..."):
                 ok = client.test_connection()
             st.session_state.backend_ok = ok
+            backends = client.backend_status()
+            if len(backends) > 1:
+                for b in backends:
+                    icon = "✅" if b["healthy"] else "⚠️"
+                    st.caption(f"{icon} {b['url']} — {b['active_jobs']} active jobs")
             if ok:
                 st.success("Connected! Closing...")
                 time.sleep(0.8)
@@ -324,13 +351,12 @@ def render_top_nav():
 # Helpers
 # ─────────────────────────────────────────────────────────────────────────────
 
-def save_uploaded_video(uploaded_file) -> Path:
+def save_uploaded_video(uploaded_file) -> dict:
+    """Stream the upload to disk in chunks (hash + ffprobe in the same pass)."""
     timestamp = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     safe_name = uploaded_file.name.replace(" ", "_")
     dest = UPLOAD_DIR / f"{timestamp}_{safe_name}"
-    with open(dest, "wb") as f:
-        f.write(uploaded_file.read())
-    return dest
+    return save_video_stream(uploaded_file, dest)
 
 
 def human_duration(seconds: float) -> str:
@@ -352,9 +378,111 @@ def status_pill(status: str) -> str:
     return f'<span class="lec-pill {cls}">{status.title()}</span>'
 
 
-def load_lectures() -> List[Lecture]:
+def clock(seconds: float) -> str:
+    seconds = int(seconds or 0)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def catalog_version() -> tuple:
     with db_session() as db:
-        return db.query(Lecture).order_by(Lecture.uploaded_at.desc()).all()
+        return fingerprint(db)
+
+
+@st.cache_data(ttl=CATALOG_CACHE_TTL, show_spinner=False, max_entries=200)
+def load_lecture_page(version: tuple, search: str, statuses: tuple, date_from, date_to, page: int) -> dict:
+    """One catalog page plus its counts. version is catalog.fingerprint(), so any change to the data misses the cache."""
+    with db_session() as db:
+        result = search_lectures(db, search, statuses, date_from, date_to, page)
+        result["counts"] = lecture_counts(db, [lec.id for lec in result["lectures"]])
+    return result
+
+
+def _turn_page(key: str, step: int):
+    st.session_state[f"{key}_page"] = st.session_state.get(f"{key}_page", 0) + step
+
+
+def lecture_picker(key: str, label: str, filters: bool = True, table: bool = False):
+    """Search, filter and page through the lecture catalog.
+
+    Returns (catalog.LectureEntry, counts) for the chosen lecture, (None, None) when nothing matches,
+    and (None, 0) when there are no lectures at all."""
+    version = catalog_version()
+    if not version[0]:
+        return None, 0
+
+    if filters:
+        c1, c2, c3 = st.columns([3, 2, 2])
+        with c1:
+            search = st.text_input("Search", key=f"{key}_search", placeholder="Title words or #id")
+        with c2:
+            statuses = st.multiselect("Status", STATUSES, key=f"{key}_status")
+        with c3:
+            dates = st.date_input("Uploaded between", value=(), key=f"{key}_dates")
+    else:
+        search = st.text_input("Search lectures", key=f"{key}_search", placeholder="Title words or #id")
+        statuses, dates = [], ()
+    dates = tuple(dates) if isinstance(dates, (list, tuple)) else (dates,)
+    date_from = dates[0] if dates else None
+    date_to = dates[1] if len(dates) > 1 else date_from
+
+    criteria = (search.strip(), tuple(statuses), date_from, date_to)
+    if st.session_state.get(f"{key}_criteria") != criteria:
+        st.session_state[f"{key}_criteria"] = criteria
+        st.session_state[f"{key}_page"] = 0
+
+    result = load_lecture_page(version, *criteria, st.session_state.get(f"{key}_page", 0))
+    st.session_state[f"{key}_page"] = result["page"]
+    lectures, counts = result["lectures"], result["counts"]
+    if not lectures:
+        st.info("No lectures match this search.")
+        return None, None
+
+    if table:
+        st.dataframe(
+            [
+                {
+                    "ID": lec.id,
+                    "Title": lec.title,
+                    "Status": lec.status,
+                    "Uploaded": lec.uploaded_at.strftime("%Y-%m-%d %H:%M"),
+                    "Duration": human_duration(lec.duration),
+                    "Segments": counts.get(lec.id, {}).get("transcripts", 0),
+                    "Frames": counts.get(lec.id, {}).get("frames", 0),
+                    "Questions": counts.get(lec.id, {}).get("queries", 0),
+                }
+                for lec in lectures
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    if result["pages"] > 1:
+        prev_col, info_col, next_col = st.columns([1, 3, 1])
+        with prev_col:
+            st.button("◀ Newer", key=f"{key}_prev", on_click=_turn_page, args=(key, -1),
+                      disabled=result["page"] == 0, use_container_width=True)
+        with info_col:
+            st.caption(f"Page {result['page'] + 1} of {result['pages']} · {result['total']} lectures")
+        with next_col:
+            st.button("Older ▶", key=f"{key}_next", on_click=_turn_page, args=(key, 1),
+                      disabled=result["page"] >= result["pages"] - 1, use_container_width=True)
+
+    ids = [lec.id for lec in lectures]
+    current = st.session_state.get("selected_lecture_id")
+    by_id = {lec.id: lec for lec in lectures}
+    chosen = st.selectbox(
+        label,
+        options=ids,
+        index=ids.index(current) if current in by_id else 0,
+        format_func=lambda lid: f"#{lid} — {by_id[lid].title} ({by_id[lid].status})",
+    )
+    st.session_state.selected_lecture_id = chosen
+    # The page may be cached from before this session's last change (e.g. a new rag_job_id); the chosen row is not
+    with db_session() as db:
+        selected = get_lecture(db, chosen) or by_id[chosen]
+    return selected, counts.get(chosen, {"transcripts": 0, "frames": 0, "queries": 0})
 
 
 def remove_lecture(lecture_id: int, video_path: str, rag_job_id: Optional[str]) -> Optional[str]:
@@ -366,8 +494,13 @@ def remove_lecture(lecture_id: int, video_path: str, rag_job_id: Optional[str])
         for chat in chats:
             db.query(ChatMessage).filter(ChatMessage.chat_id == chat.id).delete()
         db.query(Chat).filter(Chat.lecture_id == lecture_id).delete()
+        request_cancel(db, lecture_id)
+        frame_paths = lecture_frame_paths(db, lecture_id)
         db.delete(lecture)
         db.commit()
+        release_frames(db, frame_paths)
+        refresh_sharing_lectures(db, frame_paths)
+    archive_file(lecture_id).unlink(missing_ok=True)
 
     if rag_job_id:
         get_llm_client().delete_job(rag_job_id)
@@ -375,6 +508,7 @@ def remove_lecture(lecture_id: int, video_path: str, rag_job_id: Optional[str])
     lecture_job_ids = st.session_state.get("lecture_job_ids", {})
     lecture_job_ids.pop(lecture_id, None)
     st.session_state.lecture_job_ids = lecture_job_ids
+    stop_job_watch(lecture_id)
 
     if video_path and Path(video_path).exists():
         try:
@@ -392,13 +526,180 @@ def remove_lecture(lecture_id: int, video_path: str, rag_job_id: Optional[str])
     return None
 
 
+def record_rag_job(lecture_id: int, job_id: str):
+    with db_session() as db:
+        lec = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+        if lec:
+            lec.rag_job_id = job_id
+            db.commit()
+    lecture_job_ids = st.session_state.get("lecture_job_ids", {})
+    lecture_job_ids[lecture_id] = job_id
+    st.session_state.lecture_job_ids = lecture_job_ids
+    st.session_state.job_id = job_id
+
+
+def start_job_watch(lecture_id: int, job_id: str):
+    pending = st.session_state.get("pending_rag_jobs", {})
+    pending[lecture_id] = job_id
+    st.session_state.pending_rag_jobs = pending
+    get_job_watcher().watch(get_llm_client().api_url, job_id)
+
+
+def stop_job_watch(lecture_id: int):
+    job_id = st.session_state.get("pending_rag_jobs", {}).pop(lecture_id, None)
+    if job_id:
+        get_job_watcher().forget(job_id)
+
+
+def add_lecture_notice(lecture_id: int, level: str, text: str):
+    """Show st.<level>(text) on the lecture's next render, so it survives st.rerun()."""
+    st.session_state.setdefault("lecture_notices", {})[lecture_id] = (level, text)
+
+
+def show_lecture_notice(lecture_id: int):
+    notice = st.session_state.get("lecture_notices", {}).pop(lecture_id, None)
+    if notice:
+        level, text = notice
+        getattr(st, level)(text)
+
+
+@st.fragment(run_every=1)
+def render_job_progress(lecture_id: int, job_id: str):
+    """Non-blocking RAG progress view. Reads the shared watcher's in-memory state only,
+    so it costs nothing on the backend and survives reruns."""
+    watcher = get_job_watcher()
+    event = watcher.get(job_id)
+    if event is None or (not watcher.is_watching(job_id) and event.get("status") not in ("completed", "failed")):
+        # Lost after a server restart — pick the stream back up
+        watcher.watch(get_llm_client().api_url, job_id)
+        event = watcher.get(job_id) or {}
+
+    status = event.get("status", "")
+    notices = st.session_state.get("lecture_notices", {})
+    st.session_state.lecture_notices = notices
+
+    if not event.get("success", True):
+        st.session_state.backend_ok = False
+        notices[lecture_id] = ("warning", "Lost connection while checking RAG status.")
+        stop_job_watch(lecture_id)
+        st.rerun()
+    elif status == "completed":
+        record_rag_job(lecture_id, job_id)
+        notices[lecture_id] = ("success", "RAG indexing complete. Lecture is ready for Q&A!")
+        stop_job_watch(lecture_id)
+        st.rerun()
+    elif status == "failed":
+        notices[lecture_id] = ("warning", f"RAG indexing failed: {event.get('error') or 'unknown error'}")
+        stop_job_watch(lecture_id)
+        st.rerun()
+
+    progress = max(0, min(100, int(event.get("progress") or 0)))
+    st.progress(progress, text=f"⏳ {event.get('message') or 'Processing…'}")
+
+
+@st.fragment(run_every=2)
+def render_processing_queue():
+    """Progress of queued/running local jobs, read from the processing_jobs table."""
+    with db_session() as db:
+        rows = (
+            db.query(ProcessingJob, Lecture.title)
+            .join(Lecture, Lecture.id == ProcessingJob.lecture_id)
+            .filter(ProcessingJob.status.in_(ACTIVE_STATUSES))
+            .order_by(ProcessingJob.id.asc())
+            .all()
+        )
+        jobs = [(job.id, job.lecture_id, title, job.kind or "process", job.status, job.progress or 0, job.message or "")
+                for job, title in rows]
+
+    if not jobs:
+        return
+
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown("**Local processing queue**")
+    st.caption("Jobs run in the background worker (`python worker.py`) — closing this tab does not stop them.")
+    for job_id, lecture_id, title, kind, status, progress, message in jobs:
+        bar_col, btn_col = st.columns([5, 1])
+        with bar_col:
+            label = "Waiting for worker…" if status == "queued" else message
+            if kind == "summary":
+                label = f"Summary · {label}"
+            st.progress(max(0, min(100, progress)), text=f"#{lecture_id} {title} — {label}")
+        with btn_col:
+            if st.button("✕ Cancel", key=f"cancel_job_{job_id}", use_container_width=True):
+                with db_session() as db:
+                    request_cancel(db, lecture_id)
+                st.rerun(scope="fragment")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+def import_backend_result(lecture_id: int, job_id: str, progress_callback=None) -> Optional[str]:
+    """Pull /result for a finished RAG job into the local Transcript/Frame tables."""
+    result = get_llm_client().get_job_result(job_id)
+    if not result.get("success"):
+        return result.get("error", "Could not fetch backend result")
+
+    with db_session() as db:
+        ok = LectureProcessor().import_job_result(lecture_id, result["data"], db, progress_callback)
+    return None if ok else "Import failed. Check the logs."
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Chat rendering
 # ─────────────────────────────────────────────────────────────────────────────
 
-def render_chat_messages(messages: list, client: LLMClient):
-    """Render message history with styled bubbles. For assistant messages that have
-    a stored clip_id, embed the video player directly below the bubble."""
+@st.cache_data(max_entries=CHAT_HTML_CACHE_SIZE, show_spinner=False)
+def message_html(message_id: int, created_at: datetime.datetime, _role: str, _content: str, _timestamp_label: Optional[str]) -> str:
+    """Bubble HTML for one stored message. Messages never change once saved, so only id and creation
+    time are hashed (the time guards against SQLite reusing the id of a deleted message)."""
+    time_str = created_at.strftime("%H:%M")
+    escaped = html.escape(_content or "")
+
+    if _role == "user":
+        return f"""
+        <div class="msg-user-row">
+            <div>
+                <div class="bub-user">{escaped}</div>
+                <div class="msg-time msg-time-r">{time_str}</div>
+            </div>
+            <div class="avatar av-user">👤</div>
+        </div>
+        """
+
+    ts_html = ""
+    if _timestamp_label:
+        ts_html = f'<div><span class="ts-pill">📍 {html.escape(_timestamp_label)}</span></div>'
+
+    return f"""
+    <div class="msg-assist-row">
+        <div class="avatar av-ai">🤖</div>
+        <div>
+            <div class="bub-assist">{escaped}</div>
+            {ts_html}
+            <div class="msg-time">{time_str}</div>
+        </div>
+    </div>
+    """
+
+
+def load_chat_window(db, chat_id: int, limit: int) -> tuple:
+    """(last `limit` messages in order, total message count) — earlier messages are not loaded."""
+    total = db.query(func.count(ChatMessage.id)).filter(ChatMessage.chat_id == chat_id).scalar() or 0
+    newest = (
+        db.query(ChatMessage)
+        .filter(ChatMessage.chat_id == chat_id)
+        .order_by(ChatMessage.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return newest[::-1], total
+
+
+def render_chat_messages(messages: list, client: LLMClient, chat_id: int = None, total: int = None):
+    """Render the loaded window of message history with styled bubbles.
+
+    Runs of messages go out as one markdown block built from cached per-message HTML.
+    Assistant messages with a stored clip_id get a toggle; the player (and its clip URL)
+    is only created once the toggle is switched on."""
 
     if not messages:
         st.markdown("""
@@ -411,50 +712,39 @@ def render_chat_messages(messages: list, client: LLMClient):
         """, unsafe_allow_html=True)
         return
 
+    total = total if total is not None else len(messages)
+    if total > len(messages) and chat_id is not None:
+        info_col, btn_col = st.columns([3, 1])
+        with info_col:
+            st.caption(f"Showing the last {len(messages)} of {total} messages")
+        with btn_col:
+            if st.button("⬆ Load earlier", key=f"chat_earlier_{chat_id}", use_container_width=True):
+                st.session_state[f"chat_window_{chat_id}"] = len(messages) + CHAT_LOAD_STEP
+                st.rerun()
+
     backend_ok = st.session_state.get("backend_ok", False)
 
+    pending = []
     for msg in messages:
-        time_str = msg.created_at.strftime("%H:%M")
-        escaped = html.escape(msg.content or "")
-
-        if msg.role == "user":
-            st.markdown(f"""
-            <div class="msg-user-row">
-                <div>
-                    <div class="bub-user">{escaped}</div>
-                    <div class="msg-time msg-time-r">{time_str}</div>
-                </div>
-                <div class="avatar av-user">👤</div>
-            </div>
-            """, unsafe_allow_html=True)
-
+        pending.append(message_html(msg.id, msg.created_at, msg.role, msg.content, msg.timestamp_label))
+        if msg.role == "user" or not msg.clip_id:
+            continue
+
+        st.markdown("".join(pending), unsafe_allow_html=True)
+        pending = []
+        # Embed clip on demand — stored clip_id persists across page loads
+        if backend_ok:
+            _, video_col, _ = st.columns([1, 10, 1])
+            with video_col:
+                if st.toggle(f"📹 Relevant lecture clip · {msg.timestamp_label or ''}", key=f"clip_{msg.id}"):
+                    st.video(client.get_clip_url(msg.clip_id))
         else:
-            ts_html = ""
-            if msg.timestamp_label:
-                ts_html = f'<div><span class="ts-pill">📍 {html.escape(msg.timestamp_label)}</span></div>'
-
-            st.markdown(f"""
-            <div class="msg-assist-row">
-                <div class="avatar av-ai">🤖</div>
-                <div>
-                    <div class="bub-assist">{escaped}</div>
-                    {ts_html}
-                    <div class="msg-time">{time_str}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+            _, note_col = st.columns([1, 10])
+            with note_col:
+                st.caption(f"📍 Clip available at {msg.timestamp_label} — connect to backend to play.")
 
-            # Embed clip when available — stored clip_id persists across page loads
-            if msg.clip_id and backend_ok:
-                clip_url = client.get_clip_url(msg.clip_id)
-                _, video_col, _ = st.columns([1, 10, 1])
-                with video_col:
-                    st.caption(f"📹 Relevant lecture clip · {msg.timestamp_label or ''}")
-                    st.video(clip_url)
-            elif msg.clip_id and not backend_ok:
-                _, note_col = st.columns([1, 10])
-                with note_col:
-                    st.caption(f"📍 Clip available at {msg.timestamp_label} — connect to backend to play.")
+    if pending:
+        st.markdown("".join(pending), unsafe_allow_html=True)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -471,15 +761,47 @@ def upload_and_process_page():
             video_path = lec.video_path if lec else ""
             rag_job_id = (lec.rag_job_id if lec else None) or st.session_state.get("lecture_job_ids", {}).get(lid)
 
+        pending_job = st.session_state.get("pending_rag_jobs", {}).get(lid)
+        show_lecture_notice(lid)
+
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.markdown("**Lecture saved.** Choose what to do next:")
-        c1, c2 = st.columns(2)
-        with c1:
-            start_local = st.button("▶ Run local processing", type="primary", use_container_width=True)
+        if pending_job:
+            st.caption("RAG indexing is running on the AI backend — you can keep using the app meanwhile.")
+            render_job_progress(lid, pending_job)
+        if rag_job_id:
+            st.caption("The backend already transcribed and OCR'd this video — importing its results skips local processing.")
+            c0, c1, c2 = st.columns(3)
+            with c0:
+                import_remote = st.button("⬇ Import backend results", type="primary", use_container_width=True)
+            with c1:
+                start_local = st.button("▶ Run local processing", use_container_width=True)
+        else:
+            import_remote = False
+            c1, c2 = st.columns(2)
+            with c1:
+                start_local = st.button("▶ Run local processing", type="primary", use_container_width=True)
         with c2:
             cancel = st.button("✕ Remove lecture", use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
+        if import_remote:
+            progress_bar = st.progress(0)
+            status_ph = st.empty()
+
+            def import_progress(message: str, value: int):
+                status_ph.write(message)
+                progress_bar.progress(max(0, min(100, value)))
+
+            err = import_backend_result(lid, rag_job_id, import_progress)
+            if err:
+                st.error(err)
+            else:
+                del st.session_state.after_rag_lecture_id
+                del st.session_state.after_rag_dest_path
+                st.success("Backend results imported. Lecture is ready.")
+                return
+
         if cancel:
             remove_lecture(lid, video_path, rag_job_id)
             del st.session_state.after_rag_lecture_id
@@ -487,36 +809,13 @@ def upload_and_process_page():
             st.success("Lecture removed.")
             st.rerun()
         if start_local:
+            with db_session() as db:
+                enqueue_lecture(db, lid, dpath)
             del st.session_state.after_rag_lecture_id
             del st.session_state.after_rag_dest_path
-            st.session_state.run_processor_lecture_id = lid
-            st.session_state.run_processor_dest_path = dpath
             st.rerun()
 
-    if st.session_state.get("run_processor_lecture_id"):
-        lid = st.session_state.run_processor_lecture_id
-        dpath = st.session_state.run_processor_dest_path
-        del st.session_state.run_processor_lecture_id
-        del st.session_state.run_processor_dest_path
-
-        progress_bar = st.progress(0)
-        status_ph = st.empty()
-
-        def progress_callback(message: str, value: int):
-            status_ph.write(message)
-            progress_bar.progress(max(0, min(100, value)))
-
-        processor = LectureProcessor()
-        with db_session() as db:
-            ok = processor.process_lecture(lid, dpath, db, progress_callback)
-
-        if ok:
-            progress_bar.progress(100)
-            status_ph.write("Complete.")
-            st.success("Lecture processed successfully.")
-        else:
-            st.error("Processing failed. Check the logs.")
-        return
+    render_processing_queue()
 
     # ── Main upload UI ──
     st.markdown('<div class="pg-title">Upload Lecture</div>', unsafe_allow_html=True)
@@ -577,18 +876,28 @@ def upload_and_process_page():
         return
 
     with st.spinner("Saving video…"):
-        dest_path = save_uploaded_video(uploaded)
+        saved = save_uploaded_video(uploaded)
+    if not saved["success"]:
+        st.error(saved["error"])
+        return
+    dest_path = saved["path"]
 
     with db_session() as db:
+        duplicate = db.query(Lecture).filter(Lecture.content_hash == saved["sha256"]).first()
+        if duplicate:
+            st.info(f"This video was already uploaded as lecture #{duplicate.id} ({duplicate.title}).")
         lecture = Lecture(
             title=Path(uploaded.name).stem,
             video_path=str(dest_path),
+            duration=saved.get("duration"),
             status="uploaded",
+            content_hash=saved["sha256"],
         )
         db.add(lecture)
         db.commit()
         db.refresh(lecture)
         lecture_id = lecture.id
+        set_artifact(db, lecture_id, "video", 1, Path(dest_path).stat().st_size)
 
     client = get_llm_client()
     with st.spinner("Uploading to AI backend for RAG indexing…"):
@@ -603,43 +912,7 @@ def upload_and_process_page():
         st.rerun()
         return
 
-    job_id = upload_result.get("job_id")
-    status_ph = st.empty()
-    progress_bar = st.progress(0)
-
-    while True:
-        status_result = client.get_job_status(job_id)
-        if not status_result.get("success"):
-            st.session_state.backend_ok = False
-            st.warning("Lost connection while checking RAG status.")
-            break
-
-        status = status_result.get("status", "")
-        progress = status_result.get("progress", 0)
-        message = status_result.get("message", "")
-        status_ph.write(f"⏳ {message}")
-        progress_bar.progress(max(0, min(100, progress)))
-
-        if status == "completed":
-            lecture_job_ids = st.session_state.get("lecture_job_ids", {})
-            lecture_job_ids[lecture_id] = job_id
-            st.session_state.lecture_job_ids = lecture_job_ids
-            st.session_state.job_id = job_id
-            with db_session() as db:
-                lec = db.query(Lecture).filter(Lecture.id == lecture_id).first()
-                if lec:
-                    lec.rag_job_id = job_id
-                    db.commit()
-            progress_bar.progress(100)
-            status_ph.write("✅ RAG indexing complete.")
-            st.success("Lecture is ready for Q&A!")
-            break
-
-        if status == "failed":
-            st.warning(f"RAG indexing failed: {status_result.get('error', 'unknown error')}")
-            break
-
-        time.sleep(2)
+    start_job_watch(lecture_id, upload_result.get("job_id"))
 
     st.session_state.after_rag_lecture_id = lecture_id
     st.session_state.after_rag_dest_path = str(dest_path)
@@ -657,8 +930,8 @@ def past_lectures_page():
         unsafe_allow_html=True,
     )
 
-    lectures = load_lectures()
-    if not lectures:
+    selected, counts = lecture_picker("past", "Select lecture", table=True)
+    if counts == 0:
         st.markdown("""
         <div class="empty-state">
             <div class="empty-icon">📚</div>
@@ -666,15 +939,8 @@ def past_lectures_page():
         </div>
         """, unsafe_allow_html=True)
         return
-
-    options = [f"#{lec.id} — {lec.title}" for lec in lectures]
-    idx = st.selectbox(
-        "Select lecture",
-        options=list(range(len(lectures))),
-        format_func=lambda i: options[i],
-    )
-    selected = lectures[idx]
-    st.session_state.selected_lecture_id = selected.id
+    if selected is None:
+        return
 
     # Info card
     st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -705,10 +971,7 @@ def past_lectures_page():
 
     st.write("")
 
-    with db_session() as db:
-        t_count = db.query(Transcript).filter(Transcript.lecture_id == selected.id).count()
-        f_count = db.query(Frame).filter(Frame.lecture_id == selected.id).count()
-        q_count = db.query(Query).filter(Query.lecture_id == selected.id).count()
+    t_count, f_count, q_count = counts["transcripts"], counts["frames"], counts["queries"]
 
     job_id = selected.rag_job_id or st.session_state.get("lecture_job_ids", {}).get(selected.id)
 
@@ -728,48 +991,44 @@ def past_lectures_page():
             )
 
     st.write("")
-    act1, act2, _ = st.columns([1, 1, 3])
+    act1, act2, act3, act4, _ = st.columns([1, 1, 1, 1, 1])
+
+    pending_job = st.session_state.get("pending_rag_jobs", {}).get(selected.id)
 
     with act1:
-        if not job_id and st.button("☁ Register for RAG", use_container_width=True):
+        if not job_id and not pending_job and st.button("☁ Register for RAG", use_container_width=True):
             video_path = Path(selected.video_path)
-            if not video_path.exists():
+            client = get_llm_client()
+            upload_result = None
+            if t_count or f_count:
+                # Already transcribed/OCR'd locally — send text only instead of the video
+                with db_session() as db:
+                    transcripts = (
+                        db.query(Transcript)
+                        .filter(Transcript.lecture_id == selected.id)
+                        .order_by(Transcript.timestamp_start)
+                        .all()
+                    )
+                    frames = (
+                        db.query(Frame)
+                        .filter(Frame.lecture_id == selected.id)
+                        .order_by(Frame.timestamp)
+                        .all()
+                    )
+                    with st.spinner("Sending extracted text to AI backend…"):
+                        upload_result = client.index_lecture(transcripts, frames, selected.duration)
+            elif not video_path.exists():
                 st.error("Video file not found on disk.")
             else:
-                client = get_llm_client()
                 with st.spinner("Uploading to AI backend…"):
                     upload_result = client.upload_video(str(video_path))
+            if upload_result is not None:
                 if not upload_result.get("success"):
                     st.session_state.backend_ok = False
                     st.error(upload_result.get("error", "Upload failed."))
                 else:
-                    new_job_id = upload_result.get("job_id")
-                    sts = st.empty()
-                    prg = st.progress(0)
-                    while True:
-                        sr = client.get_job_status(new_job_id)
-                        if not sr.get("success"):
-                            st.warning("Lost connection.")
-                            break
-                        prg.progress(max(0, min(100, sr.get("progress", 0))))
-                        sts.write(sr.get("message", ""))
-                        if sr.get("status") == "completed":
-                            with db_session() as db:
-                                lec = db.query(Lecture).filter(Lecture.id == selected.id).first()
-                                if lec:
-                                    lec.rag_job_id = new_job_id
-                                    db.commit()
-                            ids = st.session_state.get("lecture_job_ids", {})
-                            ids[selected.id] = new_job_id
-                            st.session_state.lecture_job_ids = ids
-                            prg.progress(100)
-                            sts.write("Done.")
-                            st.success(f"RAG indexed. Job: {new_job_id[:8]}…")
-                            st.rerun()
-                        if sr.get("status") == "failed":
-                            st.warning(f"Indexing failed: {sr.get('error', '')}")
-                            break
-                        time.sleep(2)
+                    start_job_watch(selected.id, upload_result.get("job_id"))
+                    st.rerun()
 
     with act2:
         if st.button("🗑 Remove lecture", use_container_width=True):
@@ -780,6 +1039,75 @@ def past_lectures_page():
                 st.success("Lecture and all data removed.")
                 st.rerun()
 
+    with db_session() as db:
+        local_job = latest_job(db, selected.id)
+        local_job_status = local_job.status if local_job else None
+
+    with act3:
+        if local_job_status in ACTIVE_STATUSES:
+            if st.button("✕ Cancel local processing", use_container_width=True):
+                with db_session() as db:
+                    request_cancel(db, selected.id)
+                st.rerun()
+        elif not t_count and Path(selected.video_path).exists() and st.button("▶ Process locally", use_container_width=True):
+            with db_session() as db:
+                enqueue_lecture(db, selected.id, selected.video_path)
+            add_lecture_notice(selected.id, "success", "Queued for the background worker.")
+            st.rerun()
+
+    with act4:
+        if job_id and not t_count and st.button("⬇ Import backend results", use_container_width=True):
+            with st.spinner("Importing transcript and OCR from backend…"):
+                err = import_backend_result(selected.id, job_id)
+            if err:
+                st.error(err)
+            else:
+                add_lecture_notice(selected.id, "success", "Backend results imported.")
+                st.rerun()
+
+    show_lecture_notice(selected.id)
+    if pending_job:
+        render_job_progress(selected.id, pending_job)
+    if local_job_status in ACTIVE_STATUSES:
+        render_processing_queue()
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    render_lecture_digest(selected.id, t_count)
+
+
+def render_lecture_digest(lecture_id: int, t_count: int):
+    """Summary and chapters stored by the ingest summary job — read from SQLite, no LLM call."""
+    with db_session() as db:
+        digest = db.query(LectureSummary).filter(LectureSummary.lecture_id == lecture_id).first()
+        chapters = db.query(Chapter).filter(Chapter.lecture_id == lecture_id).order_by(Chapter.position).all()
+        summary_job = latest_job(db, lecture_id, kind="summary")
+        summary_status = summary_job.status if summary_job else None
+        summary_error = summary_job.error if summary_job else None
+
+    if not digest and not t_count:
+        return
+
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown("**Summary**")
+    if digest:
+        st.write(digest.summary)
+        if chapters:
+            st.markdown("**Chapters**")
+            for ch in chapters:
+                with st.expander(f"{clock(ch.start)} · {ch.title}"):
+                    st.caption(f"{clock(ch.start)} – {clock(ch.end)}")
+                    st.write(ch.summary or "")
+    elif summary_status in ACTIVE_STATUSES:
+        st.caption("Summary and chapters are being generated in the background worker.")
+    else:
+        if summary_status == "failed":
+            st.caption(f"Last summary attempt failed: {summary_error or 'unknown error'}")
+        if st.button("✨ Generate summary & chapters", key=f"digest_{lecture_id}"):
+            with db_session() as db:
+                enqueue_summary(db, lecture_id, get_llm_client().api_url)
+            add_lecture_notice(lecture_id, "success", "Summary queued for the background worker.")
+            st.rerun()
     st.markdown("</div>", unsafe_allow_html=True)
 
 
@@ -795,8 +1123,8 @@ def qa_page():
         unsafe_allow_html=True,
     )
 
-    lectures = load_lectures()
-    if not lectures:
+    selected, counts = lecture_picker("qa", "Lecture", filters=False)
+    if counts == 0:
         st.markdown("""
         <div class="empty-state">
             <div class="empty-icon">🎬</div>
@@ -804,19 +1132,8 @@ def qa_page():
         </div>
         """, unsafe_allow_html=True)
         return
-
-    default_id = st.session_state.get("selected_lecture_id", lectures[0].id)
-    default_index = next((i for i, lec in enumerate(lectures) if lec.id == default_id), 0)
-
-    options = [f"#{lec.id} — {lec.title} ({lec.status})" for lec in lectures]
-    idx = st.selectbox(
-        "Lecture",
-        options=list(range(len(lectures))),
-        index=default_index,
-        format_func=lambda i: options[i],
-    )
-    selected = lectures[idx]
-    st.session_state.selected_lecture_id = selected.id
+    if selected is None:
+        return
 
     client = get_llm_client()
 
@@ -836,18 +1153,14 @@ def qa_page():
             db.commit()
             db.refresh(chat)
 
-        messages = (
-            db.query(ChatMessage)
-            .filter(ChatMessage.chat_id == chat.id)
-            .order_by(ChatMessage.created_at.asc())
-            .all()
-        )
+        chat_id = chat.id
+        messages, total = load_chat_window(db, chat_id, st.session_state.get(f"chat_window_{chat_id}", CHAT_WINDOW))
 
     if context:
-        st.caption(f"📄 Local context: {len(context):,} characters · {len(messages) // 2} exchange(s) saved")
+        st.caption(f"📄 Local context: {len(context):,} characters · {total // 2} exchange(s) saved")
 
     # ── Chat history ──
-    render_chat_messages(messages, client)
+    render_chat_messages(messages, client, chat_id, total)
 
     # ── Input area ──
     st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -871,16 +1184,21 @@ def qa_page():
 
     with st.spinner("Thinking…"):
         job_id = selected.rag_job_id or st.session_state.get("lecture_job_ids", {}).get(selected.id)
+        with db_session() as db:
+            history = build_history(db, chat_id)
         result = client.generate_response(
             prompt=question.strip(),
             context=context,
             max_tokens=max_tokens,
             temperature=temperature,
             job_id=job_id,
+            history=history,
         )
 
     if not result["success"]:
-        st.session_state.backend_ok = False
+        # Transient errors were already retried; only an open breaker means the backend is down
+        if client.breaker_state() != "closed":
+            st.session_state.backend_ok = False
         st.error(result.get("error") or "Backend returned an error.")
         return
 
@@ -922,7 +1240,10 @@ def qa_page():
         )
         db.add_all([user_msg, asst_msg, q])
         db.commit()
+        chat_id = chat.id
 
+    # Fold exchanges that left the recent window into the chat's rolling summary
+    update_memory_in_background(chat_id, client)
     st.rerun()
 
 
@@ -1,9 +1,153 @@
 import cv2
 import os
+import json
+import hashlib
+import subprocess
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Tuple, BinaryIO, Dict, Any, Optional
 import numpy as np
-from config import FRAME_EXTRACTION_RATE, PROCESSED_DIR
+from config import FRAME_EXTRACTION_RATE, VIDEO_FORMATS, MAX_VIDEO_SIZE_MB, UPLOAD_CHUNK_SIZE
+from frame_store import FrameStore
+
+# ffprobe format_name fragments accepted for each supported extension
+PROBE_FORMATS = {
+    ".mp4": "mp4", ".mov": "mov", ".mkv": "matroska", ".webm": "webm", ".avi": "avi",
+}
+
+
+def sniff_container(header: bytes) -> Optional[str]:
+    """Identify the container from the first bytes of a file."""
+    if len(header) >= 12 and header[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide"):
+        return "mov"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        return "matroska"
+    if header.startswith(b"RIFF") and header[8:12] == b"AVI ":
+        return "avi"
+    return None
+
+
+def _parse_probe(output: bytes) -> Dict[str, Any]:
+    try:
+        fmt = json.loads(output or b"{}").get("format", {})
+        duration = fmt.get("duration")
+        return {"format": fmt.get("format_name"), "duration": float(duration) if duration not in (None, "N/A") else None}
+    except (ValueError, TypeError):
+        return {"format": None, "duration": None}
+
+
+def probe_video(path: str) -> Dict[str, Any]:
+    """Container name and duration via ffprobe; empty values if ffprobe is unavailable."""
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=format_name,duration", "-of", "json", path],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=60,
+        )
+        return _parse_probe(result.stdout)
+    except Exception:
+        return {"format": None, "duration": None}
+
+
+def file_sha256(path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def save_video_stream(src: BinaryIO, dest: Path, max_size_mb: float = MAX_VIDEO_SIZE_MB,
+                      chunk_size: int = UPLOAD_CHUNK_SIZE) -> Dict[str, Any]:
+    """Copy a video to dest in fixed-size chunks, hashing and probing it in the same pass.
+
+    Data goes to a .part file that is only renamed into place once the size,
+    container sniff and ffprobe checks pass, so a rejected upload never lands
+    in the uploads directory and the file is never held fully in memory."""
+    ext = dest.suffix.lower()
+    if ext not in VIDEO_FORMATS:
+        return {"success": False, "error": "Unsupported video format."}
+
+    max_bytes = int(max_size_mb * 1024 * 1024)
+    part_path = dest.with_name(dest.name + ".part")
+    sha256 = hashlib.sha256()
+    header = b""
+    size = 0
+
+    # Feed the same chunks to ffprobe on stdin; it exits as soon as it has the header info
+    try:
+        probe = subprocess.Popen(
+            ["ffprobe", "-v", "error", "-show_entries", "format=format_name,duration", "-of", "json", "-i", "pipe:0"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+    except (FileNotFoundError, OSError):
+        probe = None
+
+    def abort(error: str) -> Dict[str, Any]:
+        if probe is not None:
+            probe.kill()
+            probe.wait()
+        part_path.unlink(missing_ok=True)
+        return {"success": False, "error": error}
+
+    try:
+        if hasattr(src, "seek"):
+            src.seek(0)
+        with open(part_path, "wb") as out:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                if len(header) < 16:
+                    header += chunk[:16 - len(header)]
+                    if len(header) == 16 and sniff_container(header) is None:
+                        return abort("File does not look like a supported video container.")
+                size += len(chunk)
+                if size > max_bytes:
+                    return abort(f"File exceeds the {max_size_mb:.0f} MB limit.")
+                sha256.update(chunk)
+                out.write(chunk)
+                if probe is not None and probe.stdin is not None:
+                    try:
+                        probe.stdin.write(chunk)
+                    except (BrokenPipeError, OSError):
+                        probe.stdin = None
+
+        if size == 0:
+            return abort("Uploaded file is empty.")
+        if len(header) < 16 and sniff_container(header) is None:
+            return abort("File does not look like a supported video container.")
+
+        info = {"format": None, "duration": None}
+        if probe is not None:
+            if probe.stdin is not None:
+                try:
+                    probe.stdin.close()
+                except OSError:
+                    pass
+                probe.stdin = None
+            try:
+                stdout, _ = probe.communicate(timeout=60)
+                info = _parse_probe(stdout)
+            except subprocess.TimeoutExpired:
+                probe.kill()
+                probe.wait()
+            # Streams without a duration header (e.g. webm over a pipe) need a seekable probe
+            if info["format"] is None or info["duration"] is None:
+                info = probe_video(str(part_path))
+            expected = PROBE_FORMATS.get(ext)
+            if info["format"] is None or (expected and expected not in info["format"]):
+                return abort("ffprobe could not read this file as a video.")
+
+        os.replace(part_path, dest)
+        return {
+            "success": True,
+            "path": dest,
+            "size": size,
+            "sha256": sha256.hexdigest(),
+            "format": info["format"],
+            "duration": info["duration"],
+        }
+    except Exception as e:
+        return abort(str(e))
 
 class VideoProcessor:
     
@@ -56,17 +200,18 @@ class VideoProcessor:
             print(f"Error extracting audio: {e}")
             return False
     
-    def extract_frames(self, lecture_id: int) -> List[Tuple[float, str]]:
+    def extract_frames(self, lecture_id: int, store=None) -> List[Tuple[float, str]]:
+        """Sample every FRAME_EXTRACTION_RATE-th frame into the frame store.
+
+        Consecutive near-identical frames share one stored file, so the
+        returned paths can repeat."""
         if not self.video or not self.video.isOpened():
             if not self.open_video():
                 return []
         
-        frames_dir = PROCESSED_DIR / f"lecture_{lecture_id}" / "frames"
-        frames_dir.mkdir(parents=True, exist_ok=True)
-        
+        store = store or FrameStore()
         extracted_frames = []
         frame_count = 0
-        saved_count = 0
         
         try:
             while True:
@@ -76,11 +221,7 @@ class VideoProcessor:
                 
                 if frame_count % FRAME_EXTRACTION_RATE == 0:
                     timestamp = frame_count / self.fps
-                    frame_path = frames_dir / f"frame_{saved_count:04d}.jpg"
-                    
-                    cv2.imwrite(str(frame_path), frame)
-                    extracted_frames.append((timestamp, str(frame_path)))
-                    saved_count += 1
+                    extracted_frames.append((timestamp, store.put(frame)))
                 
                 frame_count += 1
             
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Background worker for local lecture processing.
+Claims jobs from the processing_jobs table and runs LectureProcessor
+(or, for summary jobs, summarizer.build_digest) outside the Streamlit
+script thread, so reruns and closed tabs do not kill long jobs.
+
+Usage: python worker.py [--concurrency N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import time
+from datetime import datetime
+
+from database import SessionLocal, ProcessingJob, init_database
+from job_queue import claim_next_job, QueueCancelFlag, QueueProgressReporter
+from config import WORKER_CONCURRENCY, WORKER_POLL_INTERVAL
+
+
+def _finish_job(job_id: int, status: str, message: str, error: str = None):
+    db = SessionLocal()
+    try:
+        db.query(ProcessingJob).filter(ProcessingJob.id == job_id).update({
+            "status": status,
+            "message": message,
+            "error": error,
+            "finished_at": datetime.utcnow(),
+            "progress": 100 if status == "completed" else ProcessingJob.progress,
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_job(job_id: int, lecture_id: int, video_path: str, profile: bool = False):
+    """Entry point of a job process. Loads its own models and DB session."""
+    from lecture_processor import LectureProcessor
+
+    # Ctrl+C goes to the worker, which lets running jobs finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cancel_flag = QueueCancelFlag(job_id)
+    db = SessionLocal()
+    try:
+        ok = LectureProcessor().process_lecture(
+            lecture_id, video_path, db, QueueProgressReporter(job_id), cancel_flag,
+            run_id=f"job-{job_id}", profile=profile or None
+        )
+    except Exception as e:
+        _finish_job(job_id, "failed", f"Error: {e}", str(e))
+        return
+    finally:
+        db.close()
+
+    if cancel_flag.is_set():
+        _finish_job(job_id, "cancelled", "Cancelled")
+    elif ok:
+        _finish_job(job_id, "completed", "Processing complete!")
+    else:
+        _finish_job(job_id, "failed", "Processing failed. Check the worker log.", "process_lecture returned False")
+
+
+def run_summary_job(job_id: int, lecture_id: int, api_url: str = None):
+    """Entry point of a summary job process: summary and chapters through the job's backend at low priority."""
+    from llm_client import LLMClient
+    from summarizer import build_digest
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    db = SessionLocal()
+    try:
+        QueueProgressReporter(job_id)("Summarizing through the AI backend...", 10)
+        result = build_digest(db, lecture_id, LLMClient(api_url))
+    except Exception as e:
+        _finish_job(job_id, "failed", f"Error: {e}", str(e))
+        return
+    finally:
+        db.close()
+
+    if QueueCancelFlag(job_id).is_set():
+        _finish_job(job_id, "cancelled", "Cancelled")
+    elif result["success"]:
+        _finish_job(job_id, "completed", f"Summary and {len(result['chapters'])} chapters saved")
+    else:
+        _finish_job(job_id, "failed", "Summary failed", result.get("error"))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except (OSError, TypeError):
+        return False
+
+
+def recover_orphaned_jobs():
+    """Requeue jobs left 'running' by a worker that is no longer alive."""
+    db = SessionLocal()
+    try:
+        orphaned = db.query(ProcessingJob).filter(ProcessingJob.status == "running").all()
+        for job in orphaned:
+            if not _pid_alive(job.worker_pid):
+                job.status = "cancelled" if job.cancel_requested else "queued"
+                job.message = "Requeued after worker restart" if job.status == "queued" else "Cancelled"
+                job.worker_pid = None
+        db.commit()
+        if orphaned:
+            print(f"Recovered {len(orphaned)} orphaned job(s)")
+    finally:
+        db.close()
+
+
+def run_worker(concurrency: int = WORKER_CONCURRENCY, poll_interval: float = WORKER_POLL_INTERVAL):
+    init_database()
+    recover_orphaned_jobs()
+
+    # spawn: every job process gets fresh DB connections and model instances
+    ctx = multiprocessing.get_context("spawn")
+    running = {}
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        print("Stopping after current jobs finish...")
+
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGTERM, handle_stop)
+
+    print(f"Worker started (pid {os.getpid()}, concurrency {concurrency})")
+    while not (stopping and not running):
+        for job_id, proc in list(running.items()):
+            if not proc.is_alive():
+                proc.join()
+                if proc.exitcode != 0:
+                    _finish_job(job_id, "failed", f"Job process exited with code {proc.exitcode}")
+                print(f"Job {job_id} finished (exit code {proc.exitcode})")
+                del running[job_id]
+
+        while not stopping and len(running) < concurrency:
+            db = SessionLocal()
+            try:
+                job = claim_next_job(db, os.getpid())
+                if job is None:
+                    break
+                job_id, lecture_id, video_path, profile = job.id, job.lecture_id, job.video_path, bool(job.profile)
+                api_url = job.api_url
+                kind = job.kind or "process"
+            finally:
+                db.close()
+            if kind == "summary":
+                proc = ctx.Process(target=run_summary_job, args=(job_id, lecture_id, api_url), daemon=False)
+            else:
+                proc = ctx.Process(target=run_job, args=(job_id, lecture_id, video_path, profile), daemon=False)
+            proc.start()
+            running[job_id] = proc
+            print(f"Job {job_id} ({kind}) started for lecture {lecture_id} (pid {proc.pid})")
+
+        time.sleep(poll_interval)
+
+    print("Worker stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lecture Extraction System processing worker')
+    parser.add_argument('-c', '--concurrency', type=int, default=WORKER_CONCURRENCY,
+                        help='Number of lectures to process at once')
+    parser.add_argument('--poll-interval', type=float, default=WORKER_POLL_INTERVAL,
+                        help='Seconds between queue checks')
+    args = parser.parse_args()
+    run_worker(max(1, args.concurrency), args.poll_interval)
+
+
+if __name__ == '__main__':
+    main()